@@ -1,10 +1,42 @@
 from django.contrib import admin
-from .models import Attendance
+from django.utils import timezone
+from .models import Attendance, AttendanceDailySummary, Shift, ShiftAssignment
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
-    list_display = ['employee', 'date', 'check_in', 'check_out', 'status']
-    list_filter = ['date', 'employee__department']
+    list_display = ['employee', 'date', 'check_in', 'check_out', 'status', 'late_minutes', 'auto_closed']
+    list_filter = ['date', 'employee__department', 'auto_closed']
     search_fields = ['employee__first_name', 'employee__last_name', 'employee__employee_id']
     date_hierarchy = 'date'
     ordering = ['-date']
+    actions = ['mark_reviewed']
+
+    @admin.action(description='Mark auto-closed check-outs as reviewed')
+    def mark_reviewed(self, request, queryset):
+        updated = queryset.filter(auto_closed=True).update(auto_closed=False, updated_at=timezone.now())
+        self.message_user(request, f"{updated} attendance records marked as reviewed.")
+
+
+@admin.register(AttendanceDailySummary)
+class AttendanceDailySummaryAdmin(admin.ModelAdmin):
+    list_display = [
+        'date', 'department', 'location', 'headcount', 'present', 'late', 'on_leave', 'holiday', 'absent', 'auto_closed',
+    ]
+    list_filter = ['department', 'location']
+    date_hierarchy = 'date'
+    ordering = ['-date', 'department']
+
+
+@admin.register(Shift)
+class ShiftAdmin(admin.ModelAdmin):
+    list_display = ['name', 'start_time', 'end_time', 'grace_minutes', 'timezone', 'is_default', 'is_active']
+    list_filter = ['is_default', 'is_active', 'timezone']
+    search_fields = ['name']
+
+
+@admin.register(ShiftAssignment)
+class ShiftAssignmentAdmin(admin.ModelAdmin):
+    list_display = ['shift', 'employee', 'region', 'created_at']
+    list_filter = ['shift', 'region']
+    search_fields = ['employee__first_name', 'employee__last_name', 'employee__employee_id']
+    raw_id_fields = ['employee']
@@ -0,0 +1,110 @@
+# attendance/archive.py
+"""Archive tier for closed attendance years and transparent live/archive query routing."""
+import csv
+import gzip
+import os
+from datetime import date
+
+from django.db import transaction
+
+from .models import Attendance, AttendanceArchive
+
+BATCH_SIZE = 5000
+COLUMNS = [
+    'id', 'employee_id', 'date', 'check_in', 'check_out', 'created_at', 'updated_at',
+    'shift_id', 'is_late', 'late_minutes', 'auto_closed',
+]
+
+
+# -------------------------------
+# Query routing
+# -------------------------------
+
+def latest_archived_date():
+    """Newest date held in the archive table, or None (one indexed lookup)"""
+    return AttendanceArchive.objects.order_by('-date').values_list('date', flat=True).first()
+
+
+def reaches_archive(date_from=None):
+    """True when a query starting at date_from may need archived rows"""
+    latest = latest_archived_date()
+    if latest is None:
+        return False
+    if not date_from:
+        return True
+    if isinstance(date_from, str):
+        try:
+            date_from = date.fromisoformat(date_from)
+        except ValueError:
+            return True
+    return date_from <= latest
+
+
+def with_archive(build, date_from=None):
+    """
+    Apply build(queryset) to Attendance and, when the date range reaches
+    the archive, UNION ALL it with the same build over AttendanceArchive.
+    build must not order (compound statements reject ORDER BY in parts);
+    order, slice, count or paginate the returned queryset as usual.
+    """
+    live = build(Attendance.objects.all()).order_by()
+    if not reaches_archive(date_from):
+        return live
+    return live.union(build(AttendanceArchive.objects.all()).order_by(), all=True)
+
+
+# -------------------------------
+# Moving closed years
+# -------------------------------
+
+def year_queryset(year):
+    return Attendance.objects.filter(date__gte=date(year, 1, 1), date__lte=date(year, 12, 31))
+
+
+def archive_year_to_table(year, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Copy one year into AttendanceArchive and delete it from Attendance in
+    batches of primary keys; each batch is its own transaction, and the
+    insert ignores rows already copied, so an interrupted run can resume.
+    """
+    moved = 0
+    while True:
+        ids = list(year_queryset(year).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return moved
+        with transaction.atomic():
+            rows = Attendance.objects.filter(id__in=ids).values_list(*COLUMNS)
+            AttendanceArchive.objects.bulk_create(
+                [AttendanceArchive(**dict(zip(COLUMNS, row))) for row in rows],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            Attendance.objects.filter(id__in=ids).delete()
+        moved += len(ids)
+        if on_batch:
+            on_batch(moved)
+
+
+def export_year_to_file(year, output_dir, batch_size=BATCH_SIZE):
+    """
+    Write one year, live and archived rows alike, to
+    <output_dir>/attendance-<year>.csv.gz. The file is a copy for cold
+    storage: nothing is deleted, so the rows stay visible to with_archive.
+    Returns (path, rows).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"attendance-{year}.csv.gz")
+    partial = path + '.partial'
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    rows = with_archive(
+        lambda queryset: queryset.filter(date__gte=first, date__lte=last).values_list(*COLUMNS), first
+    ).order_by('id')
+    written = 0
+    with gzip.open(partial, 'wt', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(COLUMNS)
+        for row in rows.iterator(chunk_size=batch_size):
+            writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value for value in row])
+            written += 1
+    os.replace(partial, path)
+    return path, written
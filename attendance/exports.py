@@ -0,0 +1,217 @@
+# attendance/exports.py
+"""Streaming CSV / XLSX attendance exports for payroll tools."""
+import csv
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from django.utils.timezone import localtime
+
+from .models import format_duration
+from .reports import report_queryset
+
+CHUNK_SIZE = 2000
+# Rows written to the zip stream between yields
+FLUSH_EVERY = 500
+
+HEADERS = [
+    'Employee ID', 'Name', 'Department', 'Date', 'Check-In', 'Check-Out',
+    'Status', 'Punctuality', 'Duration (hours)', 'Duration',
+]
+
+
+def export_rows(params):
+    """
+    Yield one tuple per attendance row matching the attendance report
+    filters. Status, punctuality and duration come from SQL annotations;
+    rows are streamed with iterator() so memory stays flat.
+    """
+    rows = (
+        report_queryset('admin', params, lambda attendances: (
+            attendances.with_day_status().with_punctuality().with_duration().values_list(
+                'employee__employee_id', 'employee__first_name', 'employee__last_name', 'employee__department',
+                'date', 'check_in', 'check_out', 'day_status', 'punctuality', 'duration',
+            )
+        ))
+        .order_by('-date', 'employee__employee_id')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for employee_id, first_name, last_name, department, day, check_in, check_out, status, punctuality, duration in rows:
+        yield (
+            employee_id,
+            f"{first_name} {last_name}",
+            department,
+            day,
+            localtime(check_in) if check_in else None,
+            localtime(check_out) if check_out else None,
+            status,
+            punctuality,
+            round(duration.total_seconds() / 3600, 2) if duration is not None else None,
+            format_duration(duration) if duration is not None else ('In Progress' if status == 'In Progress' else '-'),
+        )
+
+
+# -------------------------------
+# CSV
+# -------------------------------
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(rows, headers=HEADERS):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens UTF-8 names correctly
+    yield '\ufeff' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+# -------------------------------
+# XLSX
+# -------------------------------
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Attendance" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+# cellXfs: 0 = general, 1 = date, 2 = date + time, 3 = bold header
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/></sheetView></sheetViews>'
+    '<sheetData>'
+)
+SHEET_TAIL = '</sheetData></worksheet>'
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+class _StreamBuffer:
+    """Write-only, non-seekable sink for zipfile; drained by the generator"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _cell(value, style=None):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, datetime):
+        serial = (value.replace(tzinfo=None) - EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c s="2"><v>{serial:.6f}</v></c>'
+    if isinstance(value, date):
+        return f'<c s="1"><v>{(value - EXCEL_EPOCH.date()).days}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    style_attr = f' s="{style}"' if style is not None else ''
+    return f'<c t="inlineStr"{style_attr}><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _row(values, style=None):
+    return '<row>' + ''.join(_cell(value, style) for value in values) + '</row>'
+
+
+def stream_xlsx(rows, headers=HEADERS):
+    """
+    Build a single-sheet workbook with zipfile on a non-seekable buffer
+    (entries use data descriptors), yielding compressed bytes as rows
+    are written instead of assembling the file in memory.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', ROOT_RELS)
+        archive.writestr('xl/workbook.xml', WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        archive.writestr('xl/styles.xml', STYLES)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write((SHEET_HEAD + _row(headers, style=3)).encode())
+            for count, row in enumerate(rows, 1):
+                sheet.write(_row(row).encode())
+                if count % FLUSH_EVERY == 0:
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            sheet.write(SHEET_TAIL.encode())
+    yield buffer.drain()
@@ -0,0 +1,228 @@
+# attendance/ingest.py
+"""Bulk import of biometric / door-access punch logs into Attendance."""
+import csv
+import re
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from hrms.db import bulk_upsert
+from hr.models import Employee
+from .models import Attendance
+from .services import AttendanceRollupService
+from .shifts import ShiftResolver
+
+CHUNK_SIZE = 2000
+
+TIMESTAMP_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M',
+    '%Y/%m/%d %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d-%m-%Y %H:%M:%S',
+    '%d-%m-%Y %H:%M',
+)
+EMPLOYEE_COLUMNS = ('employee_id', 'emp_id', 'employee', 'employee_code', 'badge', 'user_id')
+TIMESTAMP_COLUMNS = ('timestamp', 'datetime', 'punch_time', 'time_stamp')
+LOG_SPLIT = re.compile(r'[\s,;|]+')
+
+
+class PunchParseError(ValueError):
+    pass
+
+
+def parse_timestamp(value):
+    value = value.strip()
+    if '.' in value:
+        value = value.split('.', 1)[0]
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise PunchParseError(f"Unrecognised timestamp: {value!r}")
+
+
+def _pick(row, names):
+    for name in names:
+        value = row.get(name)
+        if value:
+            return value.strip()
+    return None
+
+
+def iter_punches(lines, stats):
+    """
+    Yield (employee_code, naive local datetime) from a CSV export with a
+    header row (employee_id + timestamp, or employee_id + date + time) or a
+    plain device log with "<code> <date> <time> ..." per line.
+    Unparseable lines are counted in stats['bad_lines'] and skipped.
+    """
+    lines = iter(lines)
+    first = next((line for line in lines if line.strip()), None)
+    if first is None:
+        return
+
+    header = [col.strip().lower() for col in next(csv.reader([first]))]
+    if any(col in EMPLOYEE_COLUMNS for col in header):
+        for row in csv.DictReader(lines, fieldnames=header):
+            stats['lines'] += 1
+            code = _pick(row, EMPLOYEE_COLUMNS)
+            stamp = _pick(row, TIMESTAMP_COLUMNS)
+            if not stamp and row.get('date') and row.get('time'):
+                stamp = f"{row['date'].strip()} {row['time'].strip()}"
+            try:
+                if not code or not stamp:
+                    raise PunchParseError('missing column')
+                yield code, parse_timestamp(stamp)
+            except PunchParseError:
+                stats['bad_lines'] += 1
+        return
+
+    for line in _chain(first, lines):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        stats['lines'] += 1
+        parts = LOG_SPLIT.split(line.strip())
+        try:
+            if len(parts) < 2:
+                raise PunchParseError('too few fields')
+            if 'T' in parts[1] or len(parts) == 2:
+                yield parts[0], parse_timestamp(parts[1])
+            else:
+                yield parts[0], parse_timestamp(f"{parts[1]} {parts[2]}")
+        except PunchParseError:
+            stats['bad_lines'] += 1
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+class PunchImporter:
+    """
+    Stream one or more punch files into Attendance.
+
+    Punches are collapsed to first-in/last-out per (employee, date), merged
+    with any row already stored for that day and written with bulk_upsert,
+    so importing the same file twice leaves the table unchanged.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.employee_map = dict(Employee.objects.values_list('employee_id', 'id'))
+        self.stats = {
+            'lines': 0,
+            'bad_lines': 0,
+            'punches': 0,
+            'employee_days': 0,
+            'written': 0,
+            'summary_days': 0,
+            'unknown_employees': set(),
+        }
+        self.days = {}
+
+    def feed(self, lines):
+        """Parse and collapse a file-like/iterable of text lines"""
+        for code, stamp in iter_punches(lines, self.stats):
+            self.stats['punches'] += 1
+            employee_id = self.employee_map.get(code)
+            if employee_id is None:
+                self.stats['unknown_employees'].add(code)
+                continue
+            key = (employee_id, stamp.date())
+            span = self.days.get(key)
+            if span is None:
+                self.days[key] = [stamp, stamp]
+            elif stamp < span[0]:
+                span[0] = stamp
+            elif stamp > span[1]:
+                span[1] = stamp
+
+    @staticmethod
+    def _merge(stored, first_in, last_out):
+        """
+        (check_in, check_out, auto_closed) for a day from the stored row, if
+        any, and the imported first/last punch. A check-out filled in by
+        AttendanceCloseService is not a punch: a real one later than the
+        check-in replaces it and clears auto_closed, otherwise it is kept.
+        """
+        stored_in, stored_out, auto_closed = stored or (None, None, False)
+        check_in = min(t for t in (stored_in, first_in) if t is not None)
+        punches = [first_in, last_out] if auto_closed else [stored_out, first_in, last_out]
+        real_out = [t for t in punches if t is not None and t > check_in]
+        if real_out:
+            return check_in, max(real_out), False
+        return check_in, stored_out if auto_closed else None, auto_closed
+
+    def save(self):
+        """Write collapsed days in chunks; returns the stats dict"""
+        tz = timezone.get_current_timezone()
+        now = timezone.now()
+        keys = sorted(self.days)
+        self.stats['employee_days'] = len(keys)
+        changed_days = set()
+
+        for offset in range(0, len(keys), self.chunk_size):
+            chunk = keys[offset:offset + self.chunk_size]
+            employee_ids = {employee_id for employee_id, _ in chunk}
+            dates = {day for _, day in chunk}
+
+            with transaction.atomic():
+                existing = {
+                    (employee_id, day): (check_in, check_out, auto_closed)
+                    for employee_id, day, check_in, check_out, auto_closed in (
+                        Attendance.objects.select_for_update()
+                        .filter(employee_id__in=employee_ids, date__in=dates)
+                        .values_list('employee_id', 'date', 'check_in', 'check_out', 'auto_closed')
+                    )
+                }
+
+                rows = []
+                for key in chunk:
+                    first_in, last_out = (timezone.make_aware(stamp, tz) for stamp in self.days[key])
+                    check_in, check_out, auto_closed = self._merge(existing.get(key), first_in, last_out)
+                    if existing.get(key) == (check_in, check_out, auto_closed):
+                        continue
+                    shift_id, late, late_minutes = ShiftResolver.evaluate(key[0], check_in)
+                    rows.append(Attendance(
+                        employee_id=key[0],
+                        date=key[1],
+                        check_in=check_in,
+                        check_out=check_out,
+                        auto_closed=auto_closed,
+                        created_at=now,
+                        updated_at=now,
+                        shift_id=shift_id,
+                        is_late=late,
+                        late_minutes=late_minutes,
+                    ))
+
+                bulk_upsert(
+                    Attendance,
+                    rows,
+                    unique_fields=['employee', 'date'],
+                    update_fields=['check_in', 'check_out', 'auto_closed', 'updated_at', 'shift', 'is_late', 'late_minutes'],
+                    batch_size=self.chunk_size,
+                )
+            self.stats['written'] += len(rows)
+            changed_days.update(row.date for row in rows)
+
+        # Keep the daily rollup in step with the imported days
+        if changed_days:
+            AttendanceRollupService.refresh_days(changed_days)
+        self.stats['summary_days'] = len(changed_days)
+        return self.stats
+
+
+def import_punch_files(files, chunk_size=CHUNK_SIZE):
+    """Convenience wrapper: feed every iterable of lines, then save"""
+    importer = PunchImporter(chunk_size=chunk_size)
+    for lines in files:
+        importer.feed(lines)
+    return importer.save()
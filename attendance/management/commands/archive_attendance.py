@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from attendance import archive, partitioning
+from attendance.models import Attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Move closed attendance years out of the live table into attendance_archive, "
+        "optionally writing a gzip CSV copy of each year"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before-year', type=int, help='Archive every year before this one')
+        parser.add_argument('--year', type=int, help='Archive a single year')
+        parser.add_argument(
+            '--export-dir',
+            help='Also write each archived year to <dir>/attendance-<year>.csv.gz (a copy; the rows stay queryable)',
+        )
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only report row counts')
+
+    def handle(self, *args, **options):
+        current_year = timezone.localdate().year
+        if options['year']:
+            years = [options['year']]
+        elif options['before_year']:
+            first = Attendance.objects.aggregate(first=Min('date'))['first']
+            years = list(range(first.year, options['before_year'])) if first else []
+        else:
+            raise CommandError('Pass --year or --before-year')
+        if any(year >= current_year for year in years):
+            raise CommandError(f"Only closed years (before {current_year}) can be archived")
+
+        for year in years:
+            rows = archive.year_queryset(year).count()
+            if not rows:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f"{year}: {rows} rows would be moved to attendance_archive")
+                continue
+
+            progress = lambda moved: self.stdout.write(f"  {year}: {moved}/{rows}")  # noqa: E731
+            moved = archive.archive_year_to_table(year, options['batch_size'], progress)
+            self.stdout.write(self.style.SUCCESS(f"{year}: {moved} rows moved to attendance_archive"))
+            if options['export_dir']:
+                path, written = archive.export_year_to_file(year, options['export_dir'], options['batch_size'])
+                self.stdout.write(self.style.SUCCESS(f"{year}: {written} rows copied to {path}"))
+
+        if not options['dry_run'] and years and partitioning.is_supported():
+            # The archived months are empty now; dropping their partitions returns the space at once
+            statements = partitioning.drop_partitions_sql(partitioning.existing_partitions(), set(years))
+            partitioning.execute(statements)
+            for statement in statements:
+                self.stdout.write(statement)
@@ -0,0 +1,93 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from attendance.models import Attendance
+from attendance.services import AttendanceService
+from hr.models import Employee
+
+
+class Command(BaseCommand):
+    help = "Simulate a morning check-in rush against AttendanceService and report throughput/latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000, help='Number of employees to punch in')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent worker threads')
+        parser.add_argument(
+            '--duplicates',
+            type=int,
+            default=2,
+            help='Check-ins per employee (values above 1 simulate double submits)',
+        )
+        parser.add_argument(
+            '--date',
+            default='2099-01-05',
+            help='Bench date (YYYY-MM-DD); rows for this date are deleted afterwards',
+        )
+        parser.add_argument('--check-out', action='store_true', help='Also run a check-out round')
+
+    def handle(self, *args, **options):
+        try:
+            bench_day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('--date must be YYYY-MM-DD')
+        if bench_day <= timezone.localdate():
+            raise CommandError('--date must be in the future so real attendance is never touched')
+
+        employee_ids = list(
+            Employee.objects.filter(status='active').values_list('id', flat=True)[:options['employees']]
+        )
+        if not employee_ids:
+            raise CommandError('No active employees to benchmark with')
+
+        morning = timezone.make_aware(datetime.combine(bench_day, datetime.min.time().replace(hour=9, minute=30)))
+        Attendance.objects.filter(date=bench_day).delete()
+        try:
+            jobs = employee_ids * max(options['duplicates'], 1)
+            self._run('check_in', AttendanceService.check_in, jobs, morning, options['workers'])
+            if options['check_out']:
+                evening = morning.replace(hour=18)
+                self._run('check_out', AttendanceService.check_out, employee_ids, evening, options['workers'])
+            rows = Attendance.objects.filter(date=bench_day).count()
+            self.stdout.write(f"Rows for {bench_day}: {rows} (expected {len(employee_ids)})")
+        finally:
+            Attendance.objects.filter(date=bench_day).delete()
+
+    def _run(self, label, func, employee_ids, now, workers):
+        def punch(job):
+            index, employee_id = job
+            started = time.perf_counter()
+            try:
+                # Distinct timestamps so a repeated submit is told apart from the first
+                result, _ = func(employee_id, now=now + timedelta(microseconds=index))
+            finally:
+                close_old_connections()
+            return result, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(punch, enumerate(employee_ids)))
+        elapsed = time.perf_counter() - started
+
+        results = {}
+        latencies = sorted(latency * 1000 for _, latency in outcomes)
+        for result, _ in outcomes:
+            results[result] = results.get(result, 0) + 1
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {len(outcomes)} requests in {elapsed:.2f}s "
+            f"({len(outcomes) / elapsed * 60:,.0f}/min with {workers} workers)"
+        ))
+        self.stdout.write(
+            f"  latency ms: p50={percentile(50):.1f} p95={percentile(95):.1f} "
+            f"p99={percentile(99):.1f} mean={statistics.mean(latencies):.1f}"
+        )
+        self.stdout.write("  results: " + ", ".join(f"{k}={v}" for k, v in sorted(results.items())))
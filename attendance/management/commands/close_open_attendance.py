@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from attendance.services import AUTO_CLOSE_HOURS, AUTO_CLOSE_POLICY, AttendanceCloseService
+
+
+class Command(BaseCommand):
+    help = "Close attendance rows of past days that have no check-out (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--policy', choices=AttendanceCloseService.POLICIES, default=AUTO_CLOSE_POLICY,
+            help='shift_end: close at the end of the shift; hours: close --hours after check-in',
+        )
+        parser.add_argument('--hours', type=float, default=AUTO_CLOSE_HOURS, help='Hours after check-in for --policy hours')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would be closed')
+
+    def handle(self, *args, **options):
+        closed, days = AttendanceCloseService.close_open_records(
+            policy=options['policy'],
+            hours=options['hours'],
+            dry_run=options['dry_run'],
+        )
+        span = f" across {len(days)} days ({min(days)} to {max(days)})" if days else ''
+        if options['dry_run']:
+            self.stdout.write(f"Would close {closed} open attendance records{span}")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {closed} open attendance records{span} using the {options['policy']} policy; "
+            f"they are flagged auto_closed for review"
+        ))
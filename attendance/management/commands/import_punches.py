@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.ingest import CHUNK_SIZE, PunchImporter
+
+
+class Command(BaseCommand):
+    help = "Import biometric/door-access punch files (CSV or device logs) into Attendance"
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='Punch CSV/log files to import')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per upsert batch')
+        parser.add_argument('--encoding', default='utf-8-sig', help='File encoding')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        importer = PunchImporter(chunk_size=options['chunk_size'])
+        for path in options['files']:
+            try:
+                with open(path, newline='', encoding=options['encoding']) as handle:
+                    importer.feed(handle)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+        stats = importer.save()
+
+        self.stdout.write(
+            f"{stats['lines']} lines, {stats['punches']} punches, "
+            f"{stats['employee_days']} employee-days, {stats['written']} attendance rows written"
+        )
+        if stats['bad_lines']:
+            self.stdout.write(self.style.WARNING(f"{stats['bad_lines']} unparseable lines skipped"))
+        if stats['unknown_employees']:
+            sample = ', '.join(sorted(stats['unknown_employees'])[:10])
+            self.stdout.write(self.style.WARNING(
+                f"{len(stats['unknown_employees'])} unknown employee IDs skipped: {sample}"
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.2f}s"))
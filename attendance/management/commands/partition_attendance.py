@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from attendance import partitioning
+from attendance.models import Attendance
+
+
+class Command(BaseCommand):
+    help = "Partition attendance_attendance by month on MySQL, or add upcoming monthly partitions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3, help='Future months to pre-create')
+        parser.add_argument('--apply', action='store_true', help='Execute the statements (default: print them)')
+
+    def handle(self, *args, **options):
+        connection = partitioning.get_connection()
+        if not partitioning.is_supported(connection):
+            self.stdout.write(self.style.WARNING(
+                f"Range partitioning is only used on MySQL; '{connection.vendor}' keeps the single table "
+                "(date queries use attendance_date_idx). Nothing to do."
+            ))
+            return
+
+        today = timezone.localdate()
+        last_month = partitioning.add_months(partitioning.month_start(today), options['months_ahead'])
+        partitions = partitioning.existing_partitions(connection)
+        if partitions:
+            statements = partitioning.extend_partition_sql(partitions, last_month)
+        else:
+            first_day = Attendance.objects.aggregate(first=Min('date'))['first'] or today
+            statements = partitioning.initial_partition_sql(first_day, last_month, connection)
+
+        if not statements:
+            self.stdout.write(self.style.SUCCESS(f"Partitions already cover {last_month:%Y-%m}"))
+            return
+        for statement in statements:
+            self.stdout.write(statement + ';')
+        if not options['apply']:
+            self.stdout.write(self.style.WARNING("Dry run; re-run with --apply to execute"))
+            return
+        partitioning.execute(statements, connection)
+        self.stdout.write(self.style.SUCCESS(f"Attendance partitioned through {last_month:%Y-%m}"))
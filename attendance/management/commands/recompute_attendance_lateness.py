@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attendance.models import Attendance
+from attendance.services import AttendanceRollupService
+from attendance.shifts import ShiftResolver
+
+
+class Command(BaseCommand):
+    help = "Re-evaluate shift, is_late and late_minutes on stored attendance rows (after shift changes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from_date', help='First date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='to_date', help='Last date (YYYY-MM-DD)')
+        parser.add_argument('--only-missing', action='store_true', help='Only rows with no is_late value yet')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--rollup', action='store_true', help='Refresh daily summaries for changed days')
+
+    def handle(self, *args, **options):
+        rows = Attendance.objects.all()
+        try:
+            if options['from_date']:
+                rows = rows.filter(date__gte=datetime.strptime(options['from_date'], '%Y-%m-%d').date())
+            if options['to_date']:
+                rows = rows.filter(date__lte=datetime.strptime(options['to_date'], '%Y-%m-%d').date())
+        except ValueError:
+            raise CommandError('Dates must be YYYY-MM-DD')
+        if options['only_missing']:
+            rows = rows.filter(is_late__isnull=True)
+
+        ShiftResolver.invalidate()
+        batch_size = options['batch_size']
+        changed = []
+        changed_days = set()
+        scanned = 0
+        for record in rows.only('id', 'employee_id', 'date', 'check_in', 'shift_id', 'is_late', 'late_minutes').iterator(
+            chunk_size=batch_size
+        ):
+            scanned += 1
+            evaluated = ShiftResolver.evaluate(record.employee_id, record.check_in)
+            if evaluated != (record.shift_id, record.is_late, record.late_minutes):
+                record.shift_id, record.is_late, record.late_minutes = evaluated
+                changed.append(record)
+                changed_days.add(record.date)
+            if len(changed) >= batch_size:
+                self._flush(changed, batch_size)
+        self._flush(changed, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} rows; {len(changed_days)} days had changes"))
+        if options['rollup'] and changed_days:
+            AttendanceRollupService.refresh_days(changed_days)
+            self.stdout.write(f"Refreshed daily summaries for {len(changed_days)} days")
+
+    def _flush(self, changed, batch_size):
+        if changed:
+            with transaction.atomic():
+                Attendance.objects.bulk_update(changed, ['shift', 'is_late', 'late_minutes'], batch_size=batch_size)
+            changed.clear()
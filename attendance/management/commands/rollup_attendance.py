@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.services import AttendanceRollupService
+
+
+class Command(BaseCommand):
+    help = "Rebuild AttendanceDailySummary rows (default: yesterday and today, for a nightly cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', dest='from_date', help='First day to roll up (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='to_date', help='Last day to roll up (YYYY-MM-DD, default: --date)')
+        parser.add_argument('--days', type=int, default=None, help='Roll up the last N days ending today')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        try:
+            if options['days']:
+                start, end = today - timedelta(days=options['days'] - 1), today
+            elif options['from_date']:
+                start = datetime.strptime(options['from_date'], '%Y-%m-%d').date()
+                end = datetime.strptime(options['to_date'], '%Y-%m-%d').date() if options['to_date'] else start
+            else:
+                start, end = today - timedelta(days=1), today
+        except ValueError:
+            raise CommandError('Dates must be YYYY-MM-DD')
+        if end < start:
+            raise CommandError('--to must not be before --date')
+
+        rows = AttendanceRollupService.refresh_range(start, min(end, today))
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {start} to {min(end, today)}: {rows} summary rows"))
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attendance import reports
+from attendance.models import ReportJob
+
+
+class Command(BaseCommand):
+    help = "Build queued attendance PDF reports (the default ATTENDANCE_REPORT_EXECUTOR = 'worker')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between queue polls')
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            default=None,
+            help='Delete report jobs and files older than this many days before starting',
+        )
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            purged = reports.purge_jobs(timezone.now() - timedelta(days=options['purge_days']))
+            self.stdout.write(f"Purged {purged} old report jobs")
+
+        while True:
+            built = 0
+            for job_id in ReportJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True):
+                if reports.run_job(job_id):
+                    built += 1
+                    job = ReportJob.objects.get(pk=job_id)
+                    self.stdout.write(f"Report #{job.pk} {job.status} ({job.total_rows} rows)")
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(f"Built {built} reports"))
+                return
+            time.sleep(options['interval'])
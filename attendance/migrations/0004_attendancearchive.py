@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_reportjob'),
+        ('hr', '0004_employeedocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('check_in', models.DateTimeField()),
+                ('check_out', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'attendance_archive',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date'], name='attendance_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='attendancearchive',
+            name='employee',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance', to='hr.employee'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancearchive',
+            index=models.Index(fields=['date'], name='attendance_archive_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendancearchive',
+            unique_together={('employee', 'date')},
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendancearchive'),
+        ('hr', '0004_employeedocument'),
+        ('leave', '0010_leaveday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Shift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('grace_minutes', models.PositiveSmallIntegerField(default=0)),
+                ('timezone', models.CharField(default='Asia/Kolkata', max_length=64)),
+                ('is_default', models.BooleanField(default=False, help_text='Used for employees without an assignment')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'attendance_shifts',
+                'ordering': ['start_time', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='is_late',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='late_minutes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancearchive',
+            name='is_late',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancearchive',
+            name='late_minutes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='shift',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='attendance.shift'),
+        ),
+        migrations.AddField(
+            model_name='attendancearchive',
+            name='shift',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='attendance.shift'),
+        ),
+        migrations.CreateModel(
+            name='ShiftAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shift_assignment', to='hr.employee')),
+                ('region', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shift_assignment', to='leave.region')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='attendance.shift')),
+            ],
+            options={
+                'db_table': 'attendance_shift_assignments',
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('employee__isnull', False), ('region__isnull', True)), models.Q(('employee__isnull', True), ('region__isnull', False)), _connector='OR'), name='shift_assignment_employee_xor_region')],
+            },
+        ),
+    ]
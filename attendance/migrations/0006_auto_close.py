@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_shifts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='auto_closed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='attendancearchive',
+            name='auto_closed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='attendancedailysummary',
+            name='auto_closed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,5 +1,170 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Case, CharField, DurationField, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import TruncTime
+from django.db.models.lookups import LessThan
+from django.utils import timezone
 from hr.models import Employee
+from leave.models import Region
+
+# Start of the implicit shift used when no Shift is marked as default
+OFFICE_START_TIME = time(9, 30)
+OFFICE_END_TIME = time(18, 30)
+# A completed day shorter than this is reported as a half day
+HALF_DAY_THRESHOLD = timedelta(hours=4)
+
+
+def day_status(day, check_in, check_out, today=None, auto_closed=False):
+    """Python counterpart of AttendanceQuerySet.with_day_status for one row"""
+    if not check_in:
+        return 'Absent'
+    if auto_closed:
+        return 'Auto-Closed'
+    if check_out:
+        return 'Half Day' if check_out - check_in < HALF_DAY_THRESHOLD else 'Present'
+    return 'In Progress' if day >= (today or timezone.localdate()) else 'Missed Check-Out'
+
+
+def format_duration(duration):
+    """Render a check-out minus check-in timedelta the way the reports show it"""
+    total_minutes = duration.total_seconds() / 60
+    hours = int(total_minutes // 60)
+    minutes = int(total_minutes % 60)
+    if hours > 0 and minutes > 0:
+        return f"{hours}h {minutes}m"
+    elif hours > 0:
+        return f"{hours} hours"
+    return f"{minutes} minutes"
+
+
+class Shift(models.Model):
+    """A working shift: local start/end time in its own time zone plus a grace period"""
+
+    name = models.CharField(max_length=100, unique=True)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    grace_minutes = models.PositiveSmallIntegerField(default=0)
+    timezone = models.CharField(max_length=64, default=settings.TIME_ZONE)
+    is_default = models.BooleanField(default=False, help_text='Used for employees without an assignment')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'attendance_shifts'
+        ordering = ['start_time', 'name']
+
+    def __str__(self):
+        return f"{self.name} ({self.start_time:%H:%M}-{self.end_time:%H:%M})"
+
+    def lateness(self, check_in):
+        """
+        Return (is_late, late_minutes) for an aware check-in time. Minutes
+        are counted from the shift start in the shift's time zone; anything
+        within the grace period is on time. A check-in more than 12 hours
+        away from the start is matched to the neighbouring day, so early
+        morning punches on an overnight shift count against the evening
+        start.
+        """
+        tz = ZoneInfo(self.timezone)
+        local = check_in.astimezone(tz)
+        delta = local - datetime.combine(local.date(), self.start_time, tzinfo=tz)
+        if delta > timedelta(hours=12):
+            delta -= timedelta(days=1)
+        elif delta <= -timedelta(hours=12):
+            delta += timedelta(days=1)
+        minutes = int(delta.total_seconds() // 60)
+        late = minutes > self.grace_minutes
+        return late, minutes if late else 0
+
+    def window(self, day):
+        """Aware (start, end) datetimes of this shift on a given day; overnight shifts end the next day"""
+        tz = ZoneInfo(self.timezone)
+        start = datetime.combine(day, self.start_time, tzinfo=tz)
+        end = datetime.combine(day, self.end_time, tzinfo=tz)
+        if end <= start:
+            end += timedelta(days=1)
+        return start, end
+
+
+class ShiftAssignment(models.Model):
+    """Assigns a shift to one employee or to everyone in a region (employee wins)"""
+
+    shift = models.ForeignKey(Shift, on_delete=models.CASCADE, related_name='assignments')
+    employee = models.OneToOneField(
+        Employee, on_delete=models.CASCADE, null=True, blank=True, related_name='shift_assignment'
+    )
+    region = models.OneToOneField(
+        Region, on_delete=models.CASCADE, null=True, blank=True, related_name='shift_assignment'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'attendance_shift_assignments'
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    Q(employee__isnull=False, region__isnull=True) |
+                    Q(employee__isnull=True, region__isnull=False)
+                ),
+                name='shift_assignment_employee_xor_region',
+            ),
+        ]
+
+    def __str__(self):
+        target = self.employee or self.region
+        return f"{target} -> {self.shift.name}"
+
+
+class AttendanceQuerySet(models.QuerySet):
+    def with_punctuality(self):
+        """
+        Annotate check_in_local (check-in time of day in the current
+        timezone) and a punctuality label. The label comes from the
+        shift-aware is_late column; rows written before it existed fall
+        back to OFFICE_START_TIME in the current timezone.
+        """
+        return self.annotate(
+            check_in_local=TruncTime('check_in', tzinfo=timezone.get_current_timezone()),
+        ).annotate(
+            punctuality=Case(
+                When(check_in__isnull=True, then=Value('Absent')),
+                When(is_late=True, then=Value('Late')),
+                When(is_late=False, then=Value('On Time')),
+                When(check_in_local__gt=OFFICE_START_TIME, then=Value('Late')),
+                default=Value('On Time'),
+                output_field=CharField(),
+            ),
+        )
+
+    def with_day_status(self, today=None):
+        """
+        Annotate day_status: Present, Half Day (worked less than
+        HALF_DAY_THRESHOLD), In Progress (no check-out yet today),
+        Missed Check-Out (no check-out on a past day), Auto-Closed
+        (check-out filled in by close_open_attendance) or Absent.
+        """
+        worked = ExpressionWrapper(F('check_out') - F('check_in'), output_field=DurationField())
+        return self.annotate(
+            day_status=Case(
+                When(check_in__isnull=True, then=Value('Absent')),
+                When(auto_closed=True, then=Value('Auto-Closed')),
+                When(Q(check_out__isnull=False) & LessThan(worked, HALF_DAY_THRESHOLD), then=Value('Half Day')),
+                When(check_out__isnull=False, then=Value('Present')),
+                When(date__gte=today or timezone.localdate(), then=Value('In Progress')),
+                default=Value('Missed Check-Out'),
+                output_field=CharField(),
+            ),
+        )
+
+    def with_duration(self):
+        """Annotate duration = check_out - check_in (NULL while checked in)"""
+        return self.annotate(
+            duration=ExpressionWrapper(F('check_out') - F('check_in'), output_field=DurationField()),
+        )
+
 
 class Attendance(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
@@ -8,20 +173,159 @@ class Attendance(models.Model):
     check_out = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Precomputed from the employee's shift when check_in is written (see attendance/shifts.py)
+    shift = models.ForeignKey(Shift, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    is_late = models.BooleanField(null=True, blank=True)
+    late_minutes = models.PositiveIntegerField(null=True, blank=True)
+    # check_out was filled in by `manage.py close_open_attendance`; kept until HR reviews it
+    auto_closed = models.BooleanField(default=False)
+
+    objects = AttendanceQuerySet.as_manager()
 
     class Meta:
         managed = True
         db_table = 'attendance_attendance'
         unique_together = ['employee', 'date']
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date'], name='attendance_date_idx'),
+            # Cover the COUNT/MAX(updated_at) of reports.data_version for date and employee filters
+            models.Index(fields=['date', 'updated_at'], name='attendance_date_updated_idx'),
+            models.Index(fields=['employee', 'updated_at'], name='attendance_emp_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee.first_name} {self.employee.last_name} - {self.date}"
 
+    def save(self, *args, **kwargs):
+        if self.check_in:
+            from .shifts import ShiftResolver
+            self.shift_id, self.is_late, self.late_minutes = ShiftResolver.evaluate(self.employee_id, self.check_in)
+        super().save(*args, **kwargs)
+
     @property
     def status(self):
         if self.check_in:
-            check_in_time = self.check_in.time()
-            cutoff_time = models.TimeField().to_python('09:30:00')
-            return 'On Time' if check_in_time <= cutoff_time else 'Late'
+            late = self.is_late
+            if late is None:
+                from .shifts import ShiftResolver
+                late = ShiftResolver.evaluate(self.employee_id, self.check_in)[1]
+            return 'Late' if late else 'On Time'
         return 'N/A'
+
+
+
+class AttendanceArchive(models.Model):
+    """Attendance rows of closed years, moved out by `manage.py archive_attendance`.
+
+    Columns mirror Attendance in the same order (and keep the original id)
+    so the two tables can be UNIONed by attendance/archive.py; timestamps
+    are plain fields so copying preserves them. No FK constraint, so the
+    table can be compressed or partitioned independently on MySQL.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    employee = models.ForeignKey(
+        Employee, on_delete=models.CASCADE, db_constraint=False, related_name='archived_attendance'
+    )
+    date = models.DateField()
+    check_in = models.DateTimeField()
+    check_out = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    shift = models.ForeignKey(
+        Shift, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False, related_name='+'
+    )
+    is_late = models.BooleanField(null=True, blank=True)
+    late_minutes = models.PositiveIntegerField(null=True, blank=True)
+    auto_closed = models.BooleanField(default=False)
+
+    objects = AttendanceQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'attendance_archive'
+        unique_together = ['employee', 'date']
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date'], name='attendance_archive_date_idx'),
+            models.Index(fields=['date', 'updated_at'], name='attendance_arch_date_upd_idx'),
+            models.Index(fields=['employee', 'updated_at'], name='attendance_arch_emp_upd_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date} (archived)"
+
+class AttendanceDailySummary(models.Model):
+    """Per-day attendance counts for one (department, location) bucket.
+
+    Built by AttendanceRollupService from active employees, Attendance,
+    approved LeaveDay rows and region holidays; every active employee lands
+    in exactly one of present / on_leave / holiday / absent. late and
+    auto_closed are subsets of present. location is the employee's location ('' if unset).
+    """
+
+    date = models.DateField()
+    department = models.CharField(max_length=50)
+    location = models.CharField(max_length=145, blank=True, default='')
+    headcount = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    on_leave = models.PositiveIntegerField(default=0)
+    holiday = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    auto_closed = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'attendance_daily_summaries'
+        unique_together = ['date', 'department', 'location']
+        ordering = ['-date', 'department', 'location']
+
+    def __str__(self):
+        return f"{self.date} {self.department}/{self.location or '-'}: {self.present}/{self.headcount}"
+
+
+class ReportJob(models.Model):
+    """A background attendance PDF build.
+
+    Jobs are keyed by a hash of their filter parameters plus the data
+    version they were built from, so an identical request for unchanged
+    data reuses the finished file instead of drawing it again.
+    """
+
+    KIND_CHOICES = [
+        ('admin', 'All employees'),
+        ('employee', 'Single employee'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict)
+    params_hash = models.CharField(max_length=64)
+    data_version = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='reports/attendance/', blank=True)
+    filename = models.CharField(max_length=200, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.CharField(max_length=254)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'attendance_report_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['params_hash', 'data_version', 'status'], name='report_job_lookup_idx'),
+            models.Index(fields=['status', 'created_at'], name='report_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} report #{self.pk} ({self.status})"
@@ -0,0 +1,266 @@
+# attendance/muster.py
+"""Monthly muster roll: an employees x days grid of attendance codes for payroll."""
+from calendar import monthrange
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+from hr.models import Employee
+from leave.models import Holiday, LeaveDay
+from .archive import with_archive
+from .shifts import ShiftResolver
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - plain bytearrays are used instead
+    np = None
+
+# Cell codes. Leave cells use LEAVE + n, one n per (leave type, half day) seen in the month.
+BLANK, ABSENT, WEEKEND, HOLIDAY, PRESENT, LATE, LEAVE = range(7)
+LABELS = ['', 'A', 'WO', 'H', 'P', 'LT']
+LEAVE_CODES = {
+    'casual': 'CL',
+    'maternity': 'ML',
+    'comp_off': 'CO',
+    'sick': 'SL',
+    'annual': 'AL',
+    'optional': 'OL',
+}
+LEGEND = {
+    'P': 'Present',
+    'LT': 'Present, late',
+    'A': 'Absent',
+    'H': 'Holiday',
+    'WO': 'Weekly off',
+    **{code: f"{name.replace('_', ' ').title()} leave" for name, code in LEAVE_CODES.items()},
+    '<leave>/2': 'Half-day leave',
+}
+TOTALS = ['present', 'late', 'leave', 'holiday', 'weekly_off', 'absent']
+
+
+def month_window(year, month):
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def _new_grid(n_rows, n_days):
+    if np is not None:
+        return np.full((n_rows, n_days), ABSENT, dtype=np.uint8)
+    return [bytearray([ABSENT]) * n_days for _ in range(n_rows)]
+
+
+def _set_cells(grid, rows, cols, codes):
+    """Assign codes (one per cell, or a single code) to the (row, col) pairs"""
+    if not rows:
+        return
+    if np is not None:
+        grid[np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)] = codes
+        return
+    if isinstance(codes, int):
+        codes = [codes] * len(rows)
+    for row, col, code in zip(rows, cols, codes):
+        grid[row][col] = code
+
+
+def _blank(grid, row, stop):
+    """Blank one employee's cells before their joining day"""
+    if np is not None:
+        grid[row, :stop] = BLANK
+    else:
+        grid[row][:stop] = bytes(stop)
+
+
+def _blank_future(grid, first):
+    """Days after today are not absences yet; keep planned leave, holidays and weekends"""
+    if np is not None:
+        future = grid[:, first:]
+        future[future == ABSENT] = BLANK
+        return
+    for row in grid:
+        row[first:] = row[first:].replace(bytes([ABSENT]), bytes([BLANK]))
+
+
+def _totals(grid, leave_weights):
+    """Per-employee totals in TOTALS order; half-day leave counts as 0.5"""
+    if np is not None:
+        present = (grid == PRESENT).sum(axis=1)
+        late = (grid == LATE).sum(axis=1)
+        leave = np.zeros(grid.shape[0])
+        for offset, weight in enumerate(leave_weights):
+            leave += (grid == LEAVE + offset).sum(axis=1) * weight
+        columns = [
+            present + late,
+            late,
+            leave,
+            (grid == HOLIDAY).sum(axis=1),
+            (grid == WEEKEND).sum(axis=1),
+            (grid == ABSENT).sum(axis=1),
+        ]
+        return [list(row) for row in zip(*(column.tolist() for column in columns))]
+
+    totals = []
+    for row in grid:
+        late = row.count(LATE)
+        leave = sum(row.count(LEAVE + offset) * weight for offset, weight in enumerate(leave_weights))
+        totals.append([row.count(PRESENT) + late, late, leave, row.count(HOLIDAY), row.count(WEEKEND), row.count(ABSENT)])
+    return totals
+
+
+def _labels(grid, labels):
+    if np is not None:
+        return np.asarray(labels, dtype=object)[grid].tolist()
+    return [[labels[code] for code in row] for row in grid]
+
+
+def build_muster(year, month, department=None, today=None):
+    """
+    Build the muster roll for one month: one row per active employee, one
+    cell per day. Every source is read with a single bulk query (employees,
+    attendance incl. archive, approved leave days, holidays) and written
+    into a uint8 code matrix, so the cost does not grow with per-cell
+    lookups. Precedence is present > leave > holiday > weekly off > absent;
+    days before joining and future absences are blank.
+    """
+    start, end = month_window(year, month)
+    today = today or timezone.localdate()
+    n_days = (end - start).days + 1
+    days = [start + timedelta(days=offset) for offset in range(n_days)]
+
+    employees = Employee.objects.filter(status='active', date_of_joining__lte=end)
+    if department:
+        employees = employees.filter(department=department)
+    people = list(employees.order_by('department', 'employee_id').values_list(
+        'id', 'employee_id', 'first_name', 'last_name', 'department', 'location', 'date_of_joining'
+    ))
+    index = {}
+    rows_by_location = {}
+    for row, (pk, _, _, _, _, location, _) in enumerate(people):
+        index[pk] = row
+        if location:
+            rows_by_location.setdefault(location.strip().lower(), []).append(row)
+
+    grid = _new_grid(len(people), n_days)
+
+    # Weekly offs
+    weekend_cols = [offset for offset, day in enumerate(days) if day.weekday() >= 5]
+    if people and weekend_cols:
+        _set_cells(
+            grid,
+            [row for row in range(len(people)) for _ in weekend_cols],
+            weekend_cols * len(people),
+            WEEKEND,
+        )
+
+    # Holidays by region, matched to employee location by region name or code
+    rows, cols = [], []
+    for holiday_date, region_name, region_code in Holiday.objects.filter(
+        date__range=(start, end), is_optional=False
+    ).values_list('date', 'region__name', 'region__code'):
+        holiday_rows = set(rows_by_location.get(region_name.lower(), ())) | set(rows_by_location.get(region_code.lower(), ()))
+        rows.extend(holiday_rows)
+        cols.extend([(holiday_date - start).days] * len(holiday_rows))
+    _set_cells(grid, rows, cols, HOLIDAY)
+
+    # Approved leave days
+    leave_kinds = {}
+    leave_days = LeaveDay.objects.filter(date__range=(start, end), status='approved')
+    if department:
+        leave_days = leave_days.filter(employee__department=department)
+    rows, cols, codes = [], [], []
+    for employee_id, day, leave_type, half_day in leave_days.values_list(
+        'employee_id', 'date', 'leave__leave_type__name', 'half_day_period'
+    ).iterator(chunk_size=5000):
+        row = index.get(employee_id)
+        if row is None:
+            continue
+        kind = (leave_type, bool(half_day))
+        if kind not in leave_kinds:
+            leave_kinds[kind] = LEAVE + len(leave_kinds)
+        rows.append(row)
+        cols.append((day - start).days)
+        codes.append(leave_kinds[kind])
+    _set_cells(grid, rows, cols, codes)
+
+    # Attendance, live and archived. Lateness is stored at write time; only
+    # rows written before shifts existed need their check-in evaluated.
+    def build(attendances):
+        attendances = attendances.filter(date__range=(start, end))
+        if department:
+            attendances = attendances.filter(employee__department=department)
+        return attendances
+
+    rows, cols, codes = [], [], []
+    unknown = {}
+    for employee_id, day, late in with_archive(
+        lambda attendances: build(attendances).values_list('employee_id', 'date', 'is_late'), start
+    ).iterator(chunk_size=5000):
+        row = index.get(employee_id)
+        if row is None:
+            continue
+        rows.append(row)
+        cols.append((day - start).days)
+        if late is None:
+            unknown[(employee_id, day)] = len(codes)
+        codes.append(LATE if late else PRESENT)
+    if unknown:
+        for employee_id, day, check_in in with_archive(
+            lambda attendances: build(attendances).filter(is_late__isnull=True, check_in__isnull=False).values_list(
+                'employee_id', 'date', 'check_in'
+            ),
+            start,
+        ).iterator(chunk_size=5000):
+            position = unknown.get((employee_id, day))
+            if position is not None and ShiftResolver.evaluate(employee_id, check_in)[1]:
+                codes[position] = LATE
+    _set_cells(grid, rows, cols, codes)
+
+    for row, (_, _, _, _, _, _, joined) in enumerate(people):
+        if joined > start:
+            _blank(grid, row, (joined - start).days)
+    if today < end:
+        _blank_future(grid, max((today - start).days + 1, 0))
+
+    labels = list(LABELS)
+    leave_weights = []
+    for (leave_type, half_day), _ in sorted(leave_kinds.items(), key=lambda item: item[1]):
+        code = LEAVE_CODES.get(leave_type, (leave_type or 'LV')[:2].upper())
+        labels.append(f"{code}/2" if half_day else code)
+        leave_weights.append(0.5 if half_day else 1)
+
+    cells = _labels(grid, labels)
+    totals = _totals(grid, leave_weights)
+    return {
+        'month': f"{year}-{month:02d}",
+        'department': department or '',
+        'days': [day.isoformat() for day in days],
+        'weekly_offs': [day.weekday() >= 5 for day in days],
+        'legend': LEGEND,
+        'totals': TOTALS,
+        'employees': [
+            {
+                'employee_id': employee_code,
+                'name': f"{first_name} {last_name}",
+                'department': employee_department,
+                'cells': cells[row],
+                'totals': dict(zip(TOTALS, totals[row])),
+            }
+            for row, (_, employee_code, first_name, last_name, employee_department, _, _) in enumerate(people)
+        ],
+    }
+
+
+def muster_headers(muster):
+    return (
+        ['Employee ID', 'Name', 'Department']
+        + [date.fromisoformat(day).strftime('%d %a') for day in muster['days']]
+        + [name.replace('_', ' ').title() for name in TOTALS]
+    )
+
+
+def muster_rows(muster):
+    """Flat rows for the CSV / XLSX writers in attendance/exports.py"""
+    for employee in muster['employees']:
+        yield (
+            [employee['employee_id'], employee['name'], employee['department']]
+            + employee['cells']
+            + [employee['totals'][name] for name in TOTALS]
+        )
@@ -0,0 +1,113 @@
+# attendance/partitioning.py
+"""Monthly RANGE partitioning of attendance_attendance on MySQL (no-op elsewhere)."""
+from datetime import date
+
+from django.db import connections, router
+
+from .models import Attendance
+
+TABLE = Attendance._meta.db_table
+
+
+def get_connection():
+    return connections[router.db_for_write(Attendance)]
+
+
+def is_supported(connection=None):
+    return (connection or get_connection()).vendor == 'mysql'
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_clause(month):
+    upper = add_months(month, 1)
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{upper.isoformat()}'))"
+
+
+def existing_partitions(connection=None):
+    """Partition names of the attendance table, in order ([] if unpartitioned)"""
+    connection = connection or get_connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [TABLE],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def foreign_keys(connection=None):
+    connection = connection or get_connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_TYPE = 'FOREIGN KEY'",
+            [TABLE],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def initial_partition_sql(first_month, last_month, connection=None):
+    """
+    Statements that convert the table to monthly partitions from
+    first_month to last_month plus a catch-all pmax.
+
+    InnoDB requires the partition column in every unique key and does not
+    allow foreign keys on partitioned tables, so the employee FK constraint
+    is dropped (Django keeps enforcing the relation) and the primary key
+    becomes (id, date).
+    """
+    statements = [f"ALTER TABLE {TABLE} DROP FOREIGN KEY {name}" for name in foreign_keys(connection)]
+    statements.append(f"ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)")
+    clauses = []
+    month = month_start(first_month)
+    while month <= last_month:
+        clauses.append(partition_clause(month))
+        month = add_months(month, 1)
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    statements.append(f"ALTER TABLE {TABLE} PARTITION BY RANGE (TO_DAYS(date)) (\n    " + ",\n    ".join(clauses) + "\n)")
+    return statements
+
+
+def extend_partition_sql(partitions, last_month):
+    """Split pmax so monthly partitions exist up to last_month"""
+    months = [name for name in partitions if name != 'pmax']
+    if not months:
+        return []
+    latest = date(int(months[-1][1:5]), int(months[-1][5:7]), 1)
+    month = add_months(latest, 1)
+    clauses = []
+    while month <= last_month:
+        clauses.append(partition_clause(month))
+        month = add_months(month, 1)
+    if not clauses:
+        return []
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return [f"ALTER TABLE {TABLE} REORGANIZE PARTITION pmax INTO (\n    " + ",\n    ".join(clauses) + "\n)"]
+
+
+def drop_partitions_sql(partitions, years):
+    """Drop the monthly partitions of the given (already archived) years"""
+    names = [name for name in partitions if name != 'pmax' and int(name[1:5]) in years]
+    if not names:
+        return []
+    return [f"ALTER TABLE {TABLE} DROP PARTITION {', '.join(names)}"]
+
+
+def execute(statements, connection=None):
+    connection = connection or get_connection()
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -0,0 +1,364 @@
+# attendance/reports.py
+"""Attendance PDF reports, built by background jobs and cached by (filters, data version)."""
+import hashlib
+import json
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.timezone import localtime
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfgen import canvas
+
+from hr.models import Employee
+from hrms.cache import shared_versions
+from hrms.metrics import record_job
+from .archive import reaches_archive, with_archive
+from .models import Attendance, AttendanceArchive, ReportJob, day_status
+
+logger = logging.getLogger(__name__)
+
+# 'worker' leaves jobs for `manage.py run_report_jobs`; 'thread' draws them inside the
+# web process (single-process development only)
+EXECUTOR = getattr(settings, 'ATTENDANCE_REPORT_EXECUTOR', 'worker')
+MAX_WORKERS = getattr(settings, 'ATTENDANCE_REPORT_WORKERS', 2)
+# A queued or running job older than this is assumed lost with its process and no longer reused
+STALE_AFTER = timedelta(minutes=30)
+PROGRESS_EVERY = 500
+CHUNK_SIZE = 2000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# -------------------------------
+# Querysets
+# -------------------------------
+
+def admin_report_queryset(params, attendances=None):
+    if attendances is None:
+        attendances = Attendance.objects.all()
+    search_query = params.get('search')
+    if search_query:
+        attendances = attendances.filter(
+            Q(employee__first_name__icontains=search_query) |
+            Q(employee__last_name__icontains=search_query) |
+            Q(employee__employee_id__icontains=search_query)
+        )
+    if params.get('department'):
+        attendances = attendances.filter(employee__department=params['department'])
+    if params.get('date_from'):
+        attendances = attendances.filter(date__gte=params['date_from'])
+    if params.get('date_to'):
+        attendances = attendances.filter(date__lte=params['date_to'])
+    return attendances
+
+
+def employee_report_queryset(params, attendances=None):
+    if attendances is None:
+        attendances = Attendance.objects.all()
+    return attendances.filter(employee_id=params['employee_id'])
+
+
+QUERYSETS = {
+    'admin': admin_report_queryset,
+    'employee': employee_report_queryset,
+}
+
+
+def report_queryset(kind, params, build=None):
+    """Filtered rows for a report from the live table plus the archive when the range reaches it"""
+    def apply(attendances):
+        attendances = QUERYSETS[kind](params, attendances)
+        return build(attendances) if build else attendances
+    return with_archive(apply, params.get('date_from'))
+
+
+def params_hash(kind, params):
+    payload = json.dumps({'kind': kind, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def data_version(kind, params):
+    """
+    Fingerprint of what a report would contain: row count plus the newest
+    updated_at of the filtered rows (both read from the updated_at
+    indexes), and the 'employees' version, since names and departments
+    are printed too. Any insert, update (auto_now / bulk_upsert set
+    updated_at) or delete in the filtered set, or any employee edit,
+    changes it.
+    """
+    tables = [Attendance]
+    if reaches_archive(params.get('date_from')):
+        tables.append(AttendanceArchive)
+    parts = [str(shared_versions('employees')[0])]
+    for model in tables:
+        stats = QUERYSETS[kind](params, model.objects.all()).aggregate(rows=Count('id'), latest=Max('updated_at'))
+        parts.append(f"{stats['rows']}:{stats['latest'].isoformat() if stats['latest'] else '-'}")
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+# -------------------------------
+# Drawing
+# -------------------------------
+
+def _row_values(day, check_in, check_out, auto_closed, today):
+    check_in_local = localtime(check_in).strftime("%I:%M %p") if check_in else "-"
+    check_out_local = localtime(check_out).strftime("%I:%M %p") if check_out else "-"
+    status = day_status(day, check_in, check_out, today, auto_closed)
+    if check_in and check_out:
+        total_minutes = (check_out - check_in).total_seconds() / 60
+        duration = f"{int(total_minutes // 60)}h {int(total_minutes % 60)}m"
+    elif check_in:
+        duration = "In Progress" if status == "In Progress" else "-"
+    else:
+        duration = "-"
+    return check_in_local, check_out_local, status, duration
+
+
+def draw_admin_report(fileobj, rows, on_row=None):
+    """Landscape all-employee report; rows yields (emp id, first, last, dept, date, check_in, check_out, auto_closed)"""
+    p = canvas.Canvas(fileobj, pagesize=landscape(A4))
+    width, height = landscape(A4)
+    y = height - 80
+
+    # Title
+    p.setFont("Helvetica-Bold", 18)
+    p.drawCentredString(width / 2, y, "IKONTEL HR SYSTEM - Attendance Report")
+    y -= 30
+    p.setFont("Helvetica", 11)
+    p.drawCentredString(width / 2, y, f"Generated On: {localtime().strftime('%b %d, %Y %I:%M %p')}")
+    y -= 40
+
+    # Header Row
+    p.setFont("Helvetica-Bold", 11)
+    p.drawString(40, y, "Emp ID")
+    p.drawString(120, y, "Name")
+    p.drawString(250, y, "Dept")
+    p.drawString(330, y, "Date")
+    p.drawString(420, y, "Check-In")
+    p.drawString(510, y, "Check-Out")
+    p.drawString(600, y, "Status")
+    p.drawString(680, y, "Duration")
+    y -= 10
+    p.line(35, y, width - 35, y)
+    y -= 15
+
+    # Data Rows
+    today = timezone.localdate()
+    p.setFont("Helvetica", 10)
+    for count, (employee_id, first_name, last_name, department, day, check_in, check_out, auto_closed) in enumerate(rows, 1):
+        if y < 60:  # Page break
+            p.showPage()
+            y = height - 60
+            p.setFont("Helvetica", 10)
+
+        check_in_local, check_out_local, status, duration = _row_values(day, check_in, check_out, auto_closed, today)
+        p.drawString(40, y, employee_id)
+        p.drawString(120, y, f"{first_name} {last_name}")
+        p.drawString(250, y, department)
+        p.drawString(330, y, day.strftime("%b %d, %Y"))
+        p.drawString(420, y, check_in_local)
+        p.drawString(510, y, check_out_local)
+        p.drawString(600, y, status)
+        p.drawString(680, y, duration)
+        y -= 18
+        if on_row:
+            on_row(count)
+
+    # Footer
+    p.setFont("Helvetica-Oblique", 9)
+    y -= 10
+    p.line(35, y, width - 35, y)
+    y -= 20
+    p.drawCentredString(width / 2, y, "Generated by IkonTel HRMS | Confidential Report")
+
+    p.showPage()
+    p.save()
+
+
+def draw_employee_report(fileobj, employee, rows, on_row=None):
+    """Portrait single-employee report; rows yields (date, check_in, check_out, auto_closed)"""
+    p = canvas.Canvas(fileobj, pagesize=A4)
+    width, height = A4
+    y = height - 80
+
+    # Title
+    p.setFont("Helvetica-Bold", 16)
+    p.drawCentredString(width / 2, y, "IKONTEL HR SYSTEM")
+    y -= 25
+    p.setFont("Helvetica", 12)
+    p.drawCentredString(width / 2, y, f"Attendance Report - {employee.first_name} {employee.last_name}")
+    y -= 30
+
+    # Employee Info
+    p.setFont("Helvetica", 11)
+    p.drawString(50, y, f"Employee ID: {employee.employee_id}")
+    p.drawString(300, y, f"Department: {employee.department}")
+    y -= 20
+    p.drawString(50, y, f"Designation: {employee.designation}")
+    p.drawString(300, y, f"Generated On: {localtime().strftime('%b %d, %Y %I:%M %p')}")
+    y -= 40
+
+    # Table Header
+    p.setFont("Helvetica-Bold", 11)
+    p.drawString(50, y, "Date")
+    p.drawString(150, y, "Check-In")
+    p.drawString(250, y, "Check-Out")
+    p.drawString(350, y, "Status")
+    p.drawString(450, y, "Duration")
+    y -= 10
+    p.line(45, y, 550, y)
+    y -= 15
+
+    # Table Rows
+    today = timezone.localdate()
+    p.setFont("Helvetica", 10)
+    for count, (day, check_in, check_out, auto_closed) in enumerate(rows, 1):
+        if y < 80:  # Page break
+            p.showPage()
+            y = height - 80
+            p.setFont("Helvetica", 10)
+
+        check_in_local, check_out_local, status, duration = _row_values(day, check_in, check_out, auto_closed, today)
+        p.drawString(50, y, day.strftime("%b %d, %Y"))
+        p.drawString(150, y, check_in_local)
+        p.drawString(250, y, check_out_local)
+        p.drawString(350, y, status)
+        p.drawString(450, y, duration)
+        y -= 20
+        if on_row:
+            on_row(count)
+
+    # Footer
+    p.setFont("Helvetica-Oblique", 9)
+    y -= 10
+    p.line(45, y, 550, y)
+    y -= 20
+    p.drawCentredString(width / 2, y, "Generated by IkonTel HRMS | Confidential Employee Report")
+
+    p.showPage()
+    p.save()
+
+
+# -------------------------------
+# Jobs
+# -------------------------------
+
+def request_report(kind, params, requested_by):
+    """
+    Return a ReportJob for these filters: a finished or in-flight job for
+    the same (params hash, data version) when there is one, otherwise a
+    new queued job that is handed to the executor.
+    """
+    digest = params_hash(kind, params)
+    version = data_version(kind, params)
+    # The thread executor's queue lives in memory, so a restart orphans queued jobs too
+    fresh = timezone.now() - STALE_AFTER
+    reusable = ReportJob.objects.filter(params_hash=digest, data_version=version).filter(
+        Q(status='done') |
+        Q(status='queued', created_at__gte=fresh) |
+        Q(status='running', started_at__gte=fresh)
+    ).order_by('-created_at').first()
+    if reusable and (reusable.status != 'done' or (reusable.file and reusable.file.storage.exists(reusable.file.name))):
+        return reusable
+
+    job = ReportJob.objects.create(
+        kind=kind,
+        params=params,
+        params_hash=digest,
+        data_version=version,
+        requested_by=requested_by or '',
+    )
+    if EXECUTOR == 'thread':
+        submit(job.pk)
+    return job
+
+
+def submit(job_id):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='attendance-report')
+    _executor.submit(_run_in_thread, job_id)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def claim_job(job_id):
+    """Atomically move a queued job to running; False if someone else has it"""
+    return ReportJob.objects.filter(pk=job_id, status='queued').update(
+        status='running', started_at=timezone.now(), progress=0
+    ) == 1
+
+
+def run_job(job_id):
+    """Build the PDF for one queued job; returns True when this call built it"""
+    if not claim_job(job_id):
+        return False
+    started = time.perf_counter()
+    job = ReportJob.objects.get(pk=job_id)
+    try:
+        if job.kind == 'admin':
+            fields = (
+                'employee__employee_id', 'employee__first_name', 'employee__last_name',
+                'employee__department', 'date', 'check_in', 'check_out', 'auto_closed',
+            )
+        else:
+            fields = ('date', 'check_in', 'check_out', 'auto_closed')
+        queryset = report_queryset(job.kind, job.params, lambda qs: qs.values_list(*fields)).order_by('-date')
+        total = queryset.count()
+        ReportJob.objects.filter(pk=job.pk).update(total_rows=total)
+
+        def on_row(count):
+            if count % PROGRESS_EVERY == 0 and total:
+                ReportJob.objects.filter(pk=job.pk).update(progress=min(99, count * 100 // total))
+
+        with tempfile.TemporaryFile() as handle:
+            if job.kind == 'admin':
+                rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+                draw_admin_report(handle, rows, on_row)
+                filename = "Attendance_Report_All_Employees.pdf"
+            else:
+                employee = Employee.objects.get(id=job.params['employee_id'])
+                rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+                draw_employee_report(handle, employee, rows, on_row)
+                filename = f"{employee.first_name}_attendance_report.pdf"
+
+            handle.seek(0)
+            job.file.save(f"{job.params_hash[:16]}-{job.pk}.pdf", File(handle), save=False)
+
+        ReportJob.objects.filter(pk=job.pk).update(
+            status='done', progress=100, file=job.file.name, filename=filename, finished_at=timezone.now()
+        )
+        record_job('attendance_report', started, items=total)
+    except Exception as exc:
+        logger.exception("Attendance report job %s failed", job_id)
+        ReportJob.objects.filter(pk=job.pk).update(status='failed', error=str(exc), finished_at=timezone.now())
+        record_job('attendance_report', started, status='failed')
+    return True
+
+
+def purge_jobs(older_than):
+    """Delete jobs (and their files) created before older_than; returns the count"""
+    jobs = ReportJob.objects.filter(created_at__lt=older_than).exclude(status='running')
+    count = 0
+    for job in jobs.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
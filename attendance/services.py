@@ -0,0 +1,308 @@
+# attendance/services.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, ExpressionWrapper, F, Min, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from hr.models import Employee
+from hrms.db import bulk_upsert
+from leave.models import Holiday, LeaveDay
+from .models import Attendance, AttendanceDailySummary, Shift
+from .shifts import ShiftResolver
+
+# How close_open_attendance fills a missing check-out: 'shift_end' or 'hours' after check-in
+AUTO_CLOSE_POLICY = getattr(settings, 'ATTENDANCE_AUTO_CLOSE_POLICY', 'shift_end')
+AUTO_CLOSE_HOURS = getattr(settings, 'ATTENDANCE_AUTO_CLOSE_HOURS', 8)
+# How far today's rollup may trail the check-ins (see AttendanceRollupService.refresh_today)
+TODAY_MAX_AGE = timedelta(seconds=getattr(settings, 'ATTENDANCE_ROLLUP_MAX_AGE', 300))
+
+
+class AttendanceService:
+    """Check-in/check-out writes that are safe under concurrent submits"""
+
+    CHECKED_IN = 'checked_in'
+    CHECKED_OUT = 'checked_out'
+    ALREADY_CHECKED_IN = 'already_checked_in'
+    ALREADY_CHECKED_OUT = 'already_checked_out'
+    NOT_CHECKED_IN = 'not_checked_in'
+
+    @staticmethod
+    def check_in(employee_id, now=None):
+        """
+        Record today's check-in with INSERT ... ON CONFLICT DO NOTHING
+        (INSERT IGNORE on MySQL), so a double submit can never hit the
+        (employee, date) unique constraint. Only the attendance row is
+        written; today's rollup catches up through refresh_today().
+        Returns (result, check_in_time).
+        """
+        now = now or timezone.now()
+        today = timezone.localdate(now)
+
+        # bulk_create skips Attendance.save(), so apply the shift evaluation here
+        shift_id, late, late_minutes = ShiftResolver.evaluate(employee_id, now)
+        Attendance.objects.bulk_create(
+            [Attendance(
+                employee_id=employee_id,
+                date=today,
+                check_in=now,
+                shift_id=shift_id,
+                is_late=late,
+                late_minutes=late_minutes,
+            )],
+            ignore_conflicts=True,
+        )
+        check_in = (
+            Attendance.objects.filter(employee_id=employee_id, date=today)
+            .values_list('check_in', flat=True)
+            .first()
+        )
+        if check_in == now:
+            return AttendanceService.CHECKED_IN, check_in
+        return AttendanceService.ALREADY_CHECKED_IN, check_in
+
+    @staticmethod
+    def check_out(employee_id, now=None):
+        """
+        Close today's row with a single conditional UPDATE.
+        Returns (result, check_out_time).
+        """
+        now = now or timezone.now()
+        today = timezone.localdate(now)
+
+        updated = Attendance.objects.filter(
+            employee_id=employee_id,
+            date=today,
+            check_out__isnull=True,
+        ).update(check_out=now, updated_at=now)
+        if updated:
+            return AttendanceService.CHECKED_OUT, now
+
+        # Slow path only when nothing was updated: explain why
+        check_out = (
+            Attendance.objects.filter(employee_id=employee_id, date=today)
+            .values_list('check_out', flat=True)
+            .first()
+        )
+        if check_out:
+            return AttendanceService.ALREADY_CHECKED_OUT, check_out
+        return AttendanceService.NOT_CHECKED_IN, None
+
+
+class AttendanceCloseService:
+    """Close rows of past days that were never checked out"""
+
+    POLICIES = ('shift_end', 'hours')
+    # (shift, date) branches per UPDATE under the shift_end policy; a nightly
+    # run has one per shift, a first run over old data a few statements more
+    MAX_BRANCHES = 500
+
+    @staticmethod
+    def open_records(now=None):
+        return Attendance.objects.filter(check_out__isnull=True, date__lt=timezone.localdate(now or timezone.now()))
+
+    @staticmethod
+    def close_open_records(policy=None, hours=None, now=None, dry_run=False):
+        """
+        Fill check_out on open rows of past days with bulk UPDATEs and flag
+        them auto_closed for review, then refresh those days' rollups.
+
+        'shift_end' closes each row at the end of the shift it was evaluated
+        against (never before its check-in); 'hours' closes it a fixed
+        number of hours after check-in. Rows whose close time is still in
+        the future (e.g. an overnight shift ending this morning) stay open.
+        Returns (rows closed, set of affected dates).
+        """
+        policy = policy or AUTO_CLOSE_POLICY
+        if policy not in AttendanceCloseService.POLICIES:
+            raise ValueError(f"Unknown auto-close policy: {policy}")
+        now = now or timezone.now()
+        records = AttendanceCloseService.open_records(now)
+
+        if policy == 'hours':
+            length = timedelta(hours=hours or AUTO_CLOSE_HOURS)
+            records = records.filter(check_in__lte=now - length)
+            days = set(records.order_by().values_list('date', flat=True).distinct())
+            if dry_run:
+                return records.count(), days
+            closed = records.update(
+                check_out=ExpressionWrapper(F('check_in') + Value(length), output_field=DateTimeField()),
+                auto_closed=True,
+                updated_at=now,
+            )
+        else:
+            pairs = list(records.order_by().values_list('shift_id', 'date').distinct())
+            shifts = Shift.objects.in_bulk({shift_id for shift_id, _ in pairs if shift_id})
+            branches = []
+            for shift_id, day in pairs:
+                shift = shifts.get(shift_id) or ShiftResolver.default_shift()
+                end = shift.window(day)[1]
+                if end <= now:
+                    condition = Q(shift_id=shift_id) if shift_id in shifts else Q(shift__isnull=True)
+                    branches.append((condition & Q(date=day), day, end))
+            days = {day for _, day, _ in branches}
+
+            closed = 0
+            for offset in range(0, len(branches), AttendanceCloseService.MAX_BRANCHES):
+                chunk = branches[offset:offset + AttendanceCloseService.MAX_BRANCHES]
+                match = Q()
+                for condition, _, _ in chunk:
+                    match |= condition
+                chunk_records = records.filter(match)
+                if dry_run:
+                    closed += chunk_records.count()
+                    continue
+                closed_at = Case(*(When(condition, then=Value(end)) for condition, _, end in chunk), output_field=DateTimeField())
+                closed += chunk_records.update(
+                    check_out=Greatest(F('check_in'), closed_at),
+                    auto_closed=True,
+                    updated_at=now,
+                )
+            if dry_run:
+                return closed, days
+
+        if closed:
+            AttendanceRollupService.refresh_days(days)
+        return closed, days
+
+
+class AttendanceRollupService:
+    """Maintain AttendanceDailySummary from raw attendance, leaves and holidays"""
+
+    COUNT_FIELDS = ['headcount', 'present', 'late', 'on_leave', 'holiday', 'absent', 'auto_closed']
+
+    @staticmethod
+    def build_day(day, bucket=None):
+        """
+        Classify every active employee for one day with set operations and
+        return unsaved AttendanceDailySummary rows. Precedence is
+        present > on_leave > holiday > absent; on weekends nobody is
+        counted absent (non-present staff go to holiday). Pass a
+        (department, location) bucket to build only that row.
+        """
+        employees = Employee.objects.filter(status='active', date_of_joining__lte=day)
+        attendance = Attendance.objects.filter(date=day)
+        leave_days = LeaveDay.objects.filter(date=day, status='approved')
+        if bucket is not None:
+            department, location = bucket
+            employees = employees.filter(department=department).filter(
+                Q(location=location) if location else Q(location__isnull=True) | Q(location='')
+            )
+            attendance = attendance.filter(employee__in=employees)
+            leave_days = leave_days.filter(employee__in=employees)
+
+        buckets = {}
+        for employee_id, department, location in employees.values_list(
+            'id', 'department', 'location'
+        ).iterator(chunk_size=5000):
+            buckets.setdefault((department, location or ''), set()).add(employee_id)
+
+        present = set()
+        late = set()
+        closed = set()
+        for employee_id, check_in, stored_late, auto_closed in attendance.values_list(
+            'employee_id', 'check_in', 'is_late', 'auto_closed'
+        ):
+            present.add(employee_id)
+            if auto_closed:
+                closed.add(employee_id)
+            if stored_late is None and check_in:
+                stored_late = ShiftResolver.evaluate(employee_id, check_in)[1]
+            if stored_late:
+                late.add(employee_id)
+        on_leave = set(leave_days.values_list('employee_id', flat=True)) - present
+        holiday_locations = {
+            name.lower()
+            for names in Holiday.objects.filter(date=day, is_optional=False).values_list(
+                'region__name', 'region__code'
+            )
+            for name in names
+        }
+        is_weekend = day.weekday() >= 5
+
+        rows = []
+        for (department, location), staff in buckets.items():
+            staff_present = staff & present
+            staff_leave = staff & on_leave
+            remaining = len(staff) - len(staff_present) - len(staff_leave)
+            off_day = is_weekend or location.lower() in holiday_locations
+            rows.append(AttendanceDailySummary(
+                date=day,
+                department=department,
+                location=location,
+                headcount=len(staff),
+                present=len(staff_present),
+                late=len(staff_present & late),
+                on_leave=len(staff_leave),
+                holiday=remaining if off_day else 0,
+                absent=0 if off_day else remaining,
+                auto_closed=len(staff_present & closed),
+            ))
+        return rows
+
+    @staticmethod
+    def refresh_day(day, bucket=None):
+        """Recompute one day, or one (department, location) bucket of it; returns the number of rows written"""
+        rows = AttendanceRollupService.build_day(day, bucket)
+        keys = {(row.department, row.location) for row in rows}
+        existing = AttendanceDailySummary.objects.filter(date=day)
+        if bucket is not None:
+            existing = existing.filter(department=bucket[0], location=bucket[1])
+        with transaction.atomic():
+            stale = [
+                pk for pk, department, location in existing.values_list('pk', 'department', 'location')
+                if (department, location) not in keys
+            ]
+            if stale:
+                AttendanceDailySummary.objects.filter(pk__in=stale).delete()
+            bulk_upsert(
+                AttendanceDailySummary,
+                rows,
+                unique_fields=['date', 'department', 'location'],
+                update_fields=AttendanceRollupService.COUNT_FIELDS + ['updated_at'],
+            )
+        return len(rows)
+
+    @staticmethod
+    def refresh_days(days, bucket=None):
+        """Recompute the given dates; future dates are skipped"""
+        today = timezone.localdate()
+        return sum(
+            AttendanceRollupService.refresh_day(day, bucket) for day in sorted(set(days)) if day <= today
+        )
+
+    @staticmethod
+    def refresh_range(start, end, bucket=None):
+        return AttendanceRollupService.refresh_days(
+            (start + timedelta(days=offset) for offset in range((end - start).days + 1)), bucket
+        )
+
+    @staticmethod
+    def bucket_for(employee_id):
+        """The (department, location) summary row an employee is counted in, or None"""
+        row = Employee.objects.filter(id=employee_id).values_list('department', 'location').first()
+        return (row[0], row[1] or '') if row else None
+
+    @staticmethod
+    def refresh_employee_range(employee_id, start, end):
+        """Recompute only the employee's bucket over a date range (after a leave changed)"""
+        bucket = AttendanceRollupService.bucket_for(employee_id)
+        if bucket is None:
+            return 0
+        return AttendanceRollupService.refresh_range(start, end, bucket)
+
+    @staticmethod
+    def refresh_today(max_age=TODAY_MAX_AGE):
+        """
+        Rebuild today's rows when they are older than max_age (or missing).
+        Check-ins only write their attendance row, so today's counts may lag
+        by up to max_age; readers call this instead of every punch updating
+        the shared summary rows. Returns the number of rows written.
+        """
+        today = timezone.localdate()
+        built = AttendanceDailySummary.objects.filter(date=today).aggregate(built=Min('updated_at'))['built']
+        if built is not None and built >= timezone.now() - max_age:
+            return 0
+        return AttendanceRollupService.refresh_day(today)
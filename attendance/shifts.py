@@ -0,0 +1,115 @@
+# attendance/shifts.py
+import threading
+import time
+
+from django.conf import settings
+
+from hr.models import Employee
+from hrms.cache import SharedVersion
+from .models import OFFICE_END_TIME, OFFICE_START_TIME, Shift, ShiftAssignment
+
+# Used when no Shift is marked as default; never saved, so rows get shift=None
+IMPLICIT_SHIFT = Shift(
+    name='Office hours',
+    start_time=OFFICE_START_TIME,
+    end_time=OFFICE_END_TIME,
+    grace_minutes=0,
+    timezone=settings.TIME_ZONE,
+)
+# Rebuild at least this often, for changes no signal sees (queryset.update(), raw SQL)
+MAX_AGE = 15 * 60
+
+
+class ShiftResolver:
+    """In-process employee -> shift mapping, rebuilt when its cache version moves.
+
+    Resolution order is the employee's own assignment, then the assignment
+    of the region matching the employee's location (by region name or
+    code), then the default shift. The whole mapping is computed in three
+    queries and kept per process for up to MAX_AGE seconds; Shift,
+    ShiftAssignment, Region and Employee location changes bump the shared
+    version (see attendance/signals.py).
+
+    Cached Shift instances are shared between requests - treat them as read-only.
+    """
+
+    _lock = threading.Lock()
+    _shared_version = SharedVersion('shift_resolver')
+    _version = None
+    _loaded_at = None
+    _shifts = {}
+    _by_employee = {}
+    _default = IMPLICIT_SHIFT
+
+    @classmethod
+    def _load(cls):
+        version = cls._shared_version.get()
+        if cls._version == version and time.monotonic() - cls._loaded_at < MAX_AGE:
+            return
+
+        with cls._lock:
+            if cls._version == version and time.monotonic() - cls._loaded_at < MAX_AGE:
+                return
+            shifts = {shift.pk: shift for shift in Shift.objects.filter(is_active=True)}
+            default = next((shift for shift in shifts.values() if shift.is_default), IMPLICIT_SHIFT)
+
+            by_employee = {}
+            by_region = {}
+            for shift_id, employee_id, region_name, region_code in ShiftAssignment.objects.filter(
+                shift__is_active=True
+            ).values_list('shift_id', 'employee_id', 'region__name', 'region__code'):
+                if employee_id:
+                    by_employee[employee_id] = shift_id
+                else:
+                    by_region[region_name.lower()] = shift_id
+                    by_region[region_code.lower()] = shift_id
+
+            if by_region:
+                for employee_id, location in Employee.objects.exclude(location__isnull=True).values_list(
+                    'id', 'location'
+                ).iterator(chunk_size=5000):
+                    shift_id = by_region.get(location.strip().lower())
+                    if shift_id and employee_id not in by_employee:
+                        by_employee[employee_id] = shift_id
+
+            cls._shifts = shifts
+            cls._by_employee = by_employee
+            cls._default = default
+            cls._loaded_at = time.monotonic()
+            cls._version = version
+
+    @classmethod
+    def invalidate(cls):
+        """Bump the shared version so every process rebuilds on next access"""
+        cls._shared_version.bump()
+        cls._version = None
+
+    @classmethod
+    def shift_for(cls, employee_id):
+        cls._load()
+        shift_id = cls._by_employee.get(employee_id)
+        return cls._shifts.get(shift_id, cls._default) if shift_id else cls._default
+
+    @classmethod
+    def mapping(cls):
+        """{employee_id: Shift} for every employee with an explicit or regional assignment"""
+        cls._load()
+        return {employee_id: cls._shifts[shift_id] for employee_id, shift_id in cls._by_employee.items()}
+
+    @classmethod
+    def evaluate(cls, employee_id, check_in):
+        """Return (shift_id, is_late, late_minutes) for one check-in"""
+        shift = cls.shift_for(employee_id)
+        late, minutes = shift.lateness(check_in)
+        return shift.pk, late, minutes
+
+    @classmethod
+    def default_shift(cls):
+        """The default shift (or IMPLICIT_SHIFT); rows stored with shift=None were evaluated against it"""
+        cls._load()
+        return cls._default
+
+    @classmethod
+    def shift_window(cls, employee_id, day):
+        """Aware (start, end) datetimes of the employee's shift on a given day"""
+        return cls.shift_for(employee_id).window(day)
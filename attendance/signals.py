@@ -0,0 +1,65 @@
+# attendance/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from hr.models import Employee
+from leave.models import Holiday, Leave, Region
+from .models import Shift, ShiftAssignment
+from .services import AttendanceRollupService
+from .shifts import ShiftResolver
+
+_UNKNOWN = object()
+
+
+@receiver(post_save, sender=Leave)
+@receiver(post_delete, sender=Leave)
+def refresh_rollup_for_leave(sender, instance, **kwargs):
+    # Only days already rolled up can change; future days are built when they arrive.
+    # A leave only moves its own employee, so only their (department, location) row is rebuilt.
+    start, end, employee_id = instance.start_date, min(instance.end_date, timezone.localdate()), instance.employee_id
+    if start <= end:
+        transaction.on_commit(lambda: AttendanceRollupService.refresh_employee_range(employee_id, start, end))
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def refresh_rollup_for_holiday(sender, instance, **kwargs):
+    # A single day, but any bucket located in the region can change
+    day = instance.date
+    if day <= timezone.localdate():
+        transaction.on_commit(lambda: AttendanceRollupService.refresh_day(day))
+
+
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+@receiver(post_save, sender=ShiftAssignment)
+@receiver(post_delete, sender=ShiftAssignment)
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+def invalidate_shift_resolver(sender, **kwargs):
+    transaction.on_commit(ShiftResolver.invalidate)
+
+
+@receiver(post_init, sender=Employee)
+def remember_employee_location(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred location is not fetched
+    instance._shift_location = instance.__dict__.get('location', _UNKNOWN)
+
+
+@receiver(post_save, sender=Employee)
+def invalidate_shift_resolver_for_employee(sender, instance, created, update_fields=None, **kwargs):
+    # The location picks the regional shift; other profile edits leave the mapping alone.
+    # Deleting an employee deletes their ShiftAssignment, which invalidates on its own.
+    previous = getattr(instance, '_shift_location', _UNKNOWN)
+    current = instance.__dict__.get('location', _UNKNOWN)
+    if created:
+        changed = bool(instance.location)
+    elif previous is _UNKNOWN or current is _UNKNOWN:
+        changed = update_fields is None or 'location' in update_fields
+    else:
+        changed = previous != current
+    instance._shift_location = current
+    if changed:
+        transaction.on_commit(ShiftResolver.invalidate)
@@ -1,3 +1,472 @@
-from django.test import TestCase
+import gzip
+import io
+import tempfile
+import zipfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from hr.models import Employee
+from hrms.testing import UNCACHED, QueryBudgetMixin, create_employee, session_client
+from leave.models import Holiday, Leave, LeaveType, Region
+from . import archive, exports, muster, reports
+from .ingest import PunchImporter, import_punch_files
+from .models import Attendance, AttendanceDailySummary, ReportJob, Shift, ShiftAssignment
+from .services import TODAY_MAX_AGE, AttendanceCloseService, AttendanceRollupService, AttendanceService
+from .shifts import ShiftResolver
+
+PUNCHES = """employee_id,timestamp,device
+E001,2025-01-06 09:08:00,D1
+E001,2025-01-06 13:36:00,D1
+E001,2025-01-06 18:54:00,D1
+E002,2025-01-06 09:51:00,D1
+E002,2025-01-07 09:40:00,D1
+E999,2025-01-06 09:00:00,D1
+E001,not a time,D1
+"""
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class PunchImporterTests(TestCase):
+    def setUp(self):
+        self.first = create_employee('E001')
+        self.second = create_employee('E002')
+
+    def stored(self):
+        return sorted(Attendance.objects.values_list('employee_id', 'date', 'check_in', 'check_out'))
+
+    def test_collapses_punches_to_first_in_last_out(self):
+        stats = import_punch_files([PUNCHES.splitlines()])
+        self.assertEqual(self.stored(), [
+            (self.first.id, date(2025, 1, 6), local(2025, 1, 6, 9, 8), local(2025, 1, 6, 18, 54)),
+            (self.second.id, date(2025, 1, 6), local(2025, 1, 6, 9, 51), None),
+            (self.second.id, date(2025, 1, 7), local(2025, 1, 7, 9, 40), None),
+        ])
+        self.assertEqual((stats['punches'], stats['bad_lines'], stats['written']), (6, 1, 3))
+        self.assertEqual(stats['unknown_employees'], {'E999'})
+
+    def test_importing_the_same_file_twice_changes_nothing(self):
+        import_punch_files([PUNCHES.splitlines()])
+        rows = list(Attendance.objects.order_by('id').values())
+
+        stats = import_punch_files([PUNCHES.splitlines()])
+        self.assertEqual(stats['written'], 0)
+        self.assertEqual(list(Attendance.objects.order_by('id').values()), rows)
+
+    def test_overlapping_files_merge_in_any_order(self):
+        morning = "E001 2025-01-06 09:08:00\nE002 2025-01-06 09:51:00\n".splitlines()
+        evening = "E001 2025-01-06 18:54:00\nE001 2025-01-06 12:00:00\n".splitlines()
+        import_punch_files([evening])
+        import_punch_files([morning])
+        merged = self.stored()
+
+        Attendance.objects.all().delete()
+        importer = PunchImporter()
+        importer.feed(morning)
+        importer.feed(evening)
+        importer.save()
+        self.assertEqual(self.stored(), merged)
+        self.assertEqual(merged[0][2:], (local(2025, 1, 6, 9, 8), local(2025, 1, 6, 18, 54)))
+
+    def test_real_check_out_replaces_an_auto_close(self):
+        Attendance.objects.create(employee=self.first, date=date(2025, 1, 6), check_in=local(2025, 1, 6, 9, 8))
+        AttendanceCloseService.close_open_records(policy='hours', hours=8)
+        row = Attendance.objects.get(employee=self.first)
+        self.assertEqual((row.check_out, row.auto_closed), (local(2025, 1, 6, 17, 8), True))
+
+        # A morning punch alone leaves the auto-close in place
+        self.assertEqual(import_punch_files([["E001 2025-01-06 09:08:00"]])['written'], 0)
+        import_punch_files([["E001 2025-01-06 09:08:00", "E001 2025-01-06 18:54:00"]])
+        row.refresh_from_db()
+        self.assertEqual((row.check_in, row.check_out, row.auto_closed),
+                         (local(2025, 1, 6, 9, 8), local(2025, 1, 6, 18, 54), False))
+
+
+class AttendanceRollupTests(TestCase):
+    monday = date(2025, 3, 10)
+    saturday = date(2025, 3, 15)
+    fields = ('present', 'on_leave', 'holiday', 'absent', 'late')
+
+    def setUp(self):
+        self.region = Region.objects.create(name='Kolkata', code='KOL')
+        self.casual = LeaveType.objects.create(name='casual')
+        # present and on leave, on leave, nothing recorded
+        self.present, self.on_leave, self.idle = (create_employee(f'E00{n}') for n in range(1, 4))
+        self.sales = create_employee('E004', department='Sales')
+        for employee in (self.present, self.on_leave):
+            self.take_leave(employee, self.monday, self.saturday)
+        for day in (self.monday, self.saturday):
+            self.check_in(self.present, day, 9)
+
+    def take_leave(self, employee, start, end):
+        return Leave.objects.create(
+            employee=employee, leave_type=self.casual, colour='blue', start_date=start, end_date=end,
+            days_requested=Decimal((end - start).days + 1), reason='Test', status='approved',
+        )
+
+    def check_in(self, employee, day, hour):
+        Attendance.objects.create(
+            employee=employee, date=day, check_in=timezone.make_aware(datetime(day.year, day.month, day.day, hour)),
+        )
+
+    def counts(self, day, department='Engineering'):
+        summary = AttendanceDailySummary.objects.get(date=day, department=department, location='Kolkata')
+        return {field: getattr(summary, field) for field in self.fields}
+
+    def built(self, day, department='Engineering'):
+        row = next(row for row in AttendanceRollupService.build_day(day) if row.department == department)
+        return {field: getattr(row, field) for field in self.fields}
+
+    def test_build_day_precedence(self):
+        self.assertEqual(self.built(self.monday), {'present': 1, 'on_leave': 1, 'holiday': 0, 'absent': 1, 'late': 0})
+        # Weekend: nobody is absent
+        self.assertEqual(self.built(self.saturday), {'present': 1, 'on_leave': 1, 'holiday': 1, 'absent': 0, 'late': 0})
+
+        Holiday.objects.create(name='Festival', holiday_type='Public', colour='red', date=self.monday, region=self.region)
+        self.assertEqual(self.built(self.monday), {'present': 1, 'on_leave': 1, 'holiday': 1, 'absent': 0, 'late': 0})
+
+    def test_refresh_today_rebuilds_only_old_rows(self):
+        today = timezone.localdate()
+        self.assertGreater(AttendanceRollupService.refresh_today(), 0)
+        self.check_in(self.idle, today, 9)
+        # Fresh rows are left alone, so the check-in is not counted yet
+        self.assertEqual(AttendanceRollupService.refresh_today(), 0)
+        self.assertEqual(self.counts(today)['present'], 0)
+
+        AttendanceDailySummary.objects.filter(date=today).update(updated_at=timezone.now() - TODAY_MAX_AGE * 2)
+        self.assertGreater(AttendanceRollupService.refresh_today(), 0)
+        self.assertEqual(self.counts(today), self.built(today))
+
+    def test_leave_change_rebuilds_only_the_employee_bucket(self):
+        AttendanceRollupService.refresh_day(self.monday)
+        AttendanceDailySummary.objects.filter(date=self.monday, department='Sales').update(absent=99)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.take_leave(self.idle, self.monday, self.monday)
+        self.assertEqual(self.counts(self.monday), {'present': 1, 'on_leave': 2, 'holiday': 0, 'absent': 0, 'late': 0})
+        self.assertEqual(self.counts(self.monday, 'Sales')['absent'], 99)
+
+
+class AttendanceArchiveTests(TestCase):
+    def setUp(self):
+        self.employee = create_employee('E001')
+        for day in (date(2023, 3, 1), date(2023, 3, 2), date(2024, 1, 5)):
+            Attendance.objects.create(employee=self.employee, date=day, check_in=local(day.year, day.month, day.day, 9))
+
+    def visible_dates(self, date_from=None):
+        return sorted(archive.with_archive(lambda queryset: queryset.values_list('date', flat=True), date_from))
+
+    def test_archived_year_stays_visible(self):
+        self.assertEqual(archive.archive_year_to_table(2023, batch_size=1), 2)
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(self.visible_dates(), [date(2023, 3, 1), date(2023, 3, 2), date(2024, 1, 5)])
+        # Ranges after the archive do not touch it
+        self.assertEqual(self.visible_dates('2024-01-01'), [date(2024, 1, 5)])
+
+    def test_export_is_a_copy(self):
+        archive.archive_year_to_table(2023)
+        with tempfile.TemporaryDirectory() as output_dir:
+            path, rows = archive.export_year_to_file(2023, output_dir)
+            with gzip.open(path, 'rt') as handle:
+                lines = handle.read().splitlines()
+        self.assertEqual(rows, 2)
+        self.assertEqual(lines[0], ','.join(archive.COLUMNS))
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(len(self.visible_dates()), 3)
+
+
+class AttendanceExportTests(TestCase):
+    def setUp(self):
+        self.employee = create_employee('E001', first_name='Zoë')
+        Attendance.objects.create(
+            employee=self.employee, date=date(2025, 1, 6),
+            check_in=local(2025, 1, 6, 9), check_out=local(2025, 1, 6, 17, 30),
+        )
+        Attendance.objects.create(employee=self.employee, date=date(2025, 1, 7), check_in=local(2025, 1, 7, 9))
+        self.client = session_client('SUPER_ADMIN', self.employee)
+
+    def download(self, fmt, **params):
+        response = self.client.get(reverse('attendance:export', args=[fmt]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'.{fmt}"', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+
+    def test_csv(self):
+        lines = self.download('csv').decode('utf-8').splitlines()
+        self.assertEqual(lines[0], '\ufeff' + ','.join(exports.HEADERS))
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('E001,Zoë E001,Engineering,2025-01-07,2025-01-07 09:00,,'))
+        self.assertIn('2025-01-06 17:30', lines[2])
+        self.assertTrue(lines[2].endswith(',8.5,8h 30m'))
+
+    def test_csv_keeps_the_report_filters(self):
+        lines = self.download('csv', date_from='2025-01-07').decode('utf-8').splitlines()
+        self.assertEqual([line.split(',')[3] for line in lines[1:]], ['2025-01-07'])
+
+    def test_xlsx_is_a_workbook(self):
+        with zipfile.ZipFile(io.BytesIO(self.download('xlsx'))) as workbook:
+            self.assertIsNone(workbook.testzip())
+            self.assertIn('[Content_Types].xml', workbook.namelist())
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 3)
+        self.assertIn('<t>Zoë E001</t>', sheet)
+        self.assertTrue(sheet.endswith('</sheetData></worksheet>'))
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(reverse('attendance:export', args=['pdf'])).status_code, 404)
+
+
+class MusterRollTests(TestCase):
+    # March 2025 starts on a Saturday
+    today = date(2025, 3, 12)
+
+    def setUp(self):
+        self.employee = create_employee('E001')
+        self.joiner = create_employee('E002', date_of_joining=date(2025, 3, 10))
+        create_employee('E003', department='Sales')
+        casual = LeaveType.objects.create(name='casual')
+        region = Region.objects.create(name='Kolkata', code='KOL')
+        Holiday.objects.create(name='Festival', holiday_type='Public', colour='red', date=date(2025, 3, 7), region=region)
+        for day, hour in ((3, 9), (4, 11), (5, 9)):
+            Attendance.objects.create(employee=self.employee, date=date(2025, 3, day), check_in=local(2025, 3, day, hour))
+        Attendance.objects.create(employee=self.joiner, date=date(2025, 3, 11), check_in=local(2025, 3, 11, 9))
+        # Present beats the leave on the 5th
+        for start, end, half_day in ((5, 5, None), (6, 6, 'first_half'), (20, 20, None)):
+            Leave.objects.create(
+                employee=self.employee, leave_type=casual, colour='blue',
+                start_date=date(2025, 3, start), end_date=date(2025, 3, end), status='approved', reason='Test',
+                is_half_day=bool(half_day), half_day_period=half_day,
+            )
+
+    def test_cells_and_totals(self):
+        roll = muster.build_muster(2025, 3, 'Engineering', today=self.today)
+        self.assertEqual(len(roll['days']), 31)
+        self.assertEqual(roll['weekly_offs'][:3], [True, True, False])
+        employee, joiner = roll['employees']
+
+        # Future absences are blank; weekends and planned leave stay
+        self.assertEqual(employee['cells'], [
+            'WO', 'WO', 'P', 'LT', 'P', 'CL/2', 'H', 'WO', 'WO', 'A', 'A', 'A',
+            '', '', 'WO', 'WO', '', '', '', 'CL', '', 'WO', 'WO', '', '', '', '', '', 'WO', 'WO', '',
+        ])
+        self.assertEqual(employee['totals'], {
+            'present': 3, 'late': 1, 'leave': 1.5, 'holiday': 1, 'weekly_off': 10, 'absent': 3,
+        })
+        # Nothing before joining; the holiday only applies to Kolkata rows
+        self.assertEqual(joiner['cells'][:12], [''] * 9 + ['A', 'P', 'A'])
+        self.assertEqual(joiner['totals']['holiday'], 0)
+
+    def test_plain_python_grid_matches_numpy(self):
+        roll = muster.build_muster(2025, 3, today=self.today)
+        with mock.patch.object(muster, 'np', None):
+            self.assertEqual(muster.build_muster(2025, 3, today=self.today), roll)
+        self.assertEqual([row['employee_id'] for row in roll['employees']], ['E001', 'E002', 'E003'])
+
+    def test_api(self):
+        client = session_client('SUPER_ADMIN', self.employee)
+        url = reverse('attendance:muster_api')
+        self.assertEqual(client.get(url, {'month': 'March'}).status_code, 400)
+        self.assertEqual(client.get(url, {'month': '2025-03'}).json()['month'], '2025-03')
+
+        response = client.get(url, {'month': '2025-03', 'format': 'csv', 'department': 'Sales'})
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0].split(',')[3:5], ['01 Sat', '02 Sun'])
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('E003,Test E003,Sales,WO,WO,A'))
+
+        manager = create_employee('E004', department='Sales', role='Manager')
+        data = session_client('MANAGER', manager).get(url, {'month': '2025-03', 'department': 'Engineering'}).json()
+        self.assertEqual([row['employee_id'] for row in data['employees']], ['E003', 'E004'])
+
+
+class AutoCloseTests(TestCase):
+    now = local(2025, 3, 12, 3)
+
+    def setUp(self):
+        ShiftResolver.invalidate()
+        # The mapping is kept per process; do not leak the night shift into other tests
+        self.addCleanup(ShiftResolver.invalidate)
+        self.office = create_employee('E001')
+        night = Shift.objects.create(name='Night', start_time=time(21), end_time=time(6))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.night = create_employee('E002')
+            ShiftAssignment.objects.create(shift=night, employee=self.night)
+        self.rows = {
+            'office': self.check_in(self.office, local(2025, 3, 10, 9)),
+            # Checked in after the office shift ended
+            'after_hours': self.check_in(self.office, local(2025, 3, 11, 19)),
+            # The night shift runs until 06:00 this morning
+            'overnight': self.check_in(self.night, local(2025, 3, 11, 21)),
+            'today': self.check_in(self.office, local(2025, 3, 12, 2)),
+        }
+        self.closed = Attendance.objects.create(
+            employee=self.night, date=date(2025, 3, 10), check_in=local(2025, 3, 10, 21), check_out=local(2025, 3, 11, 6),
+        )
+
+    def check_in(self, employee, check_in):
+        return Attendance.objects.create(employee=employee, date=check_in.date(), check_in=check_in)
+
+    def stored(self):
+        rows = Attendance.objects.in_bulk([row.pk for row in self.rows.values()])
+        return {name: (rows[row.pk].check_out, rows[row.pk].auto_closed) for name, row in self.rows.items()}
+
+    def test_shift_end_policy(self):
+        closed, days = AttendanceCloseService.close_open_records(policy='shift_end', now=self.now)
+        self.assertEqual((closed, days), (2, {date(2025, 3, 10), date(2025, 3, 11)}))
+        self.assertEqual(self.stored(), {
+            'office': (local(2025, 3, 10, 18, 30), True),
+            'after_hours': (local(2025, 3, 11, 19), True),
+            'overnight': (None, False),
+            'today': (None, False),
+        })
+        self.closed.refresh_from_db()
+        self.assertFalse(self.closed.auto_closed)
+        # The rollups of the closed days were rebuilt
+        self.assertTrue(AttendanceDailySummary.objects.filter(date=date(2025, 3, 10)).exists())
+
+        # Once the night shift is over the last row closes too
+        closed, _ = AttendanceCloseService.close_open_records(policy='shift_end', now=local(2025, 3, 12, 7))
+        self.assertEqual(closed, 1)
+        self.assertEqual(self.stored()['overnight'], (local(2025, 3, 12, 6), True))
+
+    def test_hours_policy(self):
+        self.assertEqual(AttendanceCloseService.close_open_records(policy='hours', hours=8, now=self.now)[0], 2)
+        self.assertEqual(self.stored(), {
+            'office': (local(2025, 3, 10, 17), True),
+            'after_hours': (local(2025, 3, 12, 3), True),
+            'overnight': (None, False),
+            'today': (None, False),
+        })
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(AttendanceCloseService.close_open_records(policy='shift_end', now=self.now, dry_run=True)[0], 2)
+        self.assertEqual(Attendance.objects.filter(auto_closed=True).count(), 0)
+        self.assertFalse(AttendanceDailySummary.objects.exists())
+        with self.assertRaises(ValueError):
+            AttendanceCloseService.close_open_records(policy='midnight', now=self.now)
+
+
+@mock.patch.object(reports, 'EXECUTOR', 'worker')
+class ReportJobReuseTests(TestCase):
+    params = {'employee_id': 1}
+
+    def test_identical_request_reuses_the_queued_job(self):
+        job = reports.request_report('employee', self.params, 'hr@example.com')
+        self.assertEqual(reports.request_report('employee', self.params, 'hr@example.com').pk, job.pk)
+
+    def test_stale_queued_job_is_not_reused(self):
+        job = reports.request_report('employee', self.params, 'hr@example.com')
+        ReportJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - reports.STALE_AFTER * 2)
+        self.assertNotEqual(reports.request_report('employee', self.params, 'hr@example.com').pk, job.pk)
+
+    def test_employee_edit_changes_the_version(self):
+        employee = create_employee('E001')
+        Attendance.objects.create(employee=employee, date=date(2025, 1, 6), check_in=local(2025, 1, 6, 9))
+        version = reports.data_version('admin', {})
+        self.assertEqual(reports.data_version('admin', {}), version)
+
+        employee.department = 'Sales'
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.save()
+        self.assertNotEqual(reports.data_version('admin', {}), version)
+
+
+class ShiftResolverTests(TestCase):
+    def setUp(self):
+        self.night = Shift.objects.create(name='Night', start_time=time(21), end_time=time(6))
+        region = Region.objects.create(name='Kolkata', code='KOL')
+        with self.captureOnCommitCallbacks(execute=True):
+            ShiftAssignment.objects.create(shift=self.night, region=region)
+            self.employee = create_employee('E001', location='Kolkata')
+
+    def test_location_change_moves_the_employee_off_the_regional_shift(self):
+        self.assertEqual(ShiftResolver.shift_for(self.employee.id), self.night)
+        self.employee.location = 'Delhi'
+        with mock.patch.object(ShiftResolver, 'invalidate', wraps=ShiftResolver.invalidate) as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.employee.save()
+        invalidate.assert_called_once()
+        self.assertNotEqual(ShiftResolver.shift_for(self.employee.id), self.night)
+
+    def test_other_profile_edits_keep_the_mapping(self):
+        ShiftResolver.shift_for(self.employee.id)
+        employee = Employee.objects.get(pk=self.employee.pk)
+        employee.phone = '8888888888'
+        with mock.patch.object(ShiftResolver, 'invalidate') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                employee.save()
+        invalidate.assert_not_called()
+
+
+@override_settings(CACHES=UNCACHED)
+class AttendanceQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Attendance pages and the punch API stay within settings.QUERY_BUDGETS and do not grow with the data"""
+
+    def setUp(self):
+        ShiftResolver.invalidate()
+        self.next_number = 2
+        self.employee = create_employee('E001')
+        self.add_history(3)
+        AttendanceRollupService.refresh_day(timezone.localdate())
+
+    def add_history(self, count):
+        start = self.next_number
+        self.next_number += count
+        today = timezone.localdate()
+        for number in range(start, start + count):
+            employee = create_employee(f'E{number:03d}', department='Sales' if number % 2 else 'Engineering')
+            for offset in range(1, 6):
+                day = today - timedelta(days=offset)
+                self.check_in(employee, day)
+
+    def check_in(self, employee, day):
+        Attendance.objects.create(
+            employee=employee, date=day,
+            check_in=timezone.make_aware(datetime(day.year, day.month, day.day, 9)),
+            check_out=timezone.make_aware(datetime(day.year, day.month, day.day, 18)),
+        )
+
+    def test_admin_pages_and_apis(self):
+        client = session_client('SUPER_ADMIN', self.employee)
+        for name in ('attendance:report', 'attendance:trend_api', 'attendance:muster_api'):
+            with self.subTest(name):
+                url = reverse(name)
+                first = self.assertWithinBudget(client.get(url))
+                self.add_history(5)
+                second = self.assertWithinBudget(client.get(url))
+                self.assertLessEqual(second.count, first.count, f"{url} ran more queries with more attendance")
+
+    def test_employee_pages(self):
+        client = session_client('Employee', self.employee)
+        for name in ('attendance:dashboard', 'attendance:all_attendance'):
+            with self.subTest(name):
+                self.assertWithinBudget(client.get(reverse(name)))
+
+    def test_double_check_in_writes_one_row(self):
+        client = session_client('Employee', self.employee)
+        url = reverse('attendance:punch_api')
+        first = client.post(url, {'action': 'check_in'})
+        second = client.post(url, {'action': 'check_in'})
+        self.assertEqual((first.json()['result'], second.json()['result']), ('checked_in', 'already_checked_in'))
+        self.assertEqual(first.json()['time'], second.json()['time'])
+        self.assertEqual(Attendance.objects.filter(employee=self.employee, date=timezone.localdate()).count(), 1)
+        # Session and the attendance INSERT ... ON CONFLICT DO NOTHING + SELECT; no rollup writes
+        self.assertEqual(second.query_stats.count, first.query_stats.count)
+        with self.assertNumQueries(2):
+            AttendanceService.check_in(self.employee.id)
+
+    def test_punch_api(self):
+        client = session_client('Employee', self.employee)
+        url = reverse('attendance:punch_api')
+        for action in ('check_in', 'check_out'):
+            with self.subTest(action):
+                response = client.post(url, {'action': action})
+                self.assertEqual(response.status_code, 200)
+                self.assertWithinBudget(response)
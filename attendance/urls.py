@@ -5,9 +5,17 @@ app_name = 'attendance'
 
 urlpatterns = [
     path('dashboard/', views.attendance_dashboard, name='dashboard'),
+    path('api/punch/', views.punch_api, name='punch_api'),
     path('all/', views.all_attendance, name='all_attendance'),
     path('report/', views.attendance_report, name='report'),
+    path('import-punches/', views.import_punches, name='import_punches'),
+    path('api/trend/', views.attendance_trend_api, name='trend_api'),
+    path('api/muster/', views.muster_roll_api, name='muster_api'),
     path('download-report/', views.download_attendance_report, name='download_report'),
     path('download-admin-report/', views.download_admin_attendance_report, name='download_admin_report'),
+    path('export/<str:fmt>/', views.export_attendance, name='export'),
+    path('reports/<int:job_id>/', views.report_job_status, name='report_job'),
+    path('reports/<int:job_id>/status/', views.report_job_api, name='report_job_api'),
+    path('reports/<int:job_id>/download/', views.report_job_download, name='report_job_download'),
 
 ]
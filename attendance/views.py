@@ -3,16 +3,20 @@ from django.contrib import messages
 from django.utils import timezone
 from django.utils.timezone import localtime
 from django.core.paginator import Paginator
-from django.db.models import Q
-from .models import Attendance
+from django.db.models import F, Q, Sum, prefetch_related_objects
+from .models import Attendance, AttendanceDailySummary, ReportJob, format_duration
+from . import exports, muster, reports
+from .archive import with_archive
 from hr.models import Employee
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from datetime import datetime
-from reportlab.lib.pagesizes import landscape, A4
-from reportlab.lib.units import inch
-from datetime import datetime, date, time
+from hrms.compression import compressed
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from .services import AttendanceRollupService, AttendanceService
+from .ingest import PunchImporter
+import io
+from datetime import date, datetime, timedelta
 
 
 
@@ -54,35 +58,29 @@ def attendance_dashboard(request):
         messages.info(request, 'Admins can only view attendance.')
     
     employee = Employee.objects.get(id=user_id)
-    today = timezone.now().date()
-    today_attendance = Attendance.objects.filter(employee=employee, date=today).first()
     
     if request.method == 'POST':
         action = request.POST.get('action')
         
         if action == 'check_in':
-            if today_attendance:
-                messages.warning(request, 'You have already checked in today.')
-            else:
-                Attendance.objects.create(
-                    employee=employee,
-                    date=today,
-                    check_in=timezone.now()
-                )
+            result, _ = AttendanceService.check_in(employee.id)
+            if result == AttendanceService.CHECKED_IN:
                 messages.success(request, 'Check-in successful!')
                 return redirect('attendance:dashboard')
+            messages.warning(request, 'You have already checked in today.')
         
         elif action == 'check_out':
-            if not today_attendance:
-                messages.error(request, 'You need to check in first.')
-            elif today_attendance.check_out:
-                messages.warning(request, 'You have already checked out today.')
-            else:
-                today_attendance.check_out = timezone.now()
-                today_attendance.save()
+            result, _ = AttendanceService.check_out(employee.id)
+            if result == AttendanceService.CHECKED_OUT:
                 messages.success(request, 'Check-out successful!')
                 return redirect('attendance:dashboard')
-                
+            elif result == AttendanceService.NOT_CHECKED_IN:
+                messages.error(request, 'You need to check in first.')
+            else:
+                messages.warning(request, 'You have already checked out today.')
+    
+    today = timezone.localdate()
+    today_attendance = Attendance.objects.filter(employee=employee, date=today).first()
     
     context = {
         'today_attendance': today_attendance,
@@ -91,10 +89,65 @@ def attendance_dashboard(request):
     return render(request, 'attendance/dashboard.html', context)
 
 
+# -------------------------------
+# Check-in / Check-out JSON API
+# -------------------------------
+
+PUNCH_MESSAGES = {
+    AttendanceService.CHECKED_IN: ('Check-in successful!', 200),
+    AttendanceService.CHECKED_OUT: ('Check-out successful!', 200),
+    AttendanceService.ALREADY_CHECKED_IN: ('You have already checked in today.', 409),
+    AttendanceService.ALREADY_CHECKED_OUT: ('You have already checked out today.', 409),
+    AttendanceService.NOT_CHECKED_IN: ('You need to check in first.', 409),
+}
+
+
+@require_POST
+def punch_api(request):
+    """Lightweight check-in/check-out that only touches today's attendance row"""
+    if not request.session.get('user_authenticated'):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if request.session.get('user_role') == 'ADMIN':
+        return JsonResponse({'error': 'Admin users do not have attendance records.'}, status=403)
+    
+    action = request.POST.get('action')
+    employee_id = request.session.get('user_id')
+    if action == 'check_in':
+        result, timestamp = AttendanceService.check_in(employee_id)
+    elif action == 'check_out':
+        result, timestamp = AttendanceService.check_out(employee_id)
+    else:
+        return JsonResponse({'error': 'action must be check_in or check_out'}, status=400)
+    
+    message, status = PUNCH_MESSAGES[result]
+    return JsonResponse({
+        'result': result,
+        'message': message,
+        'time': localtime(timestamp).isoformat() if timestamp else None,
+    }, status=status)
+
+
 # -------------------------------
 # View All Attendance (Employee)
 # -------------------------------
 
+# ?sort= values accepted by the attendance lists; lateness needs with_punctuality()
+ATTENDANCE_SORT_ORDERS = {
+    'date': ('-date',),
+    'late': (F('late_minutes').desc(nulls_last=True), F('check_in_local').desc(nulls_last=True), '-date'),
+    'duration': (F('duration').desc(nulls_last=True), '-date'),
+}
+
+
+def set_duration_display(record):
+    if record.duration is not None:
+        record.duration_display = format_duration(record.duration)
+    elif record.check_in and getattr(record, 'day_status', 'In Progress') == 'In Progress':
+        record.duration_display = "In Progress"
+    else:
+        record.duration_display = "-"
+
+
 @login_required
 def all_attendance(request):
     user_id = request.session.get('user_id')
@@ -105,33 +158,24 @@ def all_attendance(request):
         return redirect('dashboard')
     
     employee = Employee.objects.get(id=user_id)
-    attendance_list = Attendance.objects.filter(employee=employee).order_by('-date')
-    
-    # ✅ Add duration calculation for each record
-    for record in attendance_list:
-        if record.check_in and record.check_out:
-            diff = record.check_out - record.check_in
-            total_minutes = diff.total_seconds() / 60
-            hours = int(total_minutes // 60)
-            minutes = int(total_minutes % 60)
-            if hours > 0 and minutes > 0:
-                record.duration_display = f"{hours}h {minutes}m"
-            elif hours > 0:
-                record.duration_display = f"{hours} hours"
-            else:
-                record.duration_display = f"{minutes} minutes"
-        elif record.check_in and not record.check_out:
-            record.duration_display = "In Progress"
-        else:
-            record.duration_display = "-"
+    sort = request.GET.get('sort', 'date')
+    # Archived years are UNIONed in transparently once any exist
+    attendance_list = with_archive(
+        lambda attendances: attendances.filter(employee=employee).with_punctuality().with_duration().with_day_status()
+    ).order_by(*ATTENDANCE_SORT_ORDERS.get(sort, ATTENDANCE_SORT_ORDERS['date']))
 
     paginator = Paginator(attendance_list, 15)
     page = request.GET.get('page')
     attendances = paginator.get_page(page)
     
+    # Durations are computed in SQL; only the rows on this page get formatted
+    for record in attendances:
+        set_duration_display(record)
+    
     context = {
         'attendances': attendances,
         'employee': employee,
+        'sort': sort,
     }
     return render(request, 'attendance/all_attendance.html', context)
 
@@ -140,6 +184,7 @@ def all_attendance(request):
 # Admin / HR Attendance Report
 # -------------------------------
 
+@compressed
 @login_required
 @role_required(['ADMIN', 'HR', 'SUPER_ADMIN'])
 def attendance_report(request):
@@ -148,15 +193,15 @@ def attendance_report(request):
     date_from = request.GET.get('date_from', '')
     date_to = request.GET.get('date_to', '')
 
+    sort = request.GET.get('sort', 'date')
     today = date.today()
-    office_start_time = time(9, 30)  # 9:30 AM
 
-    # Default: show today's attendance
-    attendances = Attendance.objects.select_related('employee').filter(date=today)
+    filtered = bool(search_query or department or date_from or date_to)
 
-    # Apply filters if provided
-    if search_query or department or date_from or date_to:
-        attendances = Attendance.objects.select_related('employee').all()
+    def build(attendances):
+        # Default: show today's attendance
+        if not filtered:
+            return attendances.filter(date=today).with_punctuality().with_duration().with_day_status()
 
         if search_query:
             attendances = attendances.filter(
@@ -174,20 +219,22 @@ def attendance_report(request):
         if date_to:
             attendances = attendances.filter(date__lte=date_to)
 
-    # ✅ Add punctuality field dynamically
-    for att in attendances:
-        if att.check_in:
-            if att.check_in.time() <= office_start_time:
-                att.punctuality = "On Time"
-            else:
-                att.punctuality = "Late"
-        else:
-            att.punctuality = "Absent"
+        # Punctuality and duration are annotated in SQL so sorting and paging stay in the database
+        return attendances.with_punctuality().with_duration().with_day_status()
+
+    # Ranges that reach archived years read attendance_archive as well
+    attendances = with_archive(build, date_from if filtered else today).order_by(
+        *ATTENDANCE_SORT_ORDERS.get(sort, ATTENDANCE_SORT_ORDERS['date'])
+    )
 
     departments = Employee.objects.values_list('department', flat=True).distinct()
-    paginator = Paginator(attendances.order_by('-date'), 20)
+    paginator = Paginator(attendances, 20)
     page = request.GET.get('page')
     attendance_records = paginator.get_page(page)
+    attendance_records.object_list = list(attendance_records.object_list)
+    prefetch_related_objects(attendance_records.object_list, 'employee')
+    for record in attendance_records:
+        set_duration_display(record)
 
     context = {
         'attendances': attendance_records,
@@ -197,212 +244,223 @@ def attendance_report(request):
         'date_from': date_from,
         'date_to': date_to,
         'today': today,
+        'sort': sort,
     }
 
     return render(request, 'attendance/report.html', context)
 
 
+@compressed
+def attendance_trend_api(request):
+    """Daily present/late/on-leave/holiday/absent totals from the rollup table"""
+    if not request.session.get('user_authenticated'):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    user_role = request.session.get('user_role')
+    if user_role not in ('ADMIN', 'HR', 'SUPER_ADMIN', 'MANAGER'):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 366)
+    except ValueError:
+        return JsonResponse({'error': 'days must be a number'}, status=400)
+    department = request.GET.get('department', '')
+    location = request.GET.get('location', '')
+    if user_role == 'MANAGER':
+        department = request.session.get('user_department', '')
+    
+    # Check-ins do not touch the rollup; bring today's rows up to date if they are old
+    AttendanceRollupService.refresh_today()
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    summaries = AttendanceDailySummary.objects.filter(date__range=(start, end))
+    if department:
+        summaries = summaries.filter(department=department)
+    if location:
+        summaries = summaries.filter(location=location)
+    
+    fields = ['headcount', 'present', 'late', 'on_leave', 'holiday', 'absent', 'auto_closed']
+    rows = summaries.order_by().values('date').annotate(**{f'{name}_total': Sum(name) for name in fields}).order_by('date')
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'department': department,
+        'location': location,
+        'days': [
+            {'date': row['date'].isoformat(), **{name: row[f'{name}_total'] for name in fields}}
+            for row in rows
+        ],
+    })
+
+
+@login_required
+@role_required(['ADMIN', 'HR', 'SUPER_ADMIN'])
+def import_punches(request):
+    """Upload punch-device CSV/log exports and merge them into attendance"""
+    if request.method == 'POST':
+        files = request.FILES.getlist('punch_files')
+        if not files:
+            messages.error(request, 'Please choose at least one punch file to upload.')
+            return redirect('attendance:import_punches')
+        
+        importer = PunchImporter()
+        for upload in files:
+            importer.feed(io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline=''))
+        stats = importer.save()
+        
+        messages.success(
+            request,
+            f"Imported {stats['punches']} punches: {stats['written']} attendance records updated "
+            f"across {stats['employee_days']} employee-days."
+        )
+        if stats['bad_lines']:
+            messages.warning(request, f"{stats['bad_lines']} lines could not be parsed and were skipped.")
+        if stats['unknown_employees']:
+            sample = ', '.join(sorted(stats['unknown_employees'])[:10])
+            messages.warning(
+                request,
+                f"{len(stats['unknown_employees'])} unknown employee IDs were skipped: {sample}"
+            )
+        return redirect('attendance:import_punches')
+    
+    return render(request, 'attendance/import_punches.html')
+
+
 @login_required
 @role_required(['ADMIN', 'HR', 'SUPER_ADMIN'])
 def download_admin_attendance_report(request):
-    """Generate PDF for all employees' attendance (times in IST)"""
-    search_query = request.GET.get('search', '')
-    department = request.GET.get('department', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
+    """Queue (or reuse) the all-employee PDF for these filters"""
+    params = {
+        'search': request.GET.get('search', ''),
+        'department': request.GET.get('department', ''),
+        'date_from': request.GET.get('date_from', ''),
+        'date_to': request.GET.get('date_to', ''),
+    }
+    job = reports.request_report('admin', params, request.session.get('user_email'))
+    return redirect('attendance:report_job', job_id=job.pk)
 
-    # ✅ Filter data
-    attendances = Attendance.objects.select_related('employee').all()
-    if search_query:
-        attendances = attendances.filter(
-            Q(employee__first_name__icontains=search_query) |
-            Q(employee__last_name__icontains=search_query) |
-            Q(employee__employee_id__icontains=search_query)
-        )
-    if department:
-        attendances = attendances.filter(employee__department=department)
-    if date_from:
-        attendances = attendances.filter(date__gte=date_from)
-    if date_to:
-        attendances = attendances.filter(date__lte=date_to)
-
-    # ✅ Create response as PDF
-    response = HttpResponse(content_type='application/pdf')
-    filename = "Attendance_Report_All_Employees.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    # PDF setup
-    p = canvas.Canvas(response, pagesize=landscape(A4))
-    width, height = landscape(A4)
-    y = height - 80
-
-    # Title
-    p.setFont("Helvetica-Bold", 18)
-    p.drawCentredString(width / 2, y, "IKONTEL HR SYSTEM - Attendance Report")
-    y -= 30
-    p.setFont("Helvetica", 11)
-    # ✅ Generated On in IST
-    p.drawCentredString(width / 2, y, f"Generated On: {localtime().strftime('%b %d, %Y %I:%M %p')}")
-    y -= 40
-
-    # Header Row
-    p.setFont("Helvetica-Bold", 11)
-    p.drawString(40, y, "Emp ID")
-    p.drawString(120, y, "Name")
-    p.drawString(250, y, "Dept")
-    p.drawString(330, y, "Date")
-    p.drawString(420, y, "Check-In")
-    p.drawString(510, y, "Check-Out")
-    p.drawString(600, y, "Status")
-    p.drawString(680, y, "Duration")
-    y -= 10
-    p.line(35, y, width - 35, y)
-    y -= 15
-
-    # ✅ Data Rows
-    p.setFont("Helvetica", 10)
-    for a in attendances:
-        if y < 60:  # Page break
-            p.showPage()
-            y = height - 60
-            p.setFont("Helvetica", 10)
-
-        # ✅ Convert to local time (IST)
-        check_in_local = localtime(a.check_in).strftime("%I:%M %p") if a.check_in else "-"
-        check_out_local = localtime(a.check_out).strftime("%I:%M %p") if a.check_out else "-"
-
-        # Calculate status & duration
-        if a.check_in and a.check_out:
-            status = "Present"
-            diff = a.check_out - a.check_in
-            total_minutes = diff.total_seconds() / 60
-            hours = int(total_minutes // 60)
-            minutes = int(total_minutes % 60)
-            duration = f"{hours}h {minutes}m"
-        elif a.check_in:
-            status = "Half Day"
-            duration = "In Progress"
-        else:
-            status = "Absent"
-            duration = "-"
-
-        # ✅ Draw Data (now showing IST)
-        p.drawString(40, y, a.employee.employee_id)
-        p.drawString(120, y, f"{a.employee.first_name} {a.employee.last_name}")
-        p.drawString(250, y, a.employee.department)
-        p.drawString(330, y, a.date.strftime("%b %d, %Y"))
-        p.drawString(420, y, check_in_local)
-        p.drawString(510, y, check_out_local)
-        p.drawString(600, y, status)
-        p.drawString(680, y, duration)
-        y -= 18
-
-    # Footer
-    p.setFont("Helvetica-Oblique", 9)
-    y -= 10
-    p.line(35, y, width - 35, y)
-    y -= 20
-    p.drawCentredString(width / 2, y, "Generated by IkonTel HRMS | Confidential Report")
-
-    p.showPage()
-    p.save()
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', exports.stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', exports.stream_xlsx),
+}
+
+
+@login_required
+@role_required(['ADMIN', 'HR', 'SUPER_ADMIN'])
+def export_attendance(request, fmt):
+    """Stream the attendance report filters as CSV or XLSX"""
+    if fmt not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+    params = {
+        'search': request.GET.get('search', ''),
+        'department': request.GET.get('department', ''),
+        'date_from': request.GET.get('date_from', ''),
+        'date_to': request.GET.get('date_to', ''),
+    }
+    content_type, stream = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(exports.export_rows(params)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="attendance_{timezone.localdate():%Y%m%d}.{fmt}"'
+    return response
+
+
+MUSTER_FORMATS = ('json', 'csv', 'xlsx')
+
+
+@compressed
+def muster_roll_api(request):
+    """Employees x days muster roll for a month as JSON, CSV or XLSX"""
+    if not request.session.get('user_authenticated'):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    user_role = request.session.get('user_role')
+    if user_role not in ('ADMIN', 'HR', 'SUPER_ADMIN', 'MANAGER'):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    month_param = request.GET.get('month')
+    try:
+        month_start = datetime.strptime(month_param, '%Y-%m').date() if month_param else timezone.localdate().replace(day=1)
+    except ValueError:
+        return JsonResponse({'error': 'month must be in YYYY-MM format'}, status=400)
+    fmt = request.GET.get('format', 'json')
+    if fmt not in MUSTER_FORMATS:
+        return JsonResponse({'error': f"format must be one of {', '.join(MUSTER_FORMATS)}"}, status=400)
+    
+    department = request.GET.get('department') or None
+    # Managers only see their own department
+    if user_role == 'MANAGER':
+        department = request.session.get('user_department') or None
+    
+    data = muster.build_muster(month_start.year, month_start.month, department)
+    if fmt == 'json':
+        return JsonResponse(data)
+    
+    content_type, stream = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(
+        stream(muster.muster_rows(data), muster.muster_headers(data)), content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="muster_{month_start:%Y_%m}.{fmt}"'
     return response
+
+
 # -------------------------------
 # Generate Attendance Report PDF
 # -------------------------------
 
 @login_required
 def download_attendance_report(request):
-    user_id = request.session.get('user_id')
-    employee = Employee.objects.get(id=user_id)
-    attendances = Attendance.objects.filter(employee=employee).order_by('-date')
-
-    # Create response as PDF
-    response = HttpResponse(content_type='application/pdf')
-    filename = f"{employee.first_name}_attendance_report.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    # Initialize PDF
-    p = canvas.Canvas(response, pagesize=A4)
-    width, height = A4
-    y = height - 80
-
-    # Title
-    p.setFont("Helvetica-Bold", 16)
-    p.drawCentredString(width / 2, y, "IKONTEL HR SYSTEM")
-    y -= 25
-    p.setFont("Helvetica", 12)
-    p.drawCentredString(width / 2, y, f"Attendance Report - {employee.first_name} {employee.last_name}")
-    y -= 30
-
-    # Employee Info
-    p.setFont("Helvetica", 11)
-    p.drawString(50, y, f"Employee ID: {employee.employee_id}")
-    p.drawString(300, y, f"Department: {employee.department}")
-    y -= 20
-    p.drawString(50, y, f"Designation: {employee.designation}")
-    p.drawString(300, y, f"Generated On: {localtime().strftime('%b %d, %Y %I:%M %p')}")  # ✅ IST time
-    y -= 40
-
-    # Table Header
-    p.setFont("Helvetica-Bold", 11)
-    p.drawString(50, y, "Date")
-    p.drawString(150, y, "Check-In")
-    p.drawString(250, y, "Check-Out")
-    p.drawString(350, y, "Status")
-    p.drawString(450, y, "Duration")
-    y -= 10
-    p.line(45, y, 550, y)
-    y -= 15
-
-    # Table Rows
-    p.setFont("Helvetica", 10)
-    for a in attendances:
-        if y < 80:  # Page break
-            p.showPage()
-            y = height - 80
-            p.setFont("Helvetica", 10)
-
-        # ✅ Convert UTC to local IST before printing
-        check_in_local = localtime(a.check_in).strftime("%I:%M %p") if a.check_in else "-"
-        check_out_local = localtime(a.check_out).strftime("%I:%M %p") if a.check_out else "-"
-
-        # Calculate status
-        if a.check_in and a.check_out:
-            status = "Present"
-        elif a.check_in and not a.check_out:
-            status = "Half Day"
-        else:
-            status = "Absent"
-
-        # Duration
-        if a.check_in and a.check_out:
-            diff = a.check_out - a.check_in
-            total_minutes = diff.total_seconds() / 60
-            hours = int(total_minutes // 60)
-            minutes = int(total_minutes % 60)
-            duration = f"{hours}h {minutes}m"
-        elif a.check_in:
-            duration = "In Progress"
-        else:
-            duration = "-"
-
-        # ✅ Row Data (with local times)
-        p.drawString(50, y, a.date.strftime("%b %d, %Y"))
-        p.drawString(150, y, check_in_local)
-        p.drawString(250, y, check_out_local)
-        p.drawString(350, y, status)
-        p.drawString(450, y, duration)
-        y -= 20
-
-    # Footer
-    p.setFont("Helvetica-Oblique", 9)
-    y -= 10
-    p.line(45, y, 550, y)
-    y -= 20
-    p.drawCentredString(width / 2, y, "Generated by IkonTel HRMS | Confidential Employee Report")
-
-    # Finalize PDF
-    p.showPage()
-    p.save()
-    return response
\ No newline at end of file
+    """Queue (or reuse) the logged-in employee's own attendance PDF"""
+    if request.session.get('user_role') == 'ADMIN':
+        messages.error(request, 'Admin users do not have attendance records.')
+        return redirect('dashboard')
+    
+    params = {'employee_id': request.session.get('user_id')}
+    job = reports.request_report('employee', params, request.session.get('user_email'))
+    return redirect('attendance:report_job', job_id=job.pk)
+
+
+# -------------------------------
+# Report Job Status / Download
+# -------------------------------
+
+def _get_report_job(request, job_id):
+    """Jobs are visible to whoever asked for them and to HR/Admin for all-employee reports"""
+    job = get_object_or_404(ReportJob, pk=job_id)
+    if job.requested_by == request.session.get('user_email'):
+        return job
+    if job.kind == 'admin' and request.session.get('user_role') in ('ADMIN', 'HR', 'SUPER_ADMIN'):
+        return job
+    raise Http404('Report not found')
+
+
+def _report_job_payload(job):
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'progress': job.progress,
+        'total_rows': job.total_rows,
+        'error': job.error,
+        'download_url': reverse('attendance:report_job_download', args=[job.pk]) if job.status == 'done' else None,
+    }
+
+
+@login_required
+def report_job_status(request, job_id):
+    job = _get_report_job(request, job_id)
+    return render(request, 'attendance/report_job.html', {
+        'job': job,
+        'job_state': _report_job_payload(job),
+    })
+
+
+def report_job_api(request, job_id):
+    if not request.session.get('user_authenticated'):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    return JsonResponse(_report_job_payload(_get_report_job(request, job_id)))
+
+
+@login_required
+def report_job_download(request, job_id):
+    job = _get_report_job(request, job_id)
+    if job.status != 'done' or not job.file:
+        messages.warning(request, 'This report is not ready yet.')
+        return redirect('attendance:report_job', job_id=job.pk)
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.filename or 'attendance_report.pdf')
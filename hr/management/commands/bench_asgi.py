@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hrms.asgi_bench import ENDPOINTS, PATHS, BenchError, capacity, run, run_worker
+
+
+def levels(value):
+    try:
+        result = sorted({int(level) for level in value.split(',')})
+    except ValueError:
+        raise CommandError('--concurrency takes comma-separated integers')
+    if not result or result[0] < 1:
+        raise CommandError('--concurrency levels must be positive')
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the polled JSON endpoints through the real WSGI and ASGI handlers against the "
+        "current database (seed it with seed_org) and compare throughput, latency and the "
+        "concurrency each path sustains within a p95 target."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', dest='endpoints', choices=ENDPOINTS,
+                            help='Only load these endpoints (repeatable)')
+        parser.add_argument('--path', action='append', dest='paths', choices=sorted(PATHS),
+                            help='Serving paths to compare (default: wsgi and asgi)')
+        parser.add_argument('--concurrency', default='1,8,32,64',
+                            help='Comma-separated numbers of concurrent clients (default 1,8,32,64)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and concurrency level')
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads of the WSGI server (default 8)')
+        parser.add_argument('--slo', type=float, default=250.0, help='p95 latency target in ms for the capacity column')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as JSON')
+        parser.add_argument('--worker', choices=sorted(PATHS), help='Internal: measure one path in this process')
+
+    def handle(self, *args, **options):
+        endpoints = options['endpoints'] or list(ENDPOINTS)
+        concurrency = levels(options['concurrency'])
+        try:
+            if options['worker']:
+                results = run_worker(options['worker'], endpoints, concurrency, options['requests'], options['threads'])
+                self.stdout.write(json.dumps(results))
+                return
+            results = run(options['paths'] or ['wsgi', 'asgi'], endpoints, concurrency,
+                          options['requests'], options['threads'])
+        except BenchError as exc:
+            raise CommandError(str(exc))
+
+        for name in endpoints:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for level in concurrency:
+                for mode, by_endpoint in results.items():
+                    summary = by_endpoint[name][str(level)]
+                    self.stdout.write(
+                        f"  c={level:<4} {mode:<10} {summary['rps']:>8.1f} req/s  p50 {summary['p50_ms']:>8.2f} ms  "
+                        f"p95 {summary['p95_ms']:>8.2f} ms  p99 {summary['p99_ms']:>8.2f} ms  {summary['errors']} errors"
+                    )
+            for mode, by_endpoint in results.items():
+                sustained, best = capacity(by_endpoint[name], options['slo'])
+                self.stdout.write(
+                    f"  {mode:<10} sustains {sustained} concurrent clients within p95 {options['slo']:.0f} ms, "
+                    f"peak {best:.1f} req/s"
+                )
+
+        if options['save']:
+            with open(options['save'], 'w') as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['save']}"))
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hrms.bench import BenchError
+from hrms.wire_bench import ENDPOINTS, MODES, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure bytes on the wire and latency of the compressed views against the current "
+        "database (seed it with seed_org): uncompressed, gzip, and revalidation with If-None-Match."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', dest='endpoints', choices=sorted(ENDPOINTS),
+                            help='Only measure these endpoints (repeatable)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint and mode')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests before the timed ones')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            results = run(
+                options['endpoints'],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                progress=self._report,
+            )
+        except BenchError as exc:
+            raise CommandError(str(exc))
+
+        if options['save']:
+            with open(options['save'], 'w') as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['save']}"))
+
+    def _report(self, name, result):
+        if 'error' in result:
+            self.stdout.write(self.style.ERROR(f"{name:<24} ERROR {result['error']}"))
+            return
+        before = result['identity']['wire_bytes']
+        for mode in MODES:
+            measured = result.get(mode)
+            if measured is None:
+                self.stdout.write(f"{name:<24} {mode:<10} no ETag (page renders a CSRF token)")
+            else:
+                saved = 1 - measured['wire_bytes'] / before if before else 0
+                self.stdout.write(
+                    f"{name:<24} {mode:<10} {measured['status']}  {measured['wire_bytes']:>9} bytes "
+                    f"({saved:>4.0%} saved)  p50 {measured['p50_ms']:>8.2f} ms  p95 {measured['p95_ms']:>8.2f} ms"
+                )
+            name = ''
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hrms.bench import BenchError
+from hrms.template_bench import PAGES, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark get_template() + render() of the heavy page templates with the context their "
+        "view renders against the current database (seed it with seed_org), comparing the "
+        "uncached loader, the cached loader and, when configured, Jinja2."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', action='append', dest='templates', choices=sorted(PAGES),
+                            help='Only benchmark these templates (repeatable)')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed renders per template and engine')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed renders before the timed ones')
+        parser.add_argument('--with-fragments', action='store_true',
+                            help='Keep the template fragment cache on (by default every render does the full work)')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            results = run(
+                options['templates'],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                fragments=options['with_fragments'],
+                progress=self._report,
+            )
+        except BenchError as exc:
+            raise CommandError(str(exc))
+
+        if options['save']:
+            with open(options['save'], 'w') as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['save']}"))
+
+    def _report(self, name, result):
+        if 'error' in result:
+            self.stdout.write(self.style.ERROR(f"{name:<34} ERROR {result['error']}"))
+            return
+        baseline = result.get('uncached')
+        for label, measured in result.items():
+            gain = ''
+            if baseline and label != 'uncached' and measured['p50_ms']:
+                gain = f"  {baseline['p50_ms'] / measured['p50_ms']:.1f}x"
+            self.stdout.write(
+                f"{name:<34} {label:<9} p50 {measured['p50_ms']:>8.2f} ms  p95 {measured['p95_ms']:>8.2f} ms  "
+                f"{measured['queries']:>4} queries{gain}"
+            )
+            name = ''
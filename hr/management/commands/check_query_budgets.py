@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from attendance.models import ReportJob
+from hr.models import Admin, Employee, EmployeeDocument
+from hrms.middleware import QueryRecorder, query_budget
+from hrms.testing import BUDGETED_APPS, iter_app_views, session_client
+from leave.models import Leave, Region
+
+# Path kwargs filled with the first row of these models when --run requests a view
+# (job_id uses a finished ReportJob built for the run)
+SAMPLE_MODELS = {
+    'employee_id': Employee,
+    'leave_id': Leave,
+    'document_id': EmployeeDocument,
+    'region_id': Region,
+    'pk': Admin,
+}
+SAMPLE_VALUES = {
+    'fmt': 'csv',
+}
+# Views --run does not request, and why
+SKIP_VIEWS = {
+    'logout': 'ends the session the run relies on',
+    'leave_list': 'renders leave/leave_list.html, which is not in the tree',
+    'manage_regions': 'renders leave/manage_regions.html, which is not in the tree',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that every hr/leave/attendance view has a committed query budget "
+        "(settings.QUERY_BUDGETS) and, with --run, that a GET of each stays within it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run', action='store_true', help='GET every view against this database and count queries')
+        parser.add_argument('--role', default='SUPER_ADMIN', help='Session role used for --run')
+        parser.add_argument('--email', help='Employee whose session is used for --run (default: first employee)')
+        parser.add_argument('--view', action='append', dest='views', help='Only check these view names')
+
+    def handle(self, *args, **options):
+        views = [view for view in iter_app_views(BUDGETED_APPS) if not options['views'] or view[0] in options['views']]
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        missing = [view_name for view_name, _, _ in views if view_name not in budgets]
+        for view_name in missing:
+            self.stderr.write(f"No query budget for {view_name}")
+
+        failures = []
+        if options['run']:
+            # Lets the test Client through ALLOWED_HOSTS and keeps mail in memory
+            setup_test_environment()
+            try:
+                self._run(views, options, failures)
+            finally:
+                teardown_test_environment()
+
+        if missing or failures:
+            raise CommandError(f"{len(missing)} views without a budget, {len(failures)} over budget or failing")
+        self.stdout.write(self.style.SUCCESS(f"{len(views)} views checked"))
+
+    def _run(self, views, options, failures):
+        employee = Employee.objects.filter(email=options['email']).first() if options['email'] else Employee.objects.first()
+        # The sample job is rolled back with everything else; its file is removed by hand
+        with transaction.atomic():
+            job = self._sample_report_job(employee)
+            try:
+                self._check_views(views, options, failures, employee, {'job_id': job.pk})
+            finally:
+                job.file.delete(save=False)
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def _sample_report_job(employee):
+        """A finished all-employee report owned by the run's employee, so the report_job views can be requested"""
+        job = ReportJob.objects.create(
+            kind='admin',
+            params={},
+            params_hash='check_query_budgets',
+            data_version='check_query_budgets',
+            status='done',
+            progress=100,
+            filename='check_query_budgets.pdf',
+            requested_by=employee.email if employee else '',
+        )
+        job.file.save('check_query_budgets.pdf', ContentFile(b'%PDF-1.4\n%%EOF\n'))
+        return job
+
+    def _check_views(self, views, options, failures, employee, samples):
+        for view_name, route, converters in views:
+            if view_name in SKIP_VIEWS:
+                self.stdout.write(f"  skip {view_name} ({route}): {SKIP_VIEWS[view_name]}")
+                continue
+            kwargs = {}
+            for name in converters:
+                model = SAMPLE_MODELS.get(name)
+                if name in samples:
+                    sample = samples[name]
+                elif model:
+                    sample = model.objects.order_by('pk').values_list('pk', flat=True).first()
+                else:
+                    sample = SAMPLE_VALUES.get(name)
+                if sample is None:
+                    break
+                kwargs[name] = sample
+            if len(kwargs) != len(converters):
+                self.stdout.write(f"  skip {view_name} ({route}): no sample for its path arguments")
+                continue
+
+            client = session_client(options['role'], employee, raise_request_exception=False)
+            recorder = QueryRecorder(capture_params=True)
+            # Roll back anything a GET writes (rollups, report jobs, sessions)
+            with transaction.atomic():
+                with recorder.record():
+                    response = client.get(reverse(view_name, kwargs=kwargs))
+                    if response.streaming:
+                        for _ in response.streaming_content:
+                            pass
+                transaction.set_rollback(True)
+
+            budget = query_budget(view_name)
+            if response.status_code >= 500:
+                # A crashing view fails the check; its query count says nothing
+                self.stdout.write(self.style.ERROR(f"ERR  {view_name:<40} {response.status_code}"))
+                failures.append(view_name)
+                continue
+            over = budget is not None and recorder.count > budget
+            line = f"{'OVER' if over else 'ok  '} {view_name:<40} {response.status_code} {recorder.summary()}, budget {budget}"
+            self.stdout.write(self.style.ERROR(line) if over else line)
+            if over:
+                failures.append(view_name)
+                for count, sql in recorder.most_repeated():
+                    self.stdout.write(f"       {count}x {sql[:200]}")
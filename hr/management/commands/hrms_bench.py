@@ -0,0 +1,94 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hrms.bench import SCENARIOS, BenchError, compare, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot views and batch leave services against the current database "
+        "(seed it with seed_org): latency percentiles, query counts and peak memory. "
+        "Save a JSON baseline with --save and flag regressions against one with --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS),
+                            help='Only run these scenarios (repeatable)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per view scenario')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed runs before the timed ones')
+        parser.add_argument('--batch-iterations', type=int, default=3, help='Timed runs per batch service')
+        parser.add_argument('--password', default='password', help='Password of the seeded employees, for login')
+        parser.add_argument('--pdf-days', type=int, default=31, help='Days covered by the admin PDF')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as a JSON baseline')
+        parser.add_argument('--compare', metavar='BASELINE', help='Flag regressions against this baseline')
+        parser.add_argument('--current', metavar='PATH', help='With --compare: compare this saved run instead of running')
+        parser.add_argument('--threshold', type=float, default=0.15,
+                            help='Relative growth in latency or memory counted as a regression (default 0.15)')
+
+    def handle(self, *args, **options):
+        if options['current'] and not options['compare']:
+            raise CommandError('--current needs --compare')
+
+        if options['current']:
+            current = self._load(options['current'])
+        else:
+            try:
+                current = run(
+                    options['scenarios'] or list(SCENARIOS),
+                    iterations=options['iterations'],
+                    warmup=options['warmup'],
+                    batch_iterations=options['batch_iterations'],
+                    password=options['password'],
+                    pdf_days=options['pdf_days'],
+                    progress=self._report,
+                )
+            except BenchError as exc:
+                raise CommandError(str(exc))
+
+        if options['save']:
+            with open(options['save'], 'w') as handle:
+                json.dump(current, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['save']}"))
+
+        if options['compare']:
+            baseline = self._load(options['compare'])
+            self._compare(baseline, current, options['threshold'])
+
+    def _load(self, path):
+        try:
+            with open(path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+    def _report(self, name, result):
+        if 'error' in result:
+            self.stdout.write(self.style.ERROR(f"{name:<18} ERROR {result['error']}"))
+            return
+        self.stdout.write(
+            f"{name:<18} p50 {result['p50_ms']:>9.1f} ms  p95 {result['p95_ms']:>9.1f} ms  "
+            f"p99 {result['p99_ms']:>9.1f} ms  {result['queries']:>5} queries  {result['peak_kib']:>7} KiB peak"
+        )
+
+    def _compare(self, baseline, current, threshold):
+        self.stdout.write(
+            f"Comparing {current['meta'].get('commit') or 'current'} against "
+            f"{baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0%})"
+        )
+        regressions = 0
+        for name, metric, before, after, regressed in compare(baseline, current, threshold):
+            change = f"{(after - before) / before:+.0%}" if before else 'new'
+            line = f"  {name:<18} {metric:<9} {before:>10} -> {after:<10} {change}"
+            if regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESSION"))
+            else:
+                self.stdout.write(line)
+        missing = sorted(set(baseline['scenarios']) - set(current['scenarios']))
+        if missing:
+            self.stdout.write(f"  not run: {', '.join(missing)}")
+        if regressions:
+            raise CommandError(f"{regressions} regressions")
+        self.stdout.write(self.style.SUCCESS('No regressions'))
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from hrms.metrics import METRIC_LINE, REGISTRY
+
+SUFFIXES = ('_bucket', '_sum', '_count')
+
+
+class Command(BaseCommand):
+    help = (
+        "Scrape /metrics in-process, check that the output is valid Prometheus text format "
+        "with every registered family, and print it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiet', action='store_true', help='Only report the check result')
+        parser.add_argument('--compact', action='store_true',
+                            help='First fold snapshots of exited processes into METRICS_DIR/archive.json')
+
+    def handle(self, *args, **options):
+        if options['compact']:
+            folded = REGISTRY.compact()
+            self.stdout.write(f"Folded {folded} snapshots of exited processes")
+
+        headers = {}
+        if getattr(settings, 'METRICS_TOKEN', None):
+            headers['HTTP_AUTHORIZATION'] = f"Bearer {settings.METRICS_TOKEN}"
+        # Lets the test Client through ALLOWED_HOSTS
+        setup_test_environment()
+        try:
+            response = Client().get(reverse('metrics'), **headers)
+        finally:
+            teardown_test_environment()
+        if response.status_code != 200:
+            raise CommandError(f"/metrics returned {response.status_code}")
+
+        body = response.content.decode()
+        errors, families, samples = self.validate(body)
+        if not options['quiet']:
+            self.stdout.write(body, ending='')
+        for error in errors:
+            self.stderr.write(error)
+        if errors:
+            raise CommandError(f"{len(errors)} problems in the /metrics output")
+        self.stdout.write(self.style.SUCCESS(f"{len(families)} metric families, {samples} samples"))
+
+    def validate(self, body):
+        errors = []
+        families = {}
+        samples = 0
+        for number, line in enumerate(body.splitlines(), 1):
+            if line.startswith('# TYPE '):
+                _, _, name, kind = line.split(' ', 3)
+                families[name] = kind
+            elif line.startswith('#') or not line:
+                continue
+            elif not METRIC_LINE.match(line):
+                errors.append(f"line {number}: not a valid sample: {line}")
+            else:
+                name = line.split('{', 1)[0].split(' ', 1)[0]
+                family = next((name[:-len(suffix)] for suffix in SUFFIXES if name.endswith(suffix)), name)
+                if name not in families and family not in families:
+                    errors.append(f"line {number}: sample of undeclared metric {name}")
+                samples += 1
+        for name, metric in REGISTRY.metrics.items():
+            if families.get(name) != metric.kind:
+                errors.append(f"{name} missing or not a {metric.kind}")
+        return errors, families, samples
@@ -0,0 +1,20 @@
+# hr/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from hrms.cache import bump_fragments, topic
+
+from .models import Employee, EmployeeDocument
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_employee_fragments(sender, **kwargs):
+    # Names, departments and pictures are rendered inside leave fragments
+    bump_fragments('employees')
+
+
+@receiver(post_save, sender=EmployeeDocument)
+@receiver(post_delete, sender=EmployeeDocument)
+def invalidate_document_fragments(sender, instance, **kwargs):
+    bump_fragments(topic('documents', instance.employee_id))
@@ -0,0 +1,25 @@
+"""
+Keys for `{% cache %}` fragments (see hrms/cache.py):
+
+    {% load cache fragments %}
+    {% fragment_versions 'regions' 'holidays' as holidays_version %}
+    {% fragment_scope request.GET.status as leaves_scope %}
+    {% cache 3600 'leave_dashboard.leaves' leaves_version leaves_scope using='fragments' %}
+"""
+from django import template
+
+from hrms import cache
+
+register = template.Library()
+
+
+@register.simple_tag
+def fragment_versions(*topics, of=None):
+    """Versions of `topics`, or with of=<id> of those topics for one object"""
+    return cache.fragment_versions(*(cache.topic(name, of) for name in topics))
+
+
+@register.simple_tag(takes_context=True)
+def fragment_scope(context, *extra):
+    """The requesting session's role and department, plus `extra` values"""
+    return cache.fragment_scope(context['request'].session, *extra)
@@ -1,3 +1,223 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import tempfile
+from pathlib import Path
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from hrms import staticfiles
+from hrms.compression import compressed
+from hrms.testing import UNCACHED, QueryBudgetMixin, create_employee, session_client
+
+
+@override_settings(CACHES=UNCACHED)
+class HrQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every page stays within settings.QUERY_BUDGETS and does not grow with the number of employees"""
+
+    def setUp(self):
+        self.next_number = 2
+        self.employee = create_employee('E001')
+        self.add_employees(2)
+        self.admin = session_client('SUPER_ADMIN', self.employee)
+
+    def add_employees(self, count):
+        start = self.next_number
+        self.next_number += count
+        for number in range(start, start + count):
+            create_employee(f'E{number:03d}', department='Sales' if number % 2 else 'Engineering')
+
+    def assert_flat(self, client, url):
+        first = self.assertWithinBudget(client.get(url))
+        self.add_employees(10)
+        second = self.assertWithinBudget(client.get(url))
+        # Warm in-process caches (LeaveTypeRegistry, ShiftResolver) can only make the second request cheaper
+        self.assertLessEqual(second.count, first.count, f"{url} ran more queries with more employees")
+
+    def test_admin_pages(self):
+        for name in ('dashboard', 'employee_page', 'all_employee', 'active_employee'):
+            with self.subTest(name):
+                self.assert_flat(self.admin, reverse(name))
+
+    def test_employee_detail(self):
+        self.assertWithinBudget(self.admin.get(reverse('employee_detail', args=[self.employee.id])))
+
+    def test_employee_dashboard(self):
+        client = session_client('EMPLOYEE', self.employee)
+        self.assertWithinBudget(client.get(reverse('employee_dashboard')))
+
+
+ROWS = {'rows': [{'name': f'Employee {number}', 'department': 'Engineering'} for number in range(50)]}
+
+
+@compressed
+def rows_view(request):
+    return JsonResponse(ROWS)
+
+
+@compressed
+async def async_rows_view(request):
+    return JsonResponse(ROWS)
+
+
+@compressed
+def form_view(request):
+    return HttpResponse(f'<form><input name="csrfmiddlewaretoken" value="{get_token(request)}">{"<p>Row</p>" * 100}</form>')
+
+
+@compressed
+def download_view(request):
+    return HttpResponse(b'PK' * 500, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+class CompressedViewTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, view, method='get', **headers):
+        return view(getattr(self.factory, method)('/', HTTP_ACCEPT_ENCODING='gzip', **headers))
+
+    def test_gzip_and_etag(self):
+        response = self.get(rows_view)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), ROWS)
+        self.assertEqual(set(response['Cache-Control'].split(', ')), {'private', 'no-cache'})
+        # Django's gzip weakens the tag, since the padding makes the bytes differ per response
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        plain = rows_view(self.factory.get('/'))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(plain.content), ROWS)
+
+    def test_matching_etag_gets_304(self):
+        etag = self.get(rows_view)['ETag']
+        for tag in (etag, etag[2:]):
+            with self.subTest(tag):
+                response = self.get(rows_view, HTTP_IF_NONE_MATCH=tag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(self.get(rows_view, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_only_get_responses_are_tagged(self):
+        response = self.get(rows_view, method='post')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_no_etag_when_the_page_has_a_csrf_token(self):
+        response = self.get(form_view)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(self.get(form_view, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+    def test_binary_types_are_left_alone(self):
+        response = self.get(download_view)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_async_view(self):
+        sync_response = self.get(rows_view)
+        response = async_to_sync(async_rows_view)(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], sync_response['ETag'])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), ROWS)
+
+    def test_pages_on_the_base_template(self):
+        # base.html renders {% csrf_token %} for the page's AJAX calls
+        employee = create_employee('E001')
+        response = session_client('SUPER_ADMIN', employee).get(
+            reverse('employee_detail', args=[employee.id]), HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('ETag'))
+
+
+STYLESHEET = ''.join(f'.row-{number} {{ margin: 0 auto; padding: {number}px; }}\n' for number in range(100))
+
+
+class StaticPipelineTests(TestCase):
+    """collectstatic with hrms.staticfiles, then the files served back through hrms.staticfiles.serve"""
+
+    def setUp(self):
+        source = Path(tempfile.mkdtemp())
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, source)
+        self.addCleanup(shutil.rmtree, root)
+        (source / 'css').mkdir()
+        (source / 'css' / 'app.css').write_text(STYLESHEET)
+        (source / 'css' / 'tiny.css').write_text('body { margin: 0; }')
+        (source / 'logo.png').write_bytes(bytes(range(256)) * 4)
+        self.root = root
+
+        overrides = override_settings(
+            STATIC_ROOT=root,
+            STATICFILES_DIRS=[source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        staticfiles.hashed_names.cache_clear()
+        self.addCleanup(staticfiles.hashed_names.cache_clear)
+        self.stylesheet = staticfiles_storage.stored_name('css/app.css')
+
+    def get(self, name, encoding='gzip, deflate, br', **headers):
+        response = self.client.get(f'/static/{name}', HTTP_ACCEPT_ENCODING=encoding, **headers)
+        if response.status_code == 200:
+            response.body = b''.join(response.streaming_content)
+            response.close()
+        return response
+
+    def test_hashed_names_get_compressed_copies(self):
+        self.assertRegex(self.stylesheet, r'^css/app\.[0-9a-f]{12}\.css$')
+        hashed = self.root / self.stylesheet
+        self.assertEqual(gzip.decompress(hashed.with_name(hashed.name + '.gz').read_bytes()), STYLESHEET.encode())
+        self.assertEqual(hashed.with_name(hashed.name + '.br').exists(), staticfiles.brotli is not None)
+
+        # Too small to gain, not a text type, or not the hashed name
+        tiny = self.root / staticfiles_storage.stored_name('css/tiny.css')
+        logo = self.root / staticfiles_storage.stored_name('logo.png')
+        for path in (tiny, logo, self.root / 'css' / 'app.css'):
+            with self.subTest(path.name):
+                self.assertFalse(path.with_name(path.name + '.gz').exists())
+
+    def test_serves_the_best_accepted_encoding(self):
+        response = self.get(self.stylesheet)
+        if staticfiles.brotli is not None:
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertEqual(staticfiles.brotli.decompress(response.body), STYLESHEET.encode())
+            response = self.get(self.stylesheet, encoding='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.body), STYLESHEET.encode())
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_refused_encodings_get_the_plain_file(self):
+        for header in ('gzip;q=0, br;q=0', 'br;q=0, gzip;q=0.0', 'gzip; q=0', 'identity', ''):
+            with self.subTest(header):
+                response = self.get(self.stylesheet, encoding=header)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.body, STYLESHEET.encode())
+        self.assertEqual(self.get(self.stylesheet, encoding='br;q=0, gzip;q=0.5')['Content-Encoding'], 'gzip')
+        self.assertEqual(staticfiles.accepted_encodings('GZIP;q=1, br;q=0, deflate;q=high'), {'gzip'})
+
+    def test_cache_control(self):
+        self.assertEqual(self.get(self.stylesheet)['Cache-Control'], staticfiles.IMMUTABLE)
+        self.assertEqual(self.get('css/app.css')['Cache-Control'], staticfiles.REVALIDATE)
+
+        response = self.get(self.stylesheet, HTTP_IF_MODIFIED_SINCE=self.get(self.stylesheet)['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], staticfiles.IMMUTABLE)
+
+    def test_missing_and_outside_files(self):
+        for name in ('css/missing.css', '../settings.py', 'css/'):
+            with self.subTest(name):
+                self.assertEqual(self.get(name).status_code, 404)
@@ -7,7 +7,13 @@ from django.utils import timezone
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.db.models import Q ,Count
 from .utils import authenticate_user, get_user_display_name, simple_hash, set_employee_password
+from hrms.metrics import LOGINS
+from hrms.compression import compressed
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
 # Authentication decorator
 def login_required(view_func):
     def wrapper(request, *args, **kwargs):
@@ -38,6 +44,7 @@ def login_view(request):
         password = request.POST.get('password')
         
         user, user_type = authenticate_user(email, password)
+        LOGINS.inc(result='success' if user and user_type else 'failure')
         
         if user and user_type:
             request.session['user_authenticated'] = True
@@ -133,6 +140,7 @@ def access_denied(request):
     return render(request, 'hr/access_denied.html')
 
 # Dashboard Views
+@compressed
 @login_required
 def dashboard(request):
     user_role = request.session.get('user_role')
@@ -189,8 +197,7 @@ def employee_dashboard(request):
     user_email = request.session.get('user_email')
     user_role = request.session.get('user_role')
     
-    print(f"DEBUG: User email from session: {user_email}")
-    print(f"DEBUG: User role from session: {user_role}")
+    logger.debug("Employee dashboard for %s (%s)", user_email, user_role)
     
     # if user_role not in ['EMPLOYEE','MANAGER']:
     #     messages.error(request, 'Access denied. Employee dashboard is for employees only.')
@@ -199,10 +206,9 @@ def employee_dashboard(request):
     # Get employee details
     try:
         employee_profile = Employee.objects.get(email=user_email)
-        print(f"DEBUG: Found employee: {employee_profile.first_name} {employee_profile.last_name}")
     except Employee.DoesNotExist:
         employee_profile = None
-        print(f"DEBUG: No employee found with email: {user_email}")
+        logger.warning("No employee profile for %s", user_email)
         messages.warning(request, 'Employee profile not found.')
     
     context = {
@@ -212,7 +218,6 @@ def employee_dashboard(request):
         'user_role': user_role,
     }
     
-    print(f"DEBUG: Context data: {context}")
     return render(request, 'hr/employee_dashboard.html', context)
 
 @login_required
@@ -477,6 +482,7 @@ def employee_page(request):
     return render(request, 'hr/employee.html', context)
 
 
+@compressed
 @login_required
 def employee_detail(request, employee_id):
     employee = get_object_or_404(Employee, id=employee_id)
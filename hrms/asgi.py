@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hrms.settings')
+# Route the polled JSON endpoints to their async versions (leave/async_views.py)
+os.environ.setdefault('HRMS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,250 @@
+"""
+Load test of the polled JSON endpoints through Django's real WSGI and ASGI
+handlers, one process per serving path:
+
+- wsgi: sync views behind a WSGI server with a fixed pool of worker
+  threads; a request holds a thread from start to finish;
+- asgi: async views (leave/async_views.py) on one event loop, where the
+  endpoint has one (leave_stats_api is a single query and stays sync);
+- asgi-sync: the sync views under ASGI, each run in a thread by Django.
+
+`concurrency` clients each send their share of `requests` back to back.
+Latency runs from sending a request to its last body byte, so it includes
+time queued for a WSGI thread.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from io import BytesIO
+
+from django.conf import settings
+
+from .bench import BenchError, _reverse, percentile
+
+ENDPOINTS = ('leave_stats_api', 'calendar_events', 'region_holidays_api')
+# Serving path -> HRMS_ASYNC_VIEWS for its process
+PATHS = {'wsgi': '0', 'asgi': '1', 'asgi-sync': '0'}
+HOST = 'localhost'
+ACCEPT_ENCODING = 'gzip'
+
+
+def endpoint_path(name):
+    if name == 'region_holidays_api':
+        from leave.models import Region
+
+        region_id = Region.objects.order_by('id').values_list('id', flat=True).first()
+        if region_id is None:
+            raise BenchError('No regions; seed the database first (manage.py seed_org)')
+        return _reverse(name, region_id=region_id)
+    return _reverse(name)
+
+
+def _shares(requests, concurrency):
+    return [requests // concurrency + (1 if index < requests % concurrency else 0) for index in range(concurrency)]
+
+
+def _summary(latencies, errors, elapsed):
+    timings = [latency * 1000 for latency in latencies] or [0.0]
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+    }
+
+
+# -------------------------------
+# WSGI
+# -------------------------------
+
+def _wsgi_environ(path, cookie):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': HOST,
+        'HTTP_COOKIE': cookie,
+        'HTTP_ACCEPT_ENCODING': ACCEPT_ENCODING,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def run_wsgi(path, cookie, concurrency, requests, threads):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    workers = threading.BoundedSemaphore(threads)
+    lock = threading.Lock()
+    latencies, errors = [], 0
+
+    def request():
+        nonlocal errors
+        statuses = []
+        started = time.perf_counter()
+        with workers:
+            result = application(_wsgi_environ(path, cookie), lambda status, headers, exc_info=None: statuses.append(status))
+            try:
+                b''.join(result)
+            finally:
+                # Sends request_finished, which closes the thread's connection
+                result.close()
+        elapsed = time.perf_counter() - started
+        with lock:
+            if statuses and statuses[0].startswith('200'):
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    def client(count):
+        for _ in range(count):
+            request()
+
+    clients = [threading.Thread(target=client, args=(count,)) for count in _shares(requests, concurrency)]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return _summary(latencies, errors, time.perf_counter() - started)
+
+
+# -------------------------------
+# ASGI
+# -------------------------------
+
+async def _asgi_request(application, path, cookie):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (b'host', HOST.encode()),
+            (b'cookie', cookie.encode()),
+            (b'accept-encoding', ACCEPT_ENCODING.encode()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+    body_sent = False
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django cancels this wait once it has responded
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+def run_asgi(path, cookie, concurrency, requests):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    latencies, errors = [], 0
+
+    async def client(count):
+        nonlocal errors
+        for _ in range(count):
+            started = time.perf_counter()
+            status = await _asgi_request(application, path, cookie)
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(*(client(count) for count in _shares(requests, concurrency)))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    return _summary(latencies, errors, elapsed)
+
+
+# -------------------------------
+# Orchestration
+# -------------------------------
+
+def run_worker(mode, endpoints, levels, requests, threads, warmup=10):
+    """
+    Measure one serving path in this process (settings.ASYNC_VIEWS must
+    match it): {endpoint: {concurrency: summary}}.
+    """
+    from .testing import session_client
+
+    if (mode == 'asgi') != settings.ASYNC_VIEWS:
+        raise BenchError(f"{mode} needs HRMS_ASYNC_VIEWS={PATHS[mode]}")
+    client = session_client('SUPER_ADMIN', None)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.session.session_key}"
+    results = {}
+    try:
+        for name in endpoints:
+            path = endpoint_path(name)
+            results[name] = {}
+            for concurrency in levels:
+                if mode == 'wsgi':
+                    run_wsgi(path, cookie, 1, warmup, threads)
+                    summary = run_wsgi(path, cookie, concurrency, requests, threads)
+                else:
+                    run_asgi(path, cookie, 1, warmup)
+                    summary = run_asgi(path, cookie, concurrency, requests)
+                results[name][str(concurrency)] = summary
+    finally:
+        client.session.delete()
+    return results
+
+
+def run(modes, endpoints, levels, requests, threads):
+    """Run each serving path in a fresh `manage.py bench_asgi --worker` process"""
+    results = {}
+    for mode in modes:
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_asgi', '--worker', mode,
+            '--requests', str(requests), '--threads', str(threads),
+            '--concurrency', ','.join(str(level) for level in levels),
+        ]
+        for name in endpoints:
+            command += ['--endpoint', name]
+        env = {**os.environ, 'HRMS_ASYNC_VIEWS': PATHS[mode]}
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise BenchError(f"{mode} worker failed:\n{completed.stderr.strip()}")
+        results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+    return results
+
+
+def capacity(summaries, slo_ms):
+    """Highest tested concurrency whose p95 stays within slo_ms, and the best throughput"""
+    within = [int(level) for level, summary in summaries.items() if summary['p95_ms'] <= slo_ms and not summary['errors']]
+    return max(within, default=0), max((summary['rps'] for summary in summaries.values()), default=0.0)
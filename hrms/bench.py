@@ -0,0 +1,341 @@
+"""Benchmark scenarios for the hot views and batch services, and baseline comparison."""
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .middleware import QueryRecorder
+
+PERCENTILES = (50, 90, 95, 99)
+# Changes smaller than this are noise whatever the ratio
+MIN_DELTA_MS = 5.0
+MIN_DELTA_KIB = 64
+
+
+class BenchError(Exception):
+    """A scenario did not do what it measures (error page, failed job, ...)"""
+
+
+def percentile(values, pct):
+    """Linearly interpolated percentile of a non-empty list"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+# -------------------------------
+# Scenario registry
+# -------------------------------
+
+SCENARIOS = {}
+
+
+def scenario(name, batch=False):
+    """
+    Register a benchmark scenario. The function receives a BenchContext and
+    does one unit of work; it may return a cleanup callable, which runs
+    after the measurement and before the rollback. Batch scenarios are
+    slow whole-organisation jobs and get fewer iterations.
+    """
+    def register(func):
+        SCENARIOS[name] = (func, batch)
+        return func
+    return register
+
+
+def _check(response, expect=(200,)):
+    if response.status_code not in expect:
+        raise BenchError(f"HTTP {response.status_code}")
+    return response
+
+
+def _reverse(name, **kwargs):
+    from django.urls import reverse
+    return reverse(name, kwargs=kwargs or None)
+
+
+@scenario('login')
+def bench_login(ctx):
+    from django.test import Client
+    client = Client()
+    response = client.post(_reverse('login'), {'username': ctx.employee.email, 'password': ctx.password})
+    # A failed login re-renders the form with 200
+    _check(response, expect=(302,))
+
+
+@scenario('dashboard')
+def bench_dashboard(ctx):
+    _check(ctx.admin.get(_reverse('dashboard')))
+
+
+@scenario('employee_search')
+def bench_employee_search(ctx):
+    _check(ctx.admin.get(_reverse('employee_page'), {'search': ctx.employee.last_name}))
+
+
+@scenario('leave_dashboard')
+def bench_leave_dashboard(ctx):
+    _check(ctx.admin.get(_reverse('leave_dashboard')))
+
+
+@scenario('calendar_events')
+def bench_calendar_events(ctx):
+    _check(ctx.admin.get(_reverse('calendar_events')))
+
+
+@scenario('apply_leave')
+def bench_apply_leave(ctx):
+    _check(ctx.member.post(_reverse('apply_leave'), {
+        'leave_type': ctx.casual_id,
+        'start_date': ctx.leave_day.isoformat(),
+        'end_date': ctx.leave_day.isoformat(),
+        'reason': 'Benchmark',
+        'total_days': '1',
+    }), expect=(302,))
+
+
+@scenario('approve_leave')
+def bench_approve_leave(ctx):
+    if ctx.pending_leave_id is None:
+        raise BenchError('No pending leave to approve')
+    _check(ctx.hr.post(_reverse('approve_leave', leave_id=ctx.pending_leave_id), {'action': 'approve'}), expect=(302,))
+
+
+@scenario('attendance_report')
+def bench_attendance_report(ctx):
+    _check(ctx.admin.get(_reverse('attendance:report')))
+
+
+def _build_pdf(response):
+    """Run the report job a download view queued, synchronously, and return its cleanup"""
+    from django.urls import resolve
+
+    from attendance.models import ReportJob
+    from attendance.reports import run_job
+
+    _check(response, expect=(302,))
+    job_id = resolve(response.url).kwargs['job_id']
+    run_job(job_id)
+
+    def cleanup():
+        job = ReportJob.objects.get(pk=job_id)
+        if job.status != 'done':
+            raise BenchError(f"Report job {job.status}: {job.error}")
+        job.file.storage.delete(job.file.name)
+    return cleanup
+
+
+@scenario('employee_pdf')
+def bench_employee_pdf(ctx):
+    return _build_pdf(ctx.member.get(_reverse('attendance:download_report')))
+
+
+@scenario('admin_pdf')
+def bench_admin_pdf(ctx):
+    return _build_pdf(ctx.admin.get(_reverse('attendance:download_admin_report'), {
+        'date_from': ctx.pdf_from.isoformat(),
+        'date_to': ctx.today.isoformat(),
+    }))
+
+
+@scenario('monthly_accrual', batch=True)
+def bench_monthly_accrual(ctx):
+    from leave.services import LeaveAccrualService
+    LeaveAccrualService.process_monthly_accrual_for_all(today=ctx.today.replace(day=1))
+
+
+@scenario('year_end', batch=True)
+def bench_year_end(ctx):
+    from leave.services import YearEndService
+    YearEndService.process_year_end(year=ctx.today.year)
+
+
+class BenchContext:
+    """
+    The people and rows the scenarios act on, picked from the current
+    database (seed it with `manage.py seed_org`):
+
+    - member: an active, post-probation Employee with casual leave left;
+    - hr: an HR employee who approves a pending leave;
+    - admin: a SUPER_ADMIN session.
+    """
+
+    def __init__(self, password='password', pdf_days=31):
+        from hr.models import Employee
+        from hrms.testing import session_client
+        from leave.models import Leave, LeaveBalance, LeaveDay, LeaveType
+
+        self.password = password
+        self.today = timezone.localdate()
+        self.pdf_from = self.today - timedelta(days=pdf_days)
+        casual = LeaveType.objects.filter(name='casual').first()
+        if casual is None:
+            raise BenchError('No casual leave type; seed the database first (manage.py seed_org)')
+        self.casual_id = casual.pk
+
+        with_casual = LeaveBalance.objects.filter(
+            leave_type=casual, year=self.today.year, leaves_remaining__gte=1
+        ).values('employee_id')
+        self.employee = Employee.objects.filter(
+            status='active', role='Employee', id__in=with_casual, probation_end_date__lt=self.today
+        ).order_by('id').first()
+        if self.employee is None:
+            raise BenchError('No active employee with casual leave left; seed the database first (manage.py seed_org)')
+        hr_employee = Employee.objects.filter(status='active', role='HR').order_by('id').first()
+
+        # The first free weekday this year; balances only exist for the current year
+        booked = set(LeaveDay.objects.filter(employee=self.employee, date__gt=self.today).values_list('date', flat=True))
+        self.leave_day = self.today + timedelta(days=1)
+        while self.leave_day.weekday() >= 5 or self.leave_day in booked:
+            self.leave_day += timedelta(days=1)
+        self.pending_leave_id = (
+            Leave.objects.filter(status__in=['pending', 'new'], start_date__gte=self.today)
+            .order_by('id').values_list('id', flat=True).first()
+        )
+
+        self.member = session_client(self.employee.role.upper(), self.employee, raise_request_exception=False)
+        self.hr = session_client('HR', hr_employee, raise_request_exception=False)
+        self.admin = session_client('SUPER_ADMIN', None, raise_request_exception=False)
+        self.clients = [self.member, self.hr, self.admin]
+
+    def close(self):
+        for client in self.clients:
+            client.session.delete()
+
+
+# -------------------------------
+# Measuring
+# -------------------------------
+
+def measure(func, ctx, iterations, warmup=0):
+    """
+    Run a scenario warmup + iterations times, each inside a transaction
+    that is rolled back so writes never stick, then once more under
+    tracemalloc for peak memory (tracing slows Python down, so the timed
+    runs are untraced). Returns the result dict stored in the baseline.
+    """
+    timings = []
+    queries = []
+    for index in range(warmup + iterations):
+        recorder = QueryRecorder()
+        elapsed = _run_once(func, ctx, recorder)
+        if index >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(recorder.count)
+
+    tracemalloc.start()
+    try:
+        _run_once(func, ctx, QueryRecorder())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {f"p{pct}_ms": round(percentile(timings, pct), 2) for pct in PERCENTILES}
+    result.update({
+        'mean_ms': round(statistics.mean(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'iterations': iterations,
+        'queries': max(queries),
+        'peak_kib': round(peak / 1024),
+    })
+    return result
+
+
+def _run_once(func, ctx, recorder):
+    from unittest import mock
+
+    from attendance import reports
+
+    # Report jobs run inline in the scenario, not on the executor thread,
+    # which could not see the uncommitted job anyway
+    with mock.patch.object(reports, 'EXECUTOR', 'inline'), transaction.atomic():
+        with recorder.record():
+            started = time.perf_counter()
+            cleanup = func(ctx)
+            elapsed = time.perf_counter() - started
+        if cleanup:
+            cleanup()
+        transaction.set_rollback(True)
+    return elapsed
+
+
+def run(names, iterations=20, warmup=2, batch_iterations=3, password='password', pdf_days=31, progress=None):
+    """Measure the named scenarios; returns {'meta': ..., 'scenarios': {name: result}}"""
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from hr.models import Employee
+
+    # Lets the test Client through ALLOWED_HOSTS and keeps mail in memory
+    setup_test_environment()
+    ctx = BenchContext(password=password, pdf_days=pdf_days)
+    results = {}
+    try:
+        for name in names:
+            func, batch = SCENARIOS[name]
+            try:
+                if batch:
+                    result = measure(func, ctx, batch_iterations)
+                else:
+                    result = measure(func, ctx, iterations, warmup)
+            except BenchError as exc:
+                result = {'error': str(exc)}
+            results[name] = result
+            if progress:
+                progress(name, result)
+    finally:
+        ctx.close()
+        teardown_test_environment()
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'created': timezone.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'employees': Employee.objects.count(),
+        },
+        'scenarios': results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# -------------------------------
+# Comparing
+# -------------------------------
+
+def compare(baseline, current, threshold=0.15):
+    """
+    Compare two run() results scenario by scenario. Returns rows of
+    (scenario, metric, before, after, regressed): p50/p95 latency and peak
+    memory regress when they grow by more than `threshold` (and by more
+    than the noise floor); query counts regress on any increase.
+    """
+    rows = []
+    for name, after in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before or 'error' in before or 'error' in after:
+            continue
+        for metric, floor in (('p50_ms', MIN_DELTA_MS), ('p95_ms', MIN_DELTA_MS), ('peak_kib', MIN_DELTA_KIB)):
+            delta = after[metric] - before[metric]
+            regressed = delta > floor and delta > before[metric] * threshold
+            rows.append((name, metric, before[metric], after[metric], regressed))
+        rows.append((name, 'queries', before['queries'], after['queries'], after['queries'] > before['queries']))
+    return rows
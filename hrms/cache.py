@@ -0,0 +1,132 @@
+"""
+Cache backends with hit/miss metrics, shared versions for in-process caches,
+and versioned template fragments.
+
+In-process caches (the LeaveType registry, the shift resolver, ...) keep a
+SharedVersion and reload when it moves. The versions live in VERSION_CACHE,
+which must be shared by every worker - the default cache is per process
+under the locmem backend, so a bump there would only reach one worker.
+
+Fragments are cached with `{% cache %}` in the FRAGMENT_CACHE alias and
+keyed on topic versions ({% fragment_versions %} in hr/templatetags/
+fragments.py). Model signals bump a topic's version after commit, so a
+changed holiday, region, leave or document makes every fragment built
+from it unreachable; the stale entries simply expire.
+"""
+import json
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends import filebased, locmem, redis
+from django.db import transaction
+
+from .metrics import CacheMetricsMixin
+
+FRAGMENT_CACHE = 'fragments'
+# File-based or redis (hrms/settings.py), so shared between workers
+VERSION_CACHE = FRAGMENT_CACHE
+VERSION_KEY = 'version:{}'
+
+
+class LocMemCache(CacheMetricsMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(CacheMetricsMixin, filebased.FileBasedCache):
+    pass
+
+
+class RedisCache(CacheMetricsMixin, redis.RedisCache):
+    pass
+
+
+# -------------------------------
+# Shared versions
+# -------------------------------
+
+def shared_versions(*names):
+    """
+    The current versions of `names`. A version is the time of the last
+    bump, not a counter, so a version key lost to cache culling comes back
+    as a new value and can never match anything built before it was lost.
+    """
+    cache = caches[VERSION_CACHE]
+    keys = [VERSION_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            version = time.time_ns()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions.append(version)
+    return versions
+
+
+def bump_shared_versions(*names):
+    version = time.time_ns()
+    caches[VERSION_CACHE].set_many({VERSION_KEY.format(name): version for name in names}, timeout=None)
+
+
+class SharedVersion:
+    """
+    The version of one in-process cache, shared by every worker.
+
+    The shared value is read again at most every `check_interval` seconds,
+    so lookups in a loop cost no cache round trip; a bump reaches the other
+    workers within that interval and the bumping process at once.
+    """
+
+    def __init__(self, name, check_interval=1.0):
+        self.name = name
+        self.check_interval = check_interval
+        self._value = None
+        self._checked = None
+
+    def get(self):
+        now = time.monotonic()
+        if self._checked is None or now - self._checked >= self.check_interval:
+            self._value = shared_versions(self.name)[0]
+            self._checked = now
+        return self._value
+
+    def bump(self):
+        bump_shared_versions(self.name)
+        self._checked = None
+
+
+# -------------------------------
+# Fragment versions
+# -------------------------------
+
+def topic(name, object_id=None):
+    """'leaves' for every leave, 'leaves:42' for one employee's leaves"""
+    return name if object_id is None else f"{name}:{object_id}"
+
+
+def fragment_versions(*topics):
+    """The current versions of `topics` as one string, for use as a `{% cache %}` vary_on argument"""
+    return '.'.join(str(version) for version in shared_versions(*topics))
+
+
+def invalidate_fragments(*topics):
+    """Bump the versions of `topics`; use bump_fragments() inside a transaction"""
+    bump_shared_versions(*topics)
+
+
+def bump_fragments(*topics):
+    """Invalidate after commit, so no worker re-caches the pre-save rows"""
+    transaction.on_commit(lambda: invalidate_fragments(*topics))
+
+
+def fragment_scope(session, *extra):
+    """
+    A vary_on value for fragments whose content depends on who is asking:
+    the session's role and department, plus any `extra` values (filters).
+    The {% cache %} tag joins vary_on values with ':' before hashing, so
+    free-form strings are JSON-encoded here to keep ('a:b', 'c') and
+    ('a', 'b:c') apart.
+    """
+    values = [session.get('user_role'), session.get('user_department'), *extra]
+    return json.dumps([None if value is None else str(value) for value in values])
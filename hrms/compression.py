@@ -0,0 +1,66 @@
+"""Per-view response compression and conditional GET."""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import get_conditional_response, patch_cache_control, set_response_etag
+
+# Binary formats (xlsx, pdf, images) are compressed already
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+_gzip = GZipMiddleware(lambda request: None)
+
+
+def uses_csrf_token(request):
+    """True once the view rendered {% csrf_token %} or called get_token()"""
+    return bool(request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+
+
+def compressed(view_func):
+    """
+    Gzip the response when the client accepts it and give GET responses an
+    ETag, answering a matching If-None-Match with 304 and no body.
+
+    Pages that render a CSRF token get no ETag: the masked token differs on
+    every response, so the tag would never match, and a 304 must never
+    hand a browser back a page with an old token. Their compressed bodies
+    carry Django's random gzip padding against BREACH-style length probes,
+    as does every gzipped response.
+
+    Responses are revalidated on every use (Cache-Control: private,
+    no-cache), since they depend on the session. Works on sync and async
+    views.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            return _finish(request, await view_func(request, *args, **kwargs))
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        return _finish(request, view_func(request, *args, **kwargs))
+    return wrapper
+
+
+def _finish(request, response):
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    content_type = response.get('Content-Type', '')
+    if not content_type.startswith(COMPRESSIBLE_TYPES):
+        return response
+
+    if (
+        request.method in ('GET', 'HEAD')
+        and response.status_code == 200
+        and not response.streaming
+        and not response.has_header('ETag')
+        and not uses_csrf_token(request)
+    ):
+        set_response_etag(response)
+        if not response.has_header('Cache-Control'):
+            patch_cache_control(response, private=True, no_cache=True)
+        response = get_conditional_response(request, etag=response.get('ETag'), response=response)
+    if response.status_code == 304:
+        return response
+    return _gzip.process_response(request, response)
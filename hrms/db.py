@@ -0,0 +1,40 @@
+"""Database helpers shared by the hr, leave and attendance apps."""
+from django.db import connections, router
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=1000):
+    """
+    Insert objs, updating update_fields on rows that hit unique_fields.
+
+    Compiles to INSERT ... ON CONFLICT DO UPDATE on PostgreSQL/SQLite and
+    INSERT ... ON DUPLICATE KEY UPDATE on MySQL, which cannot name the
+    conflict target, so unique_fields is only passed where it is supported.
+    """
+    if not objs:
+        return objs
+    connection = connections[router.db_for_write(model)]
+    kwargs = {'update_conflicts': True, 'update_fields': update_fields}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = unique_fields
+    return model.objects.bulk_create(objs, batch_size=batch_size, **kwargs)
+
+
+def count_many(**querysets):
+    """
+    Count several querysets in one round trip:
+    SELECT (SELECT COUNT(*) FROM (...)), (SELECT COUNT(*) FROM (...)), ...
+    Returns {name: count}. All querysets must use the same database.
+    """
+    using = {queryset.db for queryset in querysets.values()}
+    if len(using) != 1:
+        raise ValueError('count_many() needs querysets on one database')
+    connection = connections[using.pop()]
+    parts = []
+    params = []
+    for name, queryset in querysets.items():
+        sql, query_params = queryset.order_by().values('pk').query.sql_with_params()
+        parts.append(f"(SELECT COUNT(*) FROM ({sql}) {connection.ops.quote_name(name)})")
+        params.extend(query_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(parts)}", params)
+        return dict(zip(querysets, cursor.fetchone()))
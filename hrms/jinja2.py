@@ -0,0 +1,37 @@
+"""
+Jinja2 environment for pages ported to jinja2/ (see TEMPLATES in settings).
+
+Ported templates get the Django helpers they need as globals and filters:
+
+    <a href="{{ url('employee_detail', employee_id=employee.id) }}">
+    <link href="{{ static('css/app.css') }}" rel="stylesheet">
+    {{ leave.start_date|date('d M Y') }} {{ days|pluralize }}
+    {{ csrf_input }}
+"""
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment
+
+from .cache import fragment_versions
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args or None, kwargs=kwargs or None)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'fragment_versions': fragment_versions,
+    })
+    env.filters.update({
+        'date': defaultfilters.date,
+        'floatformat': defaultfilters.floatformat,
+        'pluralize': defaultfilters.pluralize,
+        'truncatewords': defaultfilters.truncatewords,
+        'linebreaksbr': defaultfilters.linebreaksbr,
+    })
+    return env
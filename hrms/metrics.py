@@ -0,0 +1,425 @@
+"""
+In-process metrics registry with a Prometheus text endpoint.
+
+Each process keeps its counters and histograms in memory and writes a
+snapshot to METRICS_DIR/<pid>.json at most every METRICS_FLUSH_INTERVAL
+seconds (and at exit). /metrics merges every process's snapshot, so any
+worker answers for all of them, and values from short-lived management
+commands (accrual, year-end) survive their process.
+"""
+import atexit
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.samples = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+    @staticmethod
+    def merge(into, value):
+        return (into or 0) + value
+
+    def lines(self, samples):
+        for key, value in sorted(samples.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Per label set: [count per bucket..., count above the last bucket, sum]"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                sample = self.samples[key] = [0] * (len(self.buckets) + 2)
+            sample[bisect_left(self.buckets, value)] += 1
+            sample[-1] += value
+
+    @staticmethod
+    def merge(into, value):
+        if into is None:
+            return list(value)
+        return [a + b for a, b in zip(into, value)]
+
+    def lines(self, samples):
+        for key, sample in sorted(samples.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), sample[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labels, key, [('le', _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(float(sample[-1]))}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.derived = []
+        self._flushed = 0.0
+        self._claimed = False
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge_from(self, name, help, labels, compute):
+        """A gauge computed at scrape time from the merged samples: compute(samples) -> {label tuple: value}"""
+        self.derived.append((name, help, tuple(labels), compute))
+
+    # -------------------------------
+    # Process snapshots
+    # -------------------------------
+
+    @staticmethod
+    def directory():
+        return Path(getattr(settings, 'METRICS_DIR', Path(settings.BASE_DIR) / 'metrics'))
+
+    def snapshot(self):
+        with _lock:
+            return {
+                name: [[list(key), value] for key, value in metric.samples.items()]
+                for name, metric in self.metrics.items() if metric.samples
+            }
+
+    def flush(self):
+        """Write this process's snapshot to METRICS_DIR/<pid>.json (nothing if it recorded nothing)"""
+        self._flushed = time.monotonic()
+        snapshot = self.snapshot()
+        if not snapshot:
+            return
+        directory = self.directory()
+        path = directory / f"{os.getpid()}.json"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            if not self._claimed:
+                # A file under our pid belongs to a dead process that had the pid before
+                if path.exists():
+                    os.replace(path, directory / f"{os.getpid()}-{time.time_ns()}.json")
+                self._claimed = True
+            self._write(path, snapshot)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write(path, snapshot):
+        handle, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(handle, 'w') as out:
+            json.dump(snapshot, out)
+        os.replace(temp, path)
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+            self.flush()
+
+    def collect(self):
+        """{metric name: {label tuple: merged value}} across every process's snapshot and this one's live values"""
+        merged = {name: {} for name in self.metrics}
+        own = f"{os.getpid()}.json"
+        snapshots = [self.snapshot()]
+        directory = self.directory()
+        if directory.is_dir():
+            for path in directory.glob('*.json'):
+                if path.name == own:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+        for snapshot in snapshots:
+            for name, samples in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in samples:
+                    key = tuple(key)
+                    merged[name][key] = metric.merge(merged[name].get(key), value)
+        return merged
+
+    def compact(self):
+        """
+        Fold the snapshots of processes that are no longer running into
+        METRICS_DIR/archive.json, so the directory does not grow with every
+        worker restart and cron run. Returns the number of files folded.
+        Only checks pids on this host; run it from one place at a time.
+        """
+        directory = self.directory()
+        if not directory.is_dir():
+            return 0
+        archive = directory / 'archive.json'
+        merged = {}
+        folded = []
+        for path in sorted(directory.glob('*.json')):
+            # Live workers keep writing <pid>.json; everything else, archive.json included, is folded
+            if path.stem.isdigit() and _alive(int(path.stem)):
+                continue
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, samples in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                target = merged.setdefault(name, {})
+                for key, value in samples:
+                    target[tuple(key)] = metric.merge(target.get(tuple(key)), value)
+            if path != archive:
+                folded.append(path)
+        if folded:
+            self._write(archive, {
+                name: [[list(key), value] for key, value in samples.items()] for name, samples in merged.items()
+            })
+            for path in folded:
+                path.unlink(missing_ok=True)
+        return len(folded)
+
+    def exposition(self):
+        """Prometheus text format (version 0.0.4)"""
+        merged = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.lines(merged[name]))
+        for name, help, labels, compute in self.derived:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(compute(merged).items()):
+                lines.append(f"{name}{_format_labels(labels, key)} {_format_value(float(value))}")
+        return '\n'.join(lines) + '\n'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'hrms_http_requests_total', 'HTTP requests by view, method and status class', ('view', 'method', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'hrms_http_request_duration_seconds', 'Request latency by view', ('view',))
+DB_QUERIES = REGISTRY.histogram(
+    'hrms_db_queries_per_request', 'SQL statements per request by view', ('view',), QUERY_BUCKETS)
+CACHE_REQUESTS = REGISTRY.counter(
+    'hrms_cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ('cache', 'result'))
+LOGINS = REGISTRY.counter(
+    'hrms_logins_total', 'Login attempts by result (success/failure)', ('result',))
+JOB_RUNS = REGISTRY.counter(
+    'hrms_job_runs_total', 'Batch job runs by job and status (ok/failed/error)', ('job', 'status'))
+JOB_DURATION = REGISTRY.histogram(
+    'hrms_job_duration_seconds', 'Batch job run time', ('job',), JOB_BUCKETS)
+JOB_ITEMS = REGISTRY.counter(
+    'hrms_job_items_total', 'Items processed by batch jobs (employees, report rows)', ('job',))
+
+
+def _cache_hit_ratio(merged):
+    totals = {}
+    for (cache, result), count in merged[CACHE_REQUESTS.name].items():
+        hits, lookups = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (count if result == 'hit' else 0), lookups + count)
+    return {(cache,): hits / lookups for cache, (hits, lookups) in totals.items() if lookups}
+
+
+REGISTRY.gauge_from('hrms_cache_hit_ratio', 'Share of cache lookups that hit, across all processes', ('cache',), _cache_hit_ratio)
+
+
+# -------------------------------
+# Instrumentation
+# -------------------------------
+
+def record_job(job, started, items=0, status='ok'):
+    """Count one batch job run that began at time.perf_counter() `started`"""
+    JOB_RUNS.inc(job=job, status=status)
+    JOB_DURATION.observe(time.perf_counter() - started, job=job)
+    if items:
+        JOB_ITEMS.inc(items, job=job)
+    REGISTRY.maybe_flush()
+
+
+def track_job(job):
+    """Decorator: count runs and run time of a batch job; an exception counts as status 'error'"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status = 'error'
+            try:
+                result = func(*args, **kwargs)
+                status = 'ok'
+                return result
+            finally:
+                record_job(job, started, status=status)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    Request count, latency and SQL statements per URL name. Goes first in
+    MIDDLEWARE; query counts come from QueryBudgetMiddleware's
+    `response.query_stats`. Runs natively under ASGI as well as WSGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        # Unmatched paths share one label so scanners cannot grow the series count
+        view = match.view_name if match and match.view_name else '<unresolved>'
+        HTTP_REQUESTS.inc(view=view, method=request.method, status=f"{response.status_code // 100}xx")
+        HTTP_LATENCY.observe(elapsed, view=view)
+        stats = getattr(response, 'query_stats', None)
+        if stats is not None:
+            DB_QUERIES.observe(stats.count, view=view)
+        REGISTRY.maybe_flush()
+
+
+_MISSING = object()
+
+
+class CacheMetricsMixin:
+    """
+    Count hits and misses of get()/get_many() on a cache backend, labelled
+    by the cache's METRICS_LABEL (default: its LOCATION).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.metrics_label = params.get('METRICS_LABEL') or (location if isinstance(location, str) else '') or 'default'
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            CACHE_REQUESTS.inc(cache=self.metrics_label, result='miss')
+            return default
+        CACHE_REQUESTS.inc(cache=self.metrics_label, result='hit')
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        if super().get_many.__func__ is BaseCache.get_many:
+            # The generic get_many() loops over get(), which already counted
+            return found
+        if found:
+            CACHE_REQUESTS.inc(len(found), cache=self.metrics_label, result='hit')
+        if len(keys) > len(found):
+            CACHE_REQUESTS.inc(len(keys) - len(found), cache=self.metrics_label, result='miss')
+        return found
+
+
+# -------------------------------
+# Endpoint
+# -------------------------------
+
+METRIC_LINE = re.compile(
+    r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? '
+    r'(-?[0-9.eE+-]+|\+Inf|-Inf|NaN)$'
+)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. With settings.METRICS_TOKEN set, requires
+    `Authorization: Bearer <token>`.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(REGISTRY.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,158 @@
+"""Per-request SQL instrumentation: query count, SQL time, duplicates and query budgets."""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('hrms.queries')
+
+
+def query_budget(view_name):
+    """Committed query budget for a resolved view name ('login', 'attendance:report', ...)"""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if view_name in budgets:
+        return budgets[view_name]
+    return getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that counts statements and SQL time.
+
+    The same SQL run more than once (the usual N+1 shape) is similar.
+    With capture_params, statements are also counted per parameter set
+    and a repeat with the same parameters is a duplicate; that keeps a
+    repr of every parameter list, so production requests leave it off.
+    Use record() to install it on every connection.
+    """
+
+    def __init__(self, capture_params=False):
+        self.capture_params = capture_params
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+            if self.capture_params:
+                self.executions[(sql, repr(params))] += 1
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def duplicates(self):
+        """Executions beyond the first of identical (sql, params) statements; None without capture_params"""
+        if not self.capture_params:
+            return None
+        return sum(count - 1 for count in self.executions.values() if count > 1)
+
+    @property
+    def similar(self):
+        """Executions beyond the first of the same SQL, whatever the parameters"""
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def most_repeated(self, limit=3):
+        """[(count, sql)] for the statements run most often, ignoring parameters"""
+        return [(count, sql) for sql, count in self.statements.most_common(limit) if count > 1]
+
+    def _repeats(self):
+        if self.capture_params:
+            return f"{self.duplicates} duplicate, {self.similar} similar"
+        return f"{self.similar} similar"
+
+    def summary(self):
+        return f"{self.count} queries in {self.duration * 1000:.1f} ms ({self._repeats()})"
+
+    def server_timing(self, total=None):
+        parts = [f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries, {self._repeats()}"']
+        if total is not None:
+            parts.append(f'app;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+class QueryBudgetMiddleware:
+    """
+    Record the SQL each request runs and compare it with the view's budget
+    from settings.QUERY_BUDGETS (QUERY_BUDGET_DEFAULT for views without
+    one). Over-budget requests are logged as warnings on 'hrms.queries';
+    with DEBUG on, a Server-Timing header shows the numbers in the browser
+    devtools. The recorder is attached to the response as `query_stats`
+    for hrms.testing.
+
+    Queries run while a StreamingHttpResponse is consumed happen after
+    this middleware returns and are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = self.recorder()
+        started = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.check(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        # Async views reach the database through sync_to_async, on the one
+        # thread ASGIHandler gives each request; install the recorder on
+        # that thread's connections
+        recorder = self.recorder()
+        started = time.perf_counter()
+        recording = recorder.record()
+        await sync_to_async(recording.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.__exit__)(None, None, None)
+        return self.check(request, response, recorder, time.perf_counter() - started)
+
+    @staticmethod
+    def recorder():
+        # Parameters are only kept where someone is looking at duplicates
+        return QueryRecorder(capture_params=settings.DEBUG or getattr(settings, 'PROFILING_ENABLED', False))
+
+    def check(self, request, response, recorder, total):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        budget = query_budget(view_name) if view_name else None
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                "Query budget exceeded for %s (%s %s): %s, budget %d",
+                view_name, request.method, request.path, recorder.summary(), budget,
+            )
+            for count, sql in recorder.most_repeated():
+                logger.warning("  %dx %s", count, sql[:300])
+        elif recorder.duplicates:
+            logger.debug("%s %s: %s", request.method, request.path, recorder.summary())
+
+        if settings.DEBUG:
+            timing = recorder.server_timing(total)
+            if response.has_header('Server-Timing'):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response['Server-Timing'] = timing
+        response.query_stats = recorder
+        return response
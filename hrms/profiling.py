@@ -0,0 +1,315 @@
+"""Opt-in request profiling: sampled cProfile or stack-sampler runs aggregated per view."""
+import cProfile
+import logging
+import os
+import pstats
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger('hrms.profiling')
+
+MODES = ('cprofile', 'sampler')
+
+
+def profiling_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def _safe_name(view_name):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', view_name)
+
+
+# -------------------------------
+# Profilers
+# -------------------------------
+
+class CProfileRun:
+    """Deterministic profile of one request; only one can run at a time per process"""
+
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.active = False
+
+    def __enter__(self):
+        # cProfile cannot profile two threads of a process at once; a
+        # concurrent sampled request simply goes unprofiled
+        self.active = self._lock.acquire(blocking=False)
+        if self.active:
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.active:
+            self.profile.disable()
+            self._lock.release()
+
+
+class StackSampler:
+    """
+    Statistical profile of one request: a helper thread records the
+    request thread's stack every `interval` seconds as a collapsed stack
+    ("outer;inner;leaf"), the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.active = True
+        self._stop = threading.Event()
+        self._target = None
+        self._root = None
+        self._thread = None
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        # Stacks stop at the frame that entered the sampler (the middleware)
+        self._root = sys._getframe(1)
+        self._thread = threading.Thread(target=self._sample, name='hrms-stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._root = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}")
+                if frame is self._root:
+                    break
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+
+# -------------------------------
+# Storage
+# -------------------------------
+
+class ProfileStore:
+    """
+    Per-view results under PROFILING_DIR/<view name>/, one set of files per
+    process so concurrent workers never write the same file:
+
+        <pid>.prof     merged cProfile stats (pstats format)
+        <pid>.folded   collapsed stacks with sample counts
+        <pid>.meta     "<requests> <seconds> <view name>" for the sampled requests
+
+    Readers merge all pids.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or profiling_dir())
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._stacks = {}
+        self._meta = {}
+
+    def add(self, view_name, run, seconds):
+        folder = self.directory / _safe_name(view_name)
+        pid = os.getpid()
+        with self._lock:
+            folder.mkdir(parents=True, exist_ok=True)
+            requests, total = self._meta.get(view_name, (0, 0.0))
+            self._meta[view_name] = (requests + 1, total + seconds)
+            if isinstance(run, CProfileRun):
+                stats = self._stats.get(view_name)
+                if stats is None:
+                    stats = self._stats[view_name] = pstats.Stats(run.profile)
+                else:
+                    stats.add(run.profile)
+                self._write(folder / f"{pid}.prof", stats.dump_stats)
+            else:
+                stacks = self._stacks.setdefault(view_name, Counter())
+                stacks.update(run.stacks)
+                self._write_text(folder / f"{pid}.folded", ''.join(f"{stack} {count}\n" for stack, count in stacks.items()))
+            requests, total = self._meta[view_name]
+            self._write_text(folder / f"{pid}.meta", f"{requests} {total:.6f} {view_name}\n")
+
+    @staticmethod
+    def _write(path, dump):
+        # Write then rename, so readers never see half a file
+        handle, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        os.close(handle)
+        dump(temp)
+        os.replace(temp, path)
+
+    def _write_text(self, path, text):
+        self._write(path, lambda temp: Path(temp).write_text(text))
+
+
+# -------------------------------
+# Middleware
+# -------------------------------
+
+class ProfilingMiddleware:
+    """
+    Profile a random PROFILING_SAMPLE_RATE fraction of requests and
+    aggregate the results per URL name into PROFILING_DIR.
+    PROFILING_MODE is 'cprofile' (exact call counts and cumulative times)
+    or 'sampler' (a stack sample every PROFILING_INTERVAL seconds, lower
+    overhead, real call stacks for flame graphs).
+
+    With PROFILING_ENABLED off the middleware removes itself from the
+    stack at startup, so it costs nothing per request.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.01)
+        self.mode = getattr(settings, 'PROFILING_MODE', 'cprofile')
+        self.interval = getattr(settings, 'PROFILING_INTERVAL', 0.005)
+        if self.mode not in MODES:
+            raise ValueError(f"PROFILING_MODE must be one of {MODES}, not {self.mode!r}")
+        self.store = ProfileStore()
+
+    def __call__(self, request):
+        if random.random() >= self.rate:
+            return self.get_response(request)
+
+        run = CProfileRun() if self.mode == 'cprofile' else StackSampler(self.interval)
+        started = time.perf_counter()
+        with run:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        if run.active and match and match.view_name:
+            try:
+                self.store.add(match.view_name, run, elapsed)
+            except OSError:
+                logger.exception("Could not write the profile for %s", match.view_name)
+        return response
+
+
+# -------------------------------
+# Reports
+# -------------------------------
+
+def _function_label(key):
+    filename, line, name = key
+    if filename == '~':
+        return name
+    if filename.startswith(str(settings.BASE_DIR)):
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[-1]
+    return f"{name} ({filename}:{line})"
+
+
+def view_report(folder, limit=25):
+    """
+    Merge every process's files for one view. Returns a dict with the
+    sampled request count and total seconds, and `functions`: the top
+    `limit` functions by cumulative time, each with cumulative and own
+    milliseconds per request and calls per request (None for samples).
+    """
+    folder = Path(folder)
+    view, requests, seconds = folder.name, 0, 0.0
+    for meta in folder.glob('*.meta'):
+        count, total, view = meta.read_text().split(maxsplit=2)
+        requests += int(count)
+        seconds += float(total)
+    report = {
+        'view': view.strip(), 'key': folder.name, 'requests': requests, 'seconds': seconds,
+        'functions': [], 'folded': False,
+    }
+    if not requests:
+        return report
+
+    profiles = [str(path) for path in folder.glob('*.prof')]
+    if profiles:
+        stats = pstats.Stats(*profiles)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        report['functions'] = [
+            {
+                'name': _function_label(key),
+                'cumulative_ms': cumulative * 1000 / requests,
+                'own_ms': own * 1000 / requests,
+                'calls': calls / requests,
+            }
+            for key, (_, calls, own, cumulative, _) in rows
+        ]
+        return report
+
+    inclusive, own, total = Counter(), Counter(), 0
+    for path in folder.glob('*.folded'):
+        report['folded'] = True
+        for line in path.read_text().splitlines():
+            stack, _, count = line.rpartition(' ')
+            frames = stack.split(';')
+            count = int(count)
+            total += count
+            own[frames[-1]] += count
+            # Recursion counts a function once per sample
+            for name in set(frames):
+                inclusive[name] += count
+    if total:
+        per_sample = seconds * 1000 / total / requests
+        report['functions'] = [
+            {'name': name, 'cumulative_ms': count * per_sample, 'own_ms': own[name] * per_sample, 'calls': None}
+            for name, count in inclusive.most_common(limit)
+        ]
+    return report
+
+
+def all_reports(limit=25):
+    directory = profiling_dir()
+    if not directory.is_dir():
+        return []
+    reports = [view_report(folder, limit) for folder in sorted(directory.iterdir()) if folder.is_dir()]
+    return sorted(reports, key=lambda report: report['seconds'], reverse=True)
+
+
+def profiles_view(request):
+    """Admin page: top cumulative functions per profiled view; download stacks or clear a view"""
+    from django.http import Http404, HttpResponse
+    from django.shortcuts import redirect, render
+
+    directory = profiling_dir()
+    view = request.GET.get('folded') or request.POST.get('clear')
+    folder = directory / _safe_name(view) if view else None
+    if folder is not None and not folder.is_dir():
+        raise Http404('No profiles for this view')
+
+    if request.method == 'POST' and folder is not None:
+        shutil.rmtree(folder)
+        return redirect(request.path)
+    if folder is not None:
+        # Each pid's counts are complete lines; flamegraph.pl and speedscope sum duplicates
+        body = ''.join(path.read_text() for path in sorted(folder.glob('*.folded')))
+        response = HttpResponse(body, content_type='text/plain')
+        response['Content-Disposition'] = f'attachment; filename="{folder.name}.folded"'
+        return response
+
+    from django.contrib import admin
+    limit = int(request.GET.get('limit', 25))
+    return render(request, 'admin/profiles.html', {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'reports': all_reports(limit),
+        'enabled': getattr(settings, 'PROFILING_ENABLED', False),
+        'mode': getattr(settings, 'PROFILING_MODE', 'cprofile'),
+        'rate': getattr(settings, 'PROFILING_SAMPLE_RATE', 0.01),
+        'directory': directory,
+    })
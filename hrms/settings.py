@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'hrms.metrics.MetricsMiddleware',
+    'hrms.middleware.QueryBudgetMiddleware',
+    'hrms.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,19 +65,48 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],  
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates stay in memory whatever DEBUG is; runserver's
+            # autoreloader clears them when a template file changes.
+            # `manage.py bench_templates` measures the difference per page.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Optional Jinja2 engine for the heaviest pages (needs `pip install jinja2`).
+# It is tried first, so a page ported to jinja2/<same name> (for example
+# jinja2/leave/leave_dashboard.html) is rendered by Jinja2 and every other
+# page keeps its Django template. Globals and filters: hrms/jinja2.py.
+JINJA2_DIR = BASE_DIR / 'jinja2'
+if find_spec('jinja2') is not None and JINJA2_DIR.is_dir():
+    TEMPLATES.insert(0, {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [JINJA2_DIR],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'hrms.jinja2.environment',
+            'context_processors': TEMPLATES[0]['OPTIONS']['context_processors'],
+        },
+    })
+
 WSGI_APPLICATION = 'hrms.wsgi.application'
 
+# hrms/asgi.py sets HRMS_ASYNC_VIEWS=1: under an ASGI server the JSON
+# endpoints the dashboards poll are served by async views
+# (leave/async_views.py). `manage.py bench_asgi` compares the two paths.
+ASYNC_VIEWS = os.environ.get('HRMS_ASYNC_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -128,6 +163,20 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# `manage.py collectstatic` builds STATIC_ROOT with content-hashed names and
+# .gz/.br copies (hrms.staticfiles); with DEBUG off {% static %} links the
+# hashed names, which are served with Cache-Control: immutable.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'hrms.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -138,4 +187,132 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 LOGIN_URL = '/login/'  # or wherever your login page is
-LOGIN_REDIRECT_URL = '/dashboard/'  # or your main dashboard
\ No newline at end of file
+LOGIN_REDIRECT_URL = '/dashboard/'  # or your main dashboard
+
+
+# Caches (hrms.cache); get()/get_many() hits and misses feed hrms_cache_* metrics.
+# HRMS_CACHE_BACKEND picks the default cache: 'locmem' (per process), 'file'
+# (shared by the workers of one host, under HRMS_CACHE_DIR) or 'redis'
+# (HRMS_CACHE_LOCATION, e.g. redis://127.0.0.1:6379/1). Template fragments go
+# to the 'fragments' cache, which is always shared by every worker so that a
+# version bump in one process reaches the others.
+CACHE_BACKEND = os.environ.get('HRMS_CACHE_BACKEND', 'locmem')
+CACHE_DIR = Path(os.environ.get('HRMS_CACHE_DIR') or BASE_DIR / 'cache')
+
+if CACHE_BACKEND == 'redis':
+    _redis_location = os.environ.get('HRMS_CACHE_LOCATION', 'redis://127.0.0.1:6379/1')
+    CACHES = {
+        'default': {
+            'BACKEND': 'hrms.cache.RedisCache',
+            'LOCATION': _redis_location,
+            'METRICS_LABEL': 'default',
+        },
+        'fragments': {
+            'BACKEND': 'hrms.cache.RedisCache',
+            'LOCATION': _redis_location,
+            'KEY_PREFIX': 'fragments',
+            'METRICS_LABEL': 'fragments',
+        },
+    }
+elif CACHE_BACKEND in ('locmem', 'file'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'hrms.cache.LocMemCache',
+            'LOCATION': 'hrms-default',
+        },
+        'fragments': {
+            'BACKEND': 'hrms.cache.FileBasedCache',
+            'LOCATION': str(CACHE_DIR / 'fragments'),
+            'METRICS_LABEL': 'fragments',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+    if CACHE_BACKEND == 'file':
+        CACHES['default'] = {
+            'BACKEND': 'hrms.cache.FileBasedCache',
+            'LOCATION': str(CACHE_DIR / 'default'),
+            'METRICS_LABEL': 'default',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+else:
+    raise ImproperlyConfigured(f"HRMS_CACHE_BACKEND must be locmem, file or redis, not {CACHE_BACKEND!r}")
+
+# Prometheus-style metrics at /metrics (hrms.metrics). Every process writes
+# its snapshot to METRICS_DIR at most every METRICS_FLUSH_INTERVAL seconds;
+# the endpoint merges them. Set HRMS_METRICS_TOKEN to require a bearer token.
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.environ.get('HRMS_METRICS_TOKEN') or None
+
+# Sampled request profiling (hrms.profiling.ProfilingMiddleware), off unless
+# HRMS_PROFILING=1. 'cprofile' records exact cumulative times; 'sampler'
+# records stacks every PROFILING_INTERVAL seconds as flamegraph input.
+# Results are aggregated per URL name under PROFILING_DIR and listed at
+# /admin/profiles/.
+PROFILING_ENABLED = os.environ.get('HRMS_PROFILING') == '1'
+PROFILING_MODE = os.environ.get('HRMS_PROFILING_MODE', 'cprofile')
+PROFILING_SAMPLE_RATE = float(os.environ.get('HRMS_PROFILING_RATE', '0.01'))
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = BASE_DIR / 'profiles'
+
+
+# Per-request SQL budgets, checked by hrms.middleware.QueryBudgetMiddleware
+# (logs a warning on 'hrms.queries') and by `manage.py check_query_budgets`
+# in CI. Keyed by URL name; counts include the session lookup. Views not
+# listed fall back to QUERY_BUDGET_DEFAULT (None = not checked).
+QUERY_BUDGET_DEFAULT = None
+QUERY_BUDGETS = {
+    # hr
+    'home': 2,
+    'login': 4,
+    'logout': 2,
+    'change_password': 6,
+    'access_denied': 2,
+    'dashboard': 8,
+    'employee_dashboard': 4,
+    'employee_page': 8,
+    'add_employee': 15,
+    'employee_detail': 12,
+    'edit_employee': 20,
+    'delete_document': 6,
+    'update_employee_profile': 8,
+    'all_employee': 4,
+    'active_employee': 4,
+    'admin_list': 4,
+    'admin_create': 6,
+    'admin_update': 6,
+    'admin_delete': 6,
+    # leave
+    'leave_dashboard': 15,
+    'leave_list': 8,
+    'apply_leave': 25,
+    'approve_leave': 25,
+    'manage_regions': 10,
+    'leave_stats_api': 3,
+    'absence_heatmap_api': 6,
+    'calendar_events': 4,
+    'region_holidays_api': 3,
+    'add_holiday': 8,
+    'add_custom_event': 8,
+    'employee_leave_details': 8,
+    'view_leave_detail': 6,
+    'edit_leave_details': 12,
+    'leave_balance_list': 6,
+    'add_leave_balance': 12,
+    'employee_search_api': 3,
+    # attendance
+    'attendance:dashboard': 10,
+    'attendance:punch_api': 6,
+    'attendance:all_attendance': 8,
+    'attendance:report': 8,
+    'attendance:import_punches': 50,
+    # Includes rebuilding today's rollup, which one request pays every ATTENDANCE_ROLLUP_MAX_AGE
+    'attendance:trend_api': 12,
+    'attendance:muster_api': 8,
+    'attendance:download_report': 8,
+    'attendance:download_admin_report': 8,
+    'attendance:export': 5,
+    'attendance:report_job': 4,
+    'attendance:report_job_api': 4,
+    'attendance:report_job_download': 4,
+}
@@ -0,0 +1,139 @@
+"""
+Static asset pipeline: manifest-hashed names, precompressed at collectstatic
+time, served with far-future immutable caching.
+
+    python manage.py collectstatic --noinput
+
+writes STATIC_ROOT/css/app.<hash>.css plus app.<hash>.css.gz (and .br when
+the brotli package is installed). {% static %} points at the hashed names
+whenever DEBUG is off, so a changed file gets a new URL and browsers can
+keep every URL forever.
+"""
+import gzip
+import mimetypes
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip variants only
+    brotli = None
+
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.html', '.ico', '.ttf', '.otf', '.eot'}
+# Smaller files gain nothing once headers are counted
+MIN_SIZE = 256
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Unhashed names can change in place, so they are revalidated on every use
+REVALIDATE = 'no-cache'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _gzip(data):
+    # mtime=0 keeps the output identical between builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also writes .gz/.br copies of the hashed text files"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                self.compress(name)
+
+    def compress(self, name):
+        """Write the precompressed variants of `name`; skipped when they would not be smaller"""
+        source = Path(self.path(name))
+        data = source.read_bytes()
+        if len(data) < MIN_SIZE:
+            return
+        compressors = [('.gz', _gzip)]
+        if brotli is not None:
+            compressors.append(('.br', _brotli))
+        for suffix, compress in compressors:
+            target = source.with_name(source.name + suffix)
+            if target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+                continue
+            compressed = compress(data)
+            if len(compressed) < len(data) * 0.95:
+                target.write_bytes(compressed)
+            elif target.exists():
+                target.unlink()
+
+
+@lru_cache(maxsize=1)
+def hashed_names():
+    """Every hashed file name in the manifest (loaded once per process, like the storage's)"""
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def accepted_encodings(header):
+    """Codings named in an Accept-Encoding header, minus those refused with q=0 (or an unreadable q)"""
+    accepted = set()
+    for token in header.split(','):
+        coding, *params = (part.strip() for part in token.split(';'))
+        quality = next((value for name, _, value in (param.partition('=') for param in params)
+                        if name.strip().lower() == 'q'), '1')
+        try:
+            if float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.lower())
+    return accepted
+
+
+def serve(request, path):
+    """
+    Serve a file from STATIC_ROOT for deployments without a web server in
+    front of Django: the .br or .gz variant when the client accepts it,
+    Cache-Control immutable for manifest-hashed names.
+    """
+    if not settings.STATIC_ROOT:
+        raise Http404('STATIC_ROOT is not set')
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+    if not fullpath.is_file():
+        raise Http404(f'"{path}" does not exist')
+
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    served, encoding = fullpath, None
+    for candidate_encoding, suffix in ENCODINGS:
+        candidate = fullpath.with_name(fullpath.name + suffix)
+        if candidate_encoding in accepted and candidate.is_file():
+            served, encoding = candidate, candidate_encoding
+            break
+
+    stat = served.stat()
+    cache_control = IMMUTABLE if path in hashed_names() else REVALIDATE
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(fullpath.name)
+        response = FileResponse(served.open('rb'), content_type=content_type or 'application/octet-stream')
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Cache-Control'] = cache_control
+    if fullpath.suffix.lower() in COMPRESSIBLE:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,157 @@
+"""Render-time benchmark of the heavy page templates, per template engine."""
+import statistics
+import time
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, engines
+from django.template.backends.django import DjangoTemplates
+from django.test.signals import template_rendered
+from django.test.utils import override_settings
+
+from .bench import BenchContext, BenchError, _check, _reverse, percentile
+from .middleware import QueryRecorder
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+DJANGO_BACKEND = 'django.template.backends.django.DjangoTemplates'
+
+# Template -> (BenchContext client, URL name, whether the URL takes the
+# member's employee_id). The view is requested once to capture the exact
+# context it renders the template with.
+PAGES = {
+    'leave/leave_dashboard.html': ('admin', 'leave_dashboard', False),
+    'leave/emp_leave_details.html': ('member', 'employee_leave_details', False),
+    'leave/apply_leave.html': ('member', 'apply_leave', False),
+    'leave/leave_balance_summary.html': ('admin', 'leave_balance_list', False),
+    'hr/employee_detail.html': ('admin', 'employee_detail', True),
+    'hr/edit_employee.html': ('admin', 'edit_employee', True),
+    'hr/add_employee.html': ('admin', 'add_employee', False),
+    'hr/dashboard.html': ('admin', 'dashboard', False),
+    'hr/employee_dashboard.html': ('member', 'employee_dashboard', False),
+    'attendance/report.html': ('admin', 'attendance:report', False),
+}
+
+# Template fragments are cached in production; without them every render
+# does the full work, which is what this benchmark compares
+NO_FRAGMENT_CACHE = {
+    'default': {'BACKEND': 'hrms.cache.LocMemCache', 'LOCATION': 'template-bench'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def compared_engines():
+    """
+    {label: engine}: the configured Django engine ('cached'), the same
+    engine with the cached loader unwrapped ('uncached': every render
+    reads and compiles the template and its parents again), and the
+    Jinja2 engine when one is configured.
+    """
+    result = {}
+    for alias in engines:
+        engine = engines[alias]
+        if isinstance(engine, DjangoTemplates):
+            params = dict(engines.templates[alias])
+            params.pop('BACKEND')
+            options = dict(params.pop('OPTIONS'))
+            loaders = []
+            for loader in options.get('loaders') or engine.engine.loaders:
+                if isinstance(loader, (list, tuple)) and loader[0] == CACHED_LOADER:
+                    loaders.extend(loader[1])
+                else:
+                    loaders.append(loader)
+            options['loaders'] = loaders
+            result['uncached'] = DjangoTemplates({**params, 'NAME': 'uncached', 'APP_DIRS': False, 'OPTIONS': options})
+            result['cached'] = engine
+        else:
+            result[alias] = engine
+    return result
+
+
+def capture(ctx, template_name):
+    """Request the page once; returns (flattened context, request) it rendered the template with"""
+    role, url_name, with_employee = PAGES[template_name]
+    url = _reverse(url_name, employee_id=ctx.employee.id) if with_employee else _reverse(url_name)
+    captured = []
+
+    def receiver(sender, template, context, **kwargs):
+        if template.name == template_name and not captured:
+            captured.append(context.flatten())
+
+    # Only Django templates send template_rendered, so a page ported to
+    # Jinja2 is captured from its Django template
+    django_only = [config for config in settings.TEMPLATES if config['BACKEND'] == DJANGO_BACKEND]
+    template_rendered.connect(receiver)
+    try:
+        with override_settings(TEMPLATES=django_only):
+            response = _check(getattr(ctx, role).get(url))
+    finally:
+        template_rendered.disconnect(receiver)
+    if not captured:
+        raise BenchError(f"{url} did not render {template_name}")
+    return captured[0], response.wsgi_request
+
+
+def measure_render(engine, template_name, context, request, iterations, warmup):
+    """get_template() + render() timings in ms, and the queries the template itself runs"""
+    try:
+        engine.get_template(template_name)
+    except TemplateDoesNotExist:
+        return None
+    timings = []
+    queries = 0
+    for index in range(warmup + iterations):
+        recorder = QueryRecorder()
+        with recorder.record():
+            started = time.perf_counter()
+            engine.get_template(template_name).render(context, request)
+            elapsed = time.perf_counter() - started
+        if index >= warmup:
+            timings.append(elapsed * 1000)
+            queries = max(queries, recorder.count)
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': queries,
+    }
+
+
+def run(templates=None, iterations=50, warmup=3, fragments=False, progress=None):
+    """
+    Benchmark each template with every compared engine; returns
+    {template: {engine label: result}} (or {'error': ...}).
+    """
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    templates = templates or list(PAGES)
+    results = {}
+    with override_settings(**({} if fragments else {'CACHES': NO_FRAGMENT_CACHE})):
+        # The test environment instruments rendering, which capture() relies
+        # on; it is torn down again before timing so it adds no overhead
+        setup_test_environment()
+        captured = {}
+        try:
+            ctx = BenchContext()
+            try:
+                for name in templates:
+                    try:
+                        captured[name] = capture(ctx, name)
+                    except BenchError as exc:
+                        results[name] = {'error': str(exc)}
+            finally:
+                ctx.close()
+        finally:
+            teardown_test_environment()
+
+        compared = compared_engines()
+        for name in templates:
+            if name in captured:
+                context, request = captured[name]
+                result = {}
+                for label, engine in compared.items():
+                    measured = measure_render(engine, name, context, request, iterations, warmup)
+                    if measured is not None:
+                        result[label] = measured
+                results[name] = result
+            if progress:
+                progress(name, results[name])
+    return results
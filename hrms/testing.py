@@ -0,0 +1,137 @@
+"""Query budget assertions and fixtures for unittest and pytest test suites."""
+from contextlib import contextmanager
+from datetime import date
+
+from .middleware import QueryRecorder, query_budget
+
+
+def _failure(label, recorder, limit):
+    lines = [f"{label}: {recorder.summary()}, limit {limit}"]
+    lines += [f"  {count}x {sql}" for count, sql in recorder.most_repeated(5)]
+    return '\n'.join(lines)
+
+
+@contextmanager
+def assert_max_queries(limit, label='block'):
+    """
+    Fail if the block runs more than `limit` queries on any connection.
+
+        with assert_max_queries(5):
+            client.get(url)
+    """
+    recorder = QueryRecorder(capture_params=True)
+    with recorder.record():
+        yield recorder
+    if recorder.count > limit:
+        raise AssertionError(_failure(label, recorder, limit))
+
+
+def assert_within_budget(response, budget=None):
+    """
+    Fail if a test-client response ran more queries than its view's
+    committed budget (settings.QUERY_BUDGETS), or than `budget` if given.
+    Needs QueryBudgetMiddleware, which attaches the counts to the response.
+    """
+    recorder = getattr(response, 'query_stats', None)
+    if recorder is None:
+        raise AssertionError('No query_stats on the response; is hrms.middleware.QueryBudgetMiddleware installed?')
+    view_name = response.resolver_match.view_name if getattr(response, 'resolver_match', None) else None
+    if budget is None:
+        budget = query_budget(view_name)
+        if budget is None:
+            raise AssertionError(f"No query budget configured for {view_name}")
+    if recorder.count > budget:
+        raise AssertionError(_failure(view_name or 'response', recorder, budget))
+    return recorder
+
+
+# No caching between requests, so a test sees the queries of a cold page
+# rather than of fragments cached by the request before it
+UNCACHED = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class QueryBudgetMixin:
+    """unittest.TestCase mixin exposing the helpers as assertion methods"""
+
+    def assertMaxQueries(self, limit, label='block'):
+        return assert_max_queries(limit, label)
+
+    def assertWithinBudget(self, response, budget=None):
+        return assert_within_budget(response, budget)
+
+
+# -------------------------------
+# Walking the project's views
+# -------------------------------
+
+BUDGETED_APPS = ('hr', 'leave', 'attendance')
+
+
+def iter_app_views(apps=BUDGETED_APPS):
+    """
+    Yield (view_name, route, converters) for every named URL whose view
+    lives in one of `apps`. converters maps path kwargs to converter
+    names, e.g. {'employee_id': 'int'}.
+    """
+    from django.urls import URLPattern, URLResolver, get_resolver
+
+    def walk(patterns, prefix, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                child_namespace = pattern.namespace or namespace
+                yield from walk(pattern.url_patterns, prefix + str(pattern.pattern), child_namespace)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                module = getattr(pattern.callback, '__module__', '')
+                if module.split('.')[0] not in apps:
+                    continue
+                converters = {
+                    name: type(converter).__name__.replace('Converter', '').lower()
+                    for name, converter in getattr(pattern.pattern, 'converters', {}).items()
+                }
+                view_name = f"{namespace}:{pattern.name}" if namespace else pattern.name
+                yield view_name, prefix + str(pattern.pattern), converters
+
+    yield from walk(get_resolver().url_patterns, '/', None)
+
+
+def session_client(role='SUPER_ADMIN', employee=None, **client_kwargs):
+    """Django test Client carrying the session keys hr.views.login_view sets"""
+    from django.test import Client
+
+    client = Client(**client_kwargs)
+    session = client.session
+    session.update({
+        'user_authenticated': True,
+        'user_role': role,
+        'user_email': employee.email if employee else '',
+        'user_department': employee.department if employee else None,
+        'user_id': employee.id if employee else None,
+        'user_name': f"{employee.first_name} {employee.last_name}" if employee else role,
+    })
+    session.save()
+    return client
+
+
+def create_employee(employee_id='E001', **fields):
+    """Save an active Employee with every required field filled in; `fields` override the defaults"""
+    from hr.models import Employee
+
+    values = {
+        'employee_id': employee_id,
+        'first_name': 'Test',
+        'last_name': employee_id,
+        'email': f"{employee_id.lower()}@example.com",
+        'phone': '9999999999',
+        'department': 'Engineering',
+        'designation': 'Engineer',
+        'role': 'Employee',
+        'date_of_joining': date(2020, 1, 1),
+        'reporting_manager': 'Manager',
+        'status': 'active',
+        'location': 'Kolkata',
+    }
+    values.update(fields)
+    return Employee.objects.create(**values)
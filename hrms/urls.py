@@ -14,23 +14,31 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from hrms.metrics import metrics_view
+from hrms.profiling import profiles_view
+from hrms.staticfiles import serve as serve_static
 # urlpatterns = [
 #     path('admin/', admin.site.urls),
 #     path('', include('hr.urls')),
 # ]
 
 urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
+    path('admin/profiles/', admin.site.admin_view(profiles_view), name='admin_profiles'),
     path('admin/', admin.site.urls),
     path('', include('hr.urls')),
     path('leave/', include('leave.urls')), 
     path('attendance/', include('attendance.urls')),
+    # Collected assets; runserver serves them from the app directories itself while DEBUG is on
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static, name='static'),
 ]
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
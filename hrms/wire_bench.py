@@ -0,0 +1,90 @@
+"""Bytes on the wire and latency of the @compressed views, per request mode."""
+import statistics
+import time
+
+from .bench import BenchContext, BenchError, _check, _reverse, percentile
+
+# Endpoint -> (BenchContext client, URL name, whether the URL takes the
+# member's employee_id, query string)
+ENDPOINTS = {
+    'leave_dashboard': ('admin', 'leave_dashboard', False, {}),
+    'employee_leave_details': ('member', 'employee_leave_details', False, {}),
+    'calendar_events': ('admin', 'calendar_events', False, {}),
+    'leave_stats_api': ('admin', 'leave_stats_api', False, {}),
+    'absence_heatmap_api': ('admin', 'absence_heatmap_api', False, {}),
+    'attendance_trend_api': ('admin', 'attendance:trend_api', False, {}),
+    'dashboard': ('admin', 'dashboard', False, {}),
+    'employee_detail': ('admin', 'employee_detail', True, {}),
+}
+
+# identity: what every response cost before compression and ETags;
+# gzip: a browser's first load; revalidate: a reload or poll with the
+# ETag of the previous response
+MODES = ('identity', 'gzip', 'revalidate')
+ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+def wire_bytes(response):
+    """Header block plus body as sent; Set-Cookie headers are left out"""
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    return len(response.serialize_headers()) + len(b'\r\n\r\n') + len(body), len(body)
+
+
+def measure(client, path, query, headers, iterations, warmup):
+    timings = []
+    for index in range(warmup + iterations):
+        started = time.perf_counter()
+        response = client.get(path, query, headers=headers)
+        elapsed = time.perf_counter() - started
+        _check(response, expect=(200, 304))
+        if index >= warmup:
+            timings.append(elapsed * 1000)
+    total, body = wire_bytes(response)
+    return {
+        'status': response.status_code,
+        'wire_bytes': total,
+        'body_bytes': body,
+        'encoding': response.get('Content-Encoding', 'identity'),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'mean_ms': round(statistics.mean(timings), 2),
+    }, response
+
+
+def measure_endpoint(ctx, name, iterations, warmup):
+    role, url_name, with_employee, query = ENDPOINTS[name]
+    client = getattr(ctx, role)
+    path = _reverse(url_name, employee_id=ctx.employee.id) if with_employee else _reverse(url_name)
+
+    result = {}
+    result['identity'], _ = measure(client, path, query, {}, iterations, warmup)
+    result['gzip'], response = measure(client, path, query, {'accept-encoding': ACCEPT_ENCODING}, iterations, warmup)
+    etag = response.get('ETag')
+    if etag:
+        headers = {'accept-encoding': ACCEPT_ENCODING, 'if-none-match': etag}
+        result['revalidate'], _ = measure(client, path, query, headers, iterations, warmup)
+    return result
+
+
+def run(names=None, iterations=20, warmup=2, progress=None):
+    """{endpoint: {mode: result}} for the named endpoints (all by default)"""
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    results = {}
+    # Lets the test Client through ALLOWED_HOSTS
+    setup_test_environment()
+    try:
+        ctx = BenchContext()
+        try:
+            for name in names or list(ENDPOINTS):
+                try:
+                    results[name] = measure_endpoint(ctx, name, iterations, warmup)
+                except BenchError as exc:
+                    results[name] = {'error': str(exc)}
+                if progress:
+                    progress(name, results[name])
+        finally:
+            ctx.close()
+    finally:
+        teardown_test_environment()
+    return results
@@ -1,6 +1,6 @@
 # leave/admin.py
 from django.contrib import admin
-from .models import Leave, LeaveType, Region, Holiday
+from .models import Leave, LeaveType, Region, Holiday, LeaveTransaction
 from hr.models import Employee
 
 @admin.register(LeaveType)
@@ -75,4 +75,19 @@ class HolidayAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('region')
\ No newline at end of file
+        return qs.select_related('region')
+
+@admin.register(LeaveTransaction)
+class LeaveTransactionAdmin(admin.ModelAdmin):
+    list_display = ['employee', 'leave_type', 'year', 'kind', 'total_delta', 'taken_delta', 'remaining_delta', 'carry_forward_delta', 'created_at']
+    list_filter = ['kind', 'year', 'leave_type']
+    search_fields = ['employee__first_name', 'employee__last_name', 'employee__employee_id', 'note']
+    ordering = ['-created_at']
+    list_select_related = ['employee', 'leave_type']
+    
+    # The ledger is append-only
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,64 @@
+# leave/async_views.py
+"""
+Async versions of the read-only JSON endpoints the dashboards poll. Under
+ASGI (settings.ASYNC_VIEWS, set by hrms/asgi.py) leave/urls.py routes the
+same URLs here, so a request waiting on the database holds no worker
+thread; under WSGI the sync views in views.py are used.
+
+Django runs one request's async ORM calls one after another on that
+request's database thread, so the queries are awaited in turn: nothing
+here runs them concurrently. The dashboard stats are a single query
+(hrms.db.count_many) and stay a sync view.
+"""
+from datetime import timedelta
+
+from django.http import JsonResponse
+from django.utils import timezone
+
+from hrms.compression import compressed
+from .models import Holiday, Leave
+
+
+async def _holiday_events():
+    return [
+        {
+            "title": f"Holiday: {name}",
+            "start": day.strftime("%Y-%m-%d"),
+            "allDay": True,
+            "color": "#f87171",
+        }
+        async for name, day in Holiday.objects.values_list('name', 'date')
+    ]
+
+
+async def _leave_events():
+    leaves = Leave.objects.filter(status="approved").values_list(
+        'employee__first_name', 'employee__last_name', 'start_date', 'end_date'
+    )
+    return [
+        {
+            "title": f"Leave: {first_name} {last_name}",
+            "start": start.strftime("%Y-%m-%d"),
+            "end": (end + timedelta(days=1)).strftime("%Y-%m-%d"),
+            "allDay": True,
+            "color": "#60a5fa",
+        }
+        async for first_name, last_name, start, end in leaves
+    ]
+
+
+@compressed
+async def calendar_events(request):
+    """Return holidays and approved leaves as JSON for FullCalendar"""
+    return JsonResponse(await _holiday_events() + await _leave_events(), safe=False)
+
+
+@compressed
+async def get_region_holidays_api(request, region_id):
+    """API to fetch holidays for a specific region"""
+    holidays = Holiday.objects.filter(
+        region_id=region_id,
+        date__year=timezone.now().year
+    ).values('id', 'name', 'date', 'is_optional')
+
+    return JsonResponse([holiday async for holiday in holidays], safe=False)
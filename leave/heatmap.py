@@ -0,0 +1,184 @@
+# leave/heatmap.py
+"""Team absence heatmap: people off per day, grouped by department or manager."""
+import hashlib
+from calendar import monthrange
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.core.cache import cache
+
+from hr.models import Employee
+from hrms.cache import SharedVersion
+from .models import Holiday, Leave
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the pure Python sweep is used instead
+    np = None
+
+CACHE_TIMEOUT = 15 * 60
+GROUP_BY_CHOICES = ('department', 'manager')
+LEAVE_STATUSES = ('approved', 'pending', 'new')
+
+
+_version = SharedVersion('absence_heatmap')
+
+
+def heatmap_version():
+    return _version.get()
+
+
+def invalidate_heatmaps():
+    """Called from Leave/Holiday signals; old cache entries simply expire"""
+    _version.bump()
+
+
+def month_window(year, month):
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def _sweep(group_index, starts, ends, n_groups, n_days):
+    """
+    Difference-array sweep: +1 at each interval start, -1 after its end,
+    then a cumulative sum along the day axis gives the count per day.
+    Returns a list of per-group lists.
+    """
+    if np is not None:
+        diff = np.zeros((n_groups, n_days + 1), dtype=np.int32)
+        if len(starts):
+            groups = np.asarray(group_index, dtype=np.intp)
+            np.add.at(diff, (groups, np.asarray(starts, dtype=np.intp)), 1)
+            np.add.at(diff, (groups, np.asarray(ends, dtype=np.intp) + 1), -1)
+        return np.cumsum(diff[:, :n_days], axis=1).tolist()
+
+    diff = [[0] * (n_days + 1) for _ in range(n_groups)]
+    for group, start, end in zip(group_index, starts, ends):
+        diff[group][start] += 1
+        diff[group][end + 1] -= 1
+    return [list(accumulate(row[:n_days])) for row in diff]
+
+
+def build_absence_heatmap(start, end, group_by='department', department=None, manager_code=None):
+    """
+    Count and list the people off on each day between start and end
+    (inclusive), split into groups. Pending/new leaves are reported
+    separately from approved ones; region holidays and weekends are flagged
+    per day so a 0 on a holiday is not read as full attendance.
+    """
+    n_days = (end - start).days + 1
+    days = [start + timedelta(days=offset) for offset in range(n_days)]
+
+    employees = Employee.objects.filter(status='active')
+    if department:
+        employees = employees.filter(department=department)
+    if manager_code:
+        employees = employees.filter(reporting_manager_id=manager_code)
+
+    group_field = 'department' if group_by == 'department' else 'reporting_manager_id'
+    people = {}
+    group_keys = {}
+    group_labels = {}
+    headcount = {}
+    group_locations = {}
+    for emp_id, first_name, last_name, group_value, manager_name, location in employees.values_list(
+        'id', 'first_name', 'last_name', group_field, 'reporting_manager', 'location'
+    ).iterator(chunk_size=5000):
+        key = group_value or ''
+        if key not in group_keys:
+            group_keys[key] = len(group_keys)
+            if group_by == 'manager':
+                group_labels[key] = manager_name or 'No manager'
+            else:
+                group_labels[key] = key or 'No department'
+        group = group_keys[key]
+        people[emp_id] = (group, f"{first_name} {last_name}")
+        headcount[group] = headcount.get(group, 0) + 1
+        if location:
+            group_locations.setdefault(location.lower(), set()).add(group)
+
+    n_groups = len(group_keys)
+    leaves = Leave.objects.filter(
+        status__in=LEAVE_STATUSES,
+        start_date__lte=end,
+        end_date__gte=start,
+        employee__status='active',
+    )
+    if department:
+        leaves = leaves.filter(employee__department=department)
+    if manager_code:
+        leaves = leaves.filter(employee__reporting_manager_id=manager_code)
+
+    intervals = {'approved': ([], [], []), 'pending': ([], [], [])}
+    names_by_day = [[[] for _ in range(n_days)] for _ in range(n_groups)]
+    for employee_id, leave_start, leave_end, status, leave_type in leaves.values_list(
+        'employee_id', 'start_date', 'end_date', 'status', 'leave_type__name'
+    ).iterator(chunk_size=5000):
+        if employee_id not in people:
+            continue
+        group, name = people[employee_id]
+        first = (max(leave_start, start) - start).days
+        last = (min(leave_end, end) - start).days
+        bucket = 'approved' if status == 'approved' else 'pending'
+        group_index, starts, ends = intervals[bucket]
+        group_index.append(group)
+        starts.append(first)
+        ends.append(last)
+
+        entry = {'name': name, 'status': bucket, 'leave_type': leave_type}
+        group_days = names_by_day[group]
+        for offset in range(first, last + 1):
+            group_days[offset].append(entry)
+
+    approved = _sweep(*intervals['approved'], n_groups, n_days)
+    pending = _sweep(*intervals['pending'], n_groups, n_days)
+
+    holidays_by_group = [[[] for _ in range(n_days)] for _ in range(n_groups)]
+    if group_locations:
+        holidays = Holiday.objects.filter(date__range=(start, end)).values_list(
+            'date', 'name', 'region__name', 'region__code'
+        )
+        for holiday_date, name, region_name, region_code in holidays:
+            groups = group_locations.get(region_name.lower(), set()) | group_locations.get(region_code.lower(), set())
+            for group in groups:
+                holidays_by_group[group][(holiday_date - start).days].append(f"{name} ({region_name})")
+
+    weekends = [day.weekday() >= 5 for day in days]
+    groups = []
+    for key, group in sorted(group_keys.items(), key=lambda item: group_labels[item[0]]):
+        groups.append({
+            'key': key,
+            'label': group_labels[key],
+            'headcount': headcount[group],
+            'days': [
+                {
+                    'date': day.isoformat(),
+                    'is_weekend': weekends[offset],
+                    'holidays': holidays_by_group[group][offset],
+                    'approved': approved[group][offset],
+                    'pending': pending[group][offset],
+                    'off': approved[group][offset] + pending[group][offset],
+                    'people': names_by_day[group][offset],
+                }
+                for offset, day in enumerate(days)
+            ],
+        })
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'group_by': group_by,
+        'groups': groups,
+    }
+
+
+def cached_absence_heatmap(year, month, group_by='department', department=None, manager_code=None):
+    """build_absence_heatmap for a calendar month, cached per (scope, month)"""
+    scope = f"{group_by}:{department or '*'}:{manager_code or '*'}"
+    scope_hash = hashlib.md5(scope.encode()).hexdigest()
+    key = f"leave:absence_heatmap:{heatmap_version()}:{scope_hash}:{year}-{month:02d}"
+    data = cache.get(key)
+    if data is None:
+        start, end = month_window(year, month)
+        data = build_absence_heatmap(start, end, group_by, department, manager_code)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
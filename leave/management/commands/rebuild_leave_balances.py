@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from leave.services import LeaveLedgerService
+
+
+class Command(BaseCommand):
+    help = "Recompute LeaveBalance rows for a year from the LeaveTransaction ledger and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None, help='Balance year (default: current year)')
+        parser.add_argument('--apply', action='store_true', help='Overwrite drifted balances with the ledger totals')
+        parser.add_argument(
+            '--backfill-opening',
+            action='store_true',
+            help="Record an 'opening' entry for balances that have no ledger history yet",
+        )
+        parser.add_argument('--limit', type=int, default=50, help='Maximum mismatches to print')
+
+    def handle(self, *args, **options):
+        year = options['year'] or timezone.now().year
+
+        if options['backfill_opening']:
+            created = LeaveLedgerService.backfill_opening_entries(year)
+            self.stdout.write(f"Backfilled {created} opening ledger entries for {year}")
+
+        try:
+            mismatches = LeaveLedgerService.rebuild_balances(year, apply=options['apply'])
+        except ValueError as exc:
+            raise CommandError(f"{exc} (run with --backfill-opening)")
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS(f"All {year} leave balances match the ledger"))
+            return
+
+        for mismatch in mismatches[:options['limit']]:
+            self.stdout.write(
+                f"employee={mismatch['employee_id']} leave_type={mismatch['leave_type_id']} "
+                f"stored={mismatch['stored']} ledger={mismatch['expected']}"
+            )
+        if len(mismatches) > options['limit']:
+            self.stdout.write(f"... and {len(mismatches) - options['limit']} more")
+
+        if options['apply']:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(mismatches)} balances for {year}"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(mismatches)} balances differ from the ledger for {year} (run with --apply to fix)"
+            ))
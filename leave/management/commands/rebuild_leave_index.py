@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from leave.services import LeaveIntervalIndex
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-day leave occupancy index (LeaveDay) from all open and approved leaves"
+
+    def handle(self, *args, **options):
+        total = LeaveIntervalIndex.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} leave days"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from leave.services import LeaveBalanceSummaryService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-(employee, year) LeaveBalanceSummary table from leave balances"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, action='append', help='Year to refresh (repeatable, default: current year)')
+
+    def handle(self, *args, **options):
+        years = options['year'] or [timezone.now().year]
+        for year in years:
+            count = LeaveBalanceSummaryService.refresh(year)
+            self.stdout.write(self.style.SUCCESS(f"Refreshed {count} leave summaries for {year}"))
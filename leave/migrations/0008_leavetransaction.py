@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0004_employeedocument'),
+        ('leave', '0007_leavetype_accrual_rate_leavetype_can_use_same_month_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('kind', models.CharField(choices=[('opening', 'Opening Balance'), ('allocation', 'Allocation'), ('accrual', 'Monthly Accrual'), ('carry_forward', 'Carry Forward'), ('comp_off', 'Comp Off Earned'), ('deduction', 'Leave Deduction'), ('year_end', 'Year-End Lapse'), ('manual', 'Manual Adjustment'), ('rebuild', 'Rebuild Correction')], max_length=20)),
+                ('total_delta', models.IntegerField(default=0)),
+                ('taken_delta', models.IntegerField(default=0)),
+                ('remaining_delta', models.IntegerField(default=0)),
+                ('carry_forward_delta', models.IntegerField(default=0)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_transactions', to='hr.employee')),
+                ('leave', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='leave.leave')),
+                ('leave_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='leave.leavetype')),
+            ],
+            options={
+                'db_table': 'leave_transactions',
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['year', 'employee', 'leave_type'], name='leave_txn_year_emp_type_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0004_employeedocument'),
+        ('leave', '0008_leavetransaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('total_leaves', models.IntegerField(default=0)),
+                ('leaves_taken', models.IntegerField(default=0)),
+                ('carry_forward', models.IntegerField(default=0)),
+                ('leaves_remaining', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_summaries', to='hr.employee')),
+            ],
+            options={
+                'db_table': 'leave_balance_summaries',
+                'indexes': [models.Index(fields=['year', 'employee'], name='leave_summary_year_emp_idx')],
+                'unique_together': {('employee', 'year')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0004_employeedocument'),
+        ('leave', '0009_leavebalancesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('new', 'New')], max_length=10)),
+                ('half_day_period', models.CharField(blank=True, choices=[('first_half', 'First Half'), ('second_half', 'Second Half')], max_length=20, null=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_days', to='hr.employee')),
+                ('leave', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='leave.leave')),
+            ],
+            options={
+                'db_table': 'leave_days',
+                'indexes': [models.Index(fields=['employee', 'date'], name='leave_day_emp_date_idx'), models.Index(fields=['date', 'status'], name='leave_day_date_status_idx')],
+                'unique_together': {('leave', 'date')},
+            },
+        ),
+    ]
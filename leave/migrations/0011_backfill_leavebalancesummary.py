@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def backfill_summaries(apps, schema_editor):
+    """Fill LeaveBalanceSummary from the balances that predate it (LeaveBalanceSummaryService.refresh for every year)"""
+    LeaveBalance = apps.get_model('leave', 'LeaveBalance')
+    LeaveBalanceSummary = apps.get_model('leave', 'LeaveBalanceSummary')
+
+    rows = (
+        LeaveBalance.objects
+        .values('employee_id', 'year')
+        .annotate(total=Sum('total_leaves'), taken=Sum('leaves_taken'), carry=Sum('carry_forward'))
+        .order_by()
+    )
+    now = timezone.now()
+    summaries = []
+    for row in rows.iterator(chunk_size=5000):
+        total, taken, carry = row['total'] or 0, row['taken'] or 0, row['carry'] or 0
+        summaries.append(LeaveBalanceSummary(
+            employee_id=row['employee_id'],
+            year=row['year'],
+            total_leaves=total,
+            leaves_taken=taken,
+            carry_forward=carry,
+            leaves_remaining=total + carry - taken,
+            updated_at=now,
+        ))
+
+    LeaveBalanceSummary.objects.all().delete()
+    LeaveBalanceSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0010_leaveday'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def backfill_leave_days(apps, schema_editor):
+    """Index the leaves that predate LeaveDay, so overlap checks and coverage see them"""
+    from leave.services import LeaveIntervalIndex
+
+    LeaveIntervalIndex.rebuild(apps.get_model('leave', 'Leave'), apps.get_model('leave', 'LeaveDay'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0011_backfill_leavebalancesummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_leave_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def backfill_opening_entries(apps, schema_editor):
+    """Give every balance that predates the ledger an opening entry, so the ledger sum reproduces it"""
+    from leave.services import LeaveLedgerService
+
+    LeaveLedgerService.backfill_opening_entries(
+        balance_model=apps.get_model('leave', 'LeaveBalance'),
+        transaction_model=apps.get_model('leave', 'LeaveTransaction'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0012_backfill_leaveday'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_opening_entries, migrations.RunPython.noop),
+    ]
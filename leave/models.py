@@ -224,4 +224,103 @@ class LeaveBalance(models.Model):
         unique_together = ['employee', 'leave_type', 'year']
 
     def __str__(self):
-        return f"{self.employee.first_name} - {self.leave_type.name} ({self.year})"        
\ No newline at end of file
+        return f"{self.employee.first_name} - {self.leave_type.name} ({self.year})"        
+
+class LeaveTransaction(models.Model):
+    """Append-only ledger of every change made to a LeaveBalance.
+
+    Each row stores the delta applied to the four balance columns, so summing
+    the ledger for an (employee, leave_type, year) reproduces the balance.
+    """
+
+    KIND_CHOICES = [
+        ('opening', 'Opening Balance'),
+        ('allocation', 'Allocation'),
+        ('accrual', 'Monthly Accrual'),
+        ('carry_forward', 'Carry Forward'),
+        ('comp_off', 'Comp Off Earned'),
+        ('deduction', 'Leave Deduction'),
+        ('year_end', 'Year-End Lapse'),
+        ('manual', 'Manual Adjustment'),
+        ('rebuild', 'Rebuild Correction'),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_transactions')
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE)
+    year = models.IntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    total_delta = models.IntegerField(default=0)
+    taken_delta = models.IntegerField(default=0)
+    remaining_delta = models.IntegerField(default=0)
+    carry_forward_delta = models.IntegerField(default=0)
+    leave = models.ForeignKey(
+        Leave,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_entries'
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'leave_transactions'
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['year', 'employee', 'leave_type'], name='leave_txn_year_emp_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.leave_type_id} ({self.year}) {self.kind}"
+
+
+class LeaveBalanceSummary(models.Model):
+    """Per-(employee, year) totals of LeaveBalance, refreshed on every balance write.
+
+    Materialized so leave_balance_summary can page through large
+    organisations without re-aggregating leave_balances on each request.
+    """
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_summaries')
+    year = models.IntegerField()
+    total_leaves = models.IntegerField(default=0)
+    leaves_taken = models.IntegerField(default=0)
+    carry_forward = models.IntegerField(default=0)
+    leaves_remaining = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'leave_balance_summaries'
+        unique_together = ['employee', 'year']
+        indexes = [
+            models.Index(fields=['year', 'employee'], name='leave_summary_year_emp_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} ({self.year})"
+
+
+class LeaveDay(models.Model):
+    """One row per calendar day covered by an open or approved Leave.
+
+    Maintained from Leave post_save (see leave/signals.py) so overlap checks
+    and "who is off on day X" become indexed lookups instead of
+    start_date/end_date range scans over every leave.
+    """
+
+    leave = models.ForeignKey(Leave, on_delete=models.CASCADE, related_name='days')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_days')
+    date = models.DateField()
+    status = models.CharField(max_length=10, choices=Leave.STATUS_CHOICES)
+    half_day_period = models.CharField(max_length=20, choices=Leave.HALF_DAY_CHOICES, null=True, blank=True)
+
+    class Meta:
+        db_table = 'leave_days'
+        unique_together = ['leave', 'date']
+        indexes = [
+            models.Index(fields=['employee', 'date'], name='leave_day_emp_date_idx'),
+            models.Index(fields=['date', 'status'], name='leave_day_date_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date} ({self.status})"
@@ -0,0 +1,83 @@
+# leave/registry.py
+import threading
+
+from hrms.cache import SharedVersion
+
+from .models import LeaveType
+
+
+class LeaveTypeRegistry:
+    """In-process cache of all LeaveType rows, indexed by id and name.
+
+    LeaveType is a handful of rows that rarely change, so the whole table is
+    loaded once and kept until its shared version (hrms.cache.SharedVersion)
+    moves. The version is bumped from the LeaveType post_save/post_delete
+    signals (see leave/signals.py), and every worker notices the change
+    within a second.
+
+    Cached instances are shared between requests - treat them as read-only.
+    """
+
+    _lock = threading.Lock()
+    _shared_version = SharedVersion('leave_type_registry')
+    _version = None
+    _by_id = {}
+    _by_name = {}
+
+    @classmethod
+    def _load(cls):
+        """Return (by_id, by_name), reloading from the database if stale"""
+        version = cls._shared_version.get()
+        if cls._version == version:
+            return cls._by_id, cls._by_name
+
+        with cls._lock:
+            if cls._version != version:
+                leave_types = list(LeaveType.objects.all().order_by('name'))
+                cls._by_id = {lt.id: lt for lt in leave_types}
+                cls._by_name = {lt.name: lt for lt in leave_types}
+                cls._version = version
+        return cls._by_id, cls._by_name
+
+    @classmethod
+    def invalidate(cls):
+        """Bump the shared version so every process reloads on next access"""
+        cls._shared_version.bump()
+        cls._version = None
+
+    @classmethod
+    def get(cls, name):
+        """Return the LeaveType with this name or raise LeaveType.DoesNotExist"""
+        _, by_name = cls._load()
+        try:
+            return by_name[name]
+        except KeyError:
+            raise LeaveType.DoesNotExist(f"LeaveType '{name}' does not exist")
+
+    @classmethod
+    def get_by_id(cls, leave_type_id):
+        """Return the LeaveType with this id or raise LeaveType.DoesNotExist"""
+        by_id, _ = cls._load()
+        try:
+            return by_id[int(leave_type_id)]
+        except (KeyError, TypeError, ValueError):
+            raise LeaveType.DoesNotExist(f"LeaveType id={leave_type_id} does not exist")
+
+    @classmethod
+    def get_or_create(cls, name, defaults=None):
+        """Cached equivalent of LeaveType.objects.get_or_create(name=...)"""
+        try:
+            return cls.get(name), False
+        except LeaveType.DoesNotExist:
+            # Saving fires post_save, which invalidates the registry
+            return LeaveType.objects.get_or_create(name=name, defaults=defaults or {})
+
+    @classmethod
+    def all(cls):
+        by_id, _ = cls._load()
+        return sorted(by_id.values(), key=lambda lt: lt.name)
+
+    @classmethod
+    def active(cls):
+        """Equivalent of LeaveType.objects.filter(is_active=True)"""
+        return [lt for lt in cls.all() if lt.is_active]
@@ -2,10 +2,91 @@
 from django.utils import timezone
 from datetime import datetime, date, timedelta
 from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Sum
 from decimal import Decimal
-from .models import Leave, LeaveBalance, LeaveType, Holiday
+from .models import Leave, LeaveBalance, LeaveType, Holiday, LeaveTransaction, LeaveBalanceSummary, LeaveDay
+from .registry import LeaveTypeRegistry
 from hr.models import Employee
+from hrms.db import bulk_upsert
+from hrms.metrics import JOB_ITEMS, track_job
 import calendar
+from contextlib import contextmanager
+
+BALANCE_FIELDS = ('total_leaves', 'leaves_taken', 'leaves_remaining', 'carry_forward')
+EMPTY_SNAPSHOT = (0, 0, 0, 0)
+
+
+def balance_snapshot(balance):
+    """Return the balance columns as they will be stored (IntegerFields)"""
+    return tuple(int(getattr(balance, field) or 0) for field in BALANCE_FIELDS)
+
+
+class LeaveLedger:
+    """Buffers LeaveTransaction rows and writes them with bulk_create.
+
+    Call record() after changing a LeaveBalance in memory, passing the
+    snapshot taken before the change. Batch jobs share one ledger and flush
+    once per chunk; single updates flush straight away via LeaveLedger.use().
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.entries = []
+
+    def record(self, balance, kind, before=EMPTY_SNAPSHOT, leave=None, note=''):
+        if before is EMPTY_SNAPSHOT and kind != 'opening':
+            # A new balance: its history starts with an empty opening entry,
+            # which LeaveLedgerService.rebuild_balances requires
+            self.entries.append(self._entry(balance, 'opening', EMPTY_SNAPSHOT))
+        deltas = [new - old for new, old in zip(balance_snapshot(balance), before)]
+        if not any(deltas) and kind != 'opening':
+            return None
+        entry = self._entry(balance, kind, deltas, leave, note)
+        self.entries.append(entry)
+        return entry
+
+    @staticmethod
+    def _entry(balance, kind, deltas, leave=None, note=''):
+        return LeaveTransaction(
+            employee_id=balance.employee_id,
+            leave_type_id=balance.leave_type_id,
+            year=balance.year,
+            kind=kind,
+            total_delta=deltas[0],
+            taken_delta=deltas[1],
+            remaining_delta=deltas[2],
+            carry_forward_delta=deltas[3],
+            leave=leave,
+            note=note[:255],
+            created_at=timezone.now(),
+        )
+
+    def flush(self):
+        """Write all buffered entries and return how many were written"""
+        entries, self.entries = self.entries, []
+        if entries:
+            LeaveTransaction.objects.bulk_create(entries, batch_size=self.batch_size)
+            
+            # Every balance write goes through the ledger, so this is where
+            # the per-year summaries are brought back in sync
+            touched = {}
+            for entry in entries:
+                touched.setdefault(entry.year, set()).add(entry.employee_id)
+            for year, employee_ids in touched.items():
+                LeaveBalanceSummaryService.refresh(year, employee_ids)
+        return len(entries)
+
+    @staticmethod
+    @contextmanager
+    def use(ledger=None):
+        """Yield the caller's ledger, or a private one flushed on exit"""
+        if ledger is not None:
+            yield ledger
+            return
+        ledger = LeaveLedger()
+        yield ledger
+        ledger.flush()
+
 
 class LeaveAccrualService:
     """Handles monthly leave accrual of 1.5 days per month"""
@@ -28,9 +109,10 @@ class LeaveAccrualService:
         return Decimal('1.5')  # Monthly accrual rate
 
     @staticmethod
-    def process_monthly_accrual_for_all():
-        """Process monthly accrual for all active employees"""
-        today = timezone.now().date()
+    @track_job('leave_accrual')
+    def process_monthly_accrual_for_all(today=None):
+        """Process monthly accrual for all active employees (today defaults to the current date)"""
+        today = today or timezone.now().date()
         current_month = today.month
         current_year = today.year
         
@@ -38,43 +120,78 @@ class LeaveAccrualService:
         if today.day != 1:
             return
         
-        active_employees = Employee.objects.filter(status='active')
-        annual_leave_type, created = LeaveType.objects.get_or_create(
+        active_employees = Employee.objects.filter(status='active').only(
+            'id', 'date_of_joining', 'probation_end_date'
+        )
+        annual_leave_type, created = LeaveTypeRegistry.get_or_create(
             name='annual',
             defaults={'max_days': 18, 'is_active': True}
         )
         
-        for employee in active_employees:
+        accruals = {}
+        for employee in active_employees.iterator(chunk_size=2000):
             accrual_amount = LeaveAccrualService.calculate_monthly_accrual(
                 employee, current_month, current_year
             )
-            
             if accrual_amount > 0:
-                with transaction.atomic():
-                    balance, created = LeaveBalance.objects.get_or_create(
-                        employee=employee,
+                accruals[employee.id] = accrual_amount
+        
+        if not accruals:
+            return
+        
+        # One read, one bulk insert, one bulk update and one ledger insert
+        # instead of a get_or_create + save per employee
+        with transaction.atomic():
+            existing = {
+                balance.employee_id: balance
+                for balance in LeaveBalance.objects.select_for_update().filter(
+                    leave_type=annual_leave_type,
+                    year=current_year
+                )
+            }
+            ledger = LeaveLedger()
+            now = timezone.now()
+            to_create = []
+            to_update = []
+            
+            for employee_id, accrual_amount in accruals.items():
+                balance = existing.get(employee_id)
+                if balance is None:
+                    balance = LeaveBalance(
+                        employee_id=employee_id,
                         leave_type=annual_leave_type,
                         year=current_year,
-                        defaults={
-                            'total_leaves': accrual_amount,
-                            'leaves_remaining': accrual_amount,
-                            'leaves_taken': 0,
-                            'carry_forward': 0
-                        }
+                        total_leaves=accrual_amount,
+                        leaves_remaining=accrual_amount,
+                        leaves_taken=0,
+                        carry_forward=0
                     )
-                    
-                    if not created:
-                        balance.total_leaves += accrual_amount
-                        balance.leaves_remaining += accrual_amount
-                        balance.save()
+                    ledger.record(balance, 'accrual')
+                    to_create.append(balance)
+                else:
+                    before = balance_snapshot(balance)
+                    balance.total_leaves += accrual_amount
+                    balance.leaves_remaining += accrual_amount
+                    balance.updated_at = now
+                    ledger.record(balance, 'accrual', before)
+                    to_update.append(balance)
+            
+            LeaveBalance.objects.bulk_create(to_create, batch_size=1000)
+            LeaveBalance.objects.bulk_update(
+                to_update,
+                ['total_leaves', 'leaves_remaining', 'updated_at'],
+                batch_size=1000
+            )
+            ledger.flush()
+        JOB_ITEMS.inc(len(accruals), job='leave_accrual')
 
 class OptionalLeaveService:
     """Manages optional leave rules (4 days/year, use only 2, lose remaining 2)"""
     
     @staticmethod
-    def initialize_optional_leave(employee, year):
+    def initialize_optional_leave(employee, year, ledger=None):
         """Initialize optional leave balance for the year"""
-        optional_leave_type, created = LeaveType.objects.get_or_create(
+        optional_leave_type, created = LeaveTypeRegistry.get_or_create(
             name='optional',
             defaults={'max_days': 4, 'is_active': True}
         )
@@ -90,13 +207,16 @@ class OptionalLeaveService:
                 'carry_forward': 0
             }
         )
+        if created:
+            with LeaveLedger.use(ledger) as ledger:
+                ledger.record(balance, 'allocation')
         return balance
     
     @staticmethod
     def can_use_optional_leave(employee, days_requested, year):
         """Check if employee can use optional leave"""
         try:
-            optional_leave_type = LeaveType.objects.get(name='optional')
+            optional_leave_type = LeaveTypeRegistry.get('optional')
             balance = LeaveBalance.objects.get(
                 employee=employee,
                 leave_type=optional_leave_type,
@@ -130,7 +250,7 @@ class CarryForwardService:
         previous_year = current_year - 1
         
         try:
-            annual_leave_type = LeaveType.objects.get(name='annual')
+            annual_leave_type = LeaveTypeRegistry.get('annual')
             prev_balance = LeaveBalance.objects.get(
                 employee=employee,
                 leave_type=annual_leave_type,
@@ -147,12 +267,12 @@ class CarryForwardService:
             return Decimal('0')
     
     @staticmethod
-    def process_carry_forward(employee, current_year):
+    def process_carry_forward(employee, current_year, ledger=None):
         """Process carry forward for new year"""
         carry_forward = CarryForwardService.calculate_carry_forward(employee, current_year)
         
         if carry_forward > 0:
-            annual_leave_type = LeaveType.objects.get(name='annual')
+            annual_leave_type = LeaveTypeRegistry.get('annual')
             
             # Create or update current year balance with carry forward
             balance, created = LeaveBalance.objects.get_or_create(
@@ -167,11 +287,16 @@ class CarryForwardService:
                 }
             )
             
+            before = EMPTY_SNAPSHOT
             if not created:
+                before = balance_snapshot(balance)
                 balance.carry_forward = carry_forward
                 balance.leaves_remaining += carry_forward
                 balance.total_leaves += carry_forward
                 balance.save()
+            
+            with LeaveLedger.use(ledger) as ledger:
+                ledger.record(balance, 'carry_forward', before)
         
         return carry_forward
 
@@ -252,7 +377,7 @@ class CompOffService:
             return False, "Comp off already earned for this date"
         
         # Get or create comp off leave type
-        comp_off_type, created = LeaveType.objects.get_or_create(
+        comp_off_type, created = LeaveTypeRegistry.get_or_create(
             name='comp_off',
             defaults={'max_days': 30, 'is_active': True}
         )
@@ -270,7 +395,9 @@ class CompOffService:
             }
         )
         
+        before = EMPTY_SNAPSHOT
         if not created:
+            before = balance_snapshot(balance)
             balance.total_leaves += 1
             balance.leaves_remaining += 1
             balance.save()
@@ -287,71 +414,96 @@ class CompOffService:
             applied_date=timezone.now()
         )
         
+        with LeaveLedger.use() as ledger:
+            ledger.record(balance, 'comp_off', before, leave=comp_off_leave)
+        
         return True, "Comp off earned successfully"
 
 class YearEndService:
     """Handles year-end processing and automatic loss of excess leaves"""
     
+    CHUNK_SIZE = 500
+    
     @staticmethod
-    def process_year_end():
-        """Process year-end for all employees"""
-        current_year = timezone.now().year
+    @track_job('leave_year_end')
+    def process_year_end(year=None):
+        """Process year-end for all employees (year defaults to the current year)"""
+        current_year = year or timezone.now().year
         next_year = current_year + 1
         
-        employees = Employee.objects.filter(status='active')
+        employee_ids = list(
+            Employee.objects.filter(status='active').order_by('id').values_list('id', flat=True)
+        )
         
-        for employee in employees:
-            YearEndService.process_employee_year_end(employee, current_year, next_year)
+        # Each chunk commits together with its ledger entries
+        for start in range(0, len(employee_ids), YearEndService.CHUNK_SIZE):
+            chunk_ids = employee_ids[start:start + YearEndService.CHUNK_SIZE]
+            with transaction.atomic():
+                ledger = LeaveLedger()
+                for employee in Employee.objects.filter(id__in=chunk_ids):
+                    YearEndService.process_employee_year_end(
+                        employee, current_year, next_year, ledger=ledger
+                    )
+                ledger.flush()
+            JOB_ITEMS.inc(len(chunk_ids), job='leave_year_end')
     
     @staticmethod
-    def process_employee_year_end(employee, current_year, next_year):
+    def process_employee_year_end(employee, current_year, next_year, ledger=None):
         """Process year-end for a single employee"""
-        with transaction.atomic():
+        with transaction.atomic(), LeaveLedger.use(ledger) as ledger:
             # Process annual leave carry forward
-            carry_forward = CarryForwardService.process_carry_forward(employee, next_year)
+            carry_forward = CarryForwardService.process_carry_forward(
+                employee, next_year, ledger=ledger
+            )
             
             # Reset optional leaves (lose remaining - max use 2 out of 4)
             try:
-                optional_leave_type = LeaveType.objects.get(name='optional')
+                optional_leave_type = LeaveTypeRegistry.get('optional')
                 optional_balance = LeaveBalance.objects.get(
                     employee=employee,
                     leave_type=optional_leave_type,
                     year=current_year
                 )
                 # Optional leaves don't carry forward - they're lost
+                before = balance_snapshot(optional_balance)
                 optional_balance.leaves_remaining = 0
                 optional_balance.save()
+                ledger.record(optional_balance, 'year_end', before)
                 
                 # Initialize next year's optional leaves
-                OptionalLeaveService.initialize_optional_leave(employee, next_year)
+                OptionalLeaveService.initialize_optional_leave(employee, next_year, ledger=ledger)
                 
             except (LeaveType.DoesNotExist, LeaveBalance.DoesNotExist):
                 # Initialize if not exists
-                OptionalLeaveService.initialize_optional_leave(employee, next_year)
+                OptionalLeaveService.initialize_optional_leave(employee, next_year, ledger=ledger)
             
             # Reset sick leaves (typically don't carry forward)
             try:
-                sick_leave_type = LeaveType.objects.get(name='sick')
+                sick_leave_type = LeaveTypeRegistry.get('sick')
                 sick_balance = LeaveBalance.objects.get(
                     employee=employee,
                     leave_type=sick_leave_type,
                     year=current_year
                 )
+                before = balance_snapshot(sick_balance)
                 sick_balance.leaves_remaining = 0
                 sick_balance.save()
+                ledger.record(sick_balance, 'year_end', before)
             except (LeaveType.DoesNotExist, LeaveBalance.DoesNotExist):
                 pass
             
             # Reset comp off (typically don't carry forward)
             try:
-                comp_off_type = LeaveType.objects.get(name='comp_off')
+                comp_off_type = LeaveTypeRegistry.get('comp_off')
                 comp_off_balance = LeaveBalance.objects.get(
                     employee=employee,
                     leave_type=comp_off_type,
                     year=current_year
                 )
+                before = balance_snapshot(comp_off_balance)
                 comp_off_balance.leaves_remaining = 0
                 comp_off_balance.save()
+                ledger.record(comp_off_balance, 'year_end', before)
             except (LeaveType.DoesNotExist, LeaveBalance.DoesNotExist):
                 pass
 
@@ -404,7 +556,7 @@ class LeaveValidationService:
         return len(errors) == 0, errors, warnings
 
     @staticmethod
-    def deduct_leave_balance(employee, leave_type, days, year):
+    def deduct_leave_balance(employee, leave_type, days, year, leave=None):
         """Deduct leave balance after approval"""
         try:
             balance = LeaveBalance.objects.get(
@@ -414,9 +566,12 @@ class LeaveValidationService:
             )
             
             if balance.leaves_remaining >= days:
+                before = balance_snapshot(balance)
                 balance.leaves_taken += days
                 balance.leaves_remaining -= days
                 balance.save()
+                with LeaveLedger.use() as ledger:
+                    ledger.record(balance, 'deduction', before, leave=leave)
                 return True
             return False
             
@@ -426,7 +581,8 @@ class LeaveValidationService:
 # Utility function to initialize leave balances for new employee
 def initialize_employee_leave_balances(employee, year):
     """Initialize all leave balances for a new employee"""
-    leave_types = LeaveType.objects.filter(is_active=True)
+    leave_types = LeaveTypeRegistry.active()
+    ledger = LeaveLedger()
     
     for leave_type in leave_types:
         defaults = {
@@ -450,9 +606,344 @@ def initialize_employee_leave_balances(employee, year):
             defaults['total_leaves'] = 6   # Example: 6 casual leaves per year
             defaults['leaves_remaining'] = 6
         
-        LeaveBalance.objects.get_or_create(
+        balance, created = LeaveBalance.objects.get_or_create(
             employee=employee,
             leave_type=leave_type,
             year=year,
             defaults=defaults
-        )
\ No newline at end of file
+        )
+        if created:
+            ledger.record(balance, 'allocation')
+    
+    ledger.flush()
+
+
+class LeaveLedgerService:
+    """Rebuilds LeaveBalance snapshots from the LeaveTransaction ledger"""
+    
+    @staticmethod
+    def ledger_totals(year):
+        """Sum the ledger for a year with a single GROUP BY query"""
+        return {
+            (employee_id, leave_type_id): totals
+            for (employee_id, leave_type_id, _), totals
+            in LeaveLedgerService._ledger_sums(LeaveTransaction.objects.filter(year=year)).items()
+        }
+    
+    @staticmethod
+    def _ledger_sums(entries):
+        """{(employee_id, leave_type_id, year): snapshot} summed over `entries`"""
+        rows = (
+            entries
+            .values('employee_id', 'leave_type_id', 'year')
+            .annotate(
+                total=Sum('total_delta'),
+                taken=Sum('taken_delta'),
+                remaining=Sum('remaining_delta'),
+                carry=Sum('carry_forward_delta'),
+            )
+            .order_by()
+        )
+        return {
+            (row['employee_id'], row['leave_type_id'], row['year']): (
+                row['total'] or 0, row['taken'] or 0, row['remaining'] or 0, row['carry'] or 0
+            )
+            for row in rows
+        }
+    
+    @staticmethod
+    def find_mismatches(year):
+        """
+        Compare every LeaveBalance of the year with its ledger sum.
+        Returns a list of dicts with the stored and expected values;
+        'balance_id' is None when the ledger has entries but no balance row exists.
+        """
+        expected = LeaveLedgerService.ledger_totals(year)
+        mismatches = []
+        
+        balances = LeaveBalance.objects.filter(year=year).values_list(
+            'id', 'employee_id', 'leave_type_id', *BALANCE_FIELDS
+        )
+        for balance_id, employee_id, leave_type_id, *stored in balances.iterator(chunk_size=5000):
+            key = (employee_id, leave_type_id)
+            ledger_values = expected.pop(key, EMPTY_SNAPSHOT)
+            if tuple(stored) != tuple(ledger_values):
+                mismatches.append({
+                    'balance_id': balance_id,
+                    'employee_id': employee_id,
+                    'leave_type_id': leave_type_id,
+                    'stored': tuple(stored),
+                    'expected': tuple(ledger_values),
+                })
+        
+        for (employee_id, leave_type_id), ledger_values in expected.items():
+            mismatches.append({
+                'balance_id': None,
+                'employee_id': employee_id,
+                'leave_type_id': leave_type_id,
+                'stored': None,
+                'expected': tuple(ledger_values),
+            })
+        return mismatches
+    
+    @staticmethod
+    def balances_without_opening(year):
+        """Balances of the year whose ledger has no 'opening' entry, so it cannot reproduce them"""
+        openings = LeaveTransaction.objects.filter(
+            kind='opening',
+            employee_id=OuterRef('employee_id'),
+            leave_type_id=OuterRef('leave_type_id'),
+            year=year,
+        )
+        return LeaveBalance.objects.filter(year=year).filter(~Exists(openings))
+    
+    @staticmethod
+    def rebuild_balances(year, apply=False):
+        """
+        Find drifted balances and, if apply is True, overwrite them from the
+        ledger. Applying refuses to run (ValueError) while any balance lacks
+        an opening entry, since its ledger sum would only hold the changes
+        made since the ledger started.
+        """
+        if apply:
+            missing = LeaveLedgerService.balances_without_opening(year).count()
+            if missing:
+                raise ValueError(
+                    f"{missing} leave balances for {year} have no opening ledger entry; "
+                    f"backfill the opening entries before rebuilding"
+                )
+        mismatches = LeaveLedgerService.find_mismatches(year)
+        if not apply or not mismatches:
+            return mismatches
+        
+        now = timezone.now()
+        to_update = []
+        to_create = []
+        for mismatch in mismatches:
+            values = dict(zip(BALANCE_FIELDS, mismatch['expected']))
+            if mismatch['balance_id'] is None:
+                to_create.append(LeaveBalance(
+                    employee_id=mismatch['employee_id'],
+                    leave_type_id=mismatch['leave_type_id'],
+                    year=year,
+                    **values
+                ))
+            else:
+                to_update.append(LeaveBalance(id=mismatch['balance_id'], updated_at=now, **values))
+        
+        # Recreated balances whose ledger has no opening entry get an empty one
+        opened = set(
+            LeaveTransaction.objects.filter(year=year, kind='opening').values_list('employee_id', 'leave_type_id')
+        )
+        ledger = LeaveLedger()
+        for balance in to_create:
+            if (balance.employee_id, balance.leave_type_id) not in opened:
+                ledger.record(balance, 'opening', balance_snapshot(balance), note='Recreated from the ledger')
+        with transaction.atomic():
+            LeaveBalance.objects.bulk_update(to_update, [*BALANCE_FIELDS, 'updated_at'], batch_size=1000)
+            LeaveBalance.objects.bulk_create(to_create, batch_size=1000)
+            ledger.flush()
+            LeaveBalanceSummaryService.refresh(year, [m['employee_id'] for m in mismatches])
+        return mismatches
+    
+    @staticmethod
+    def backfill_opening_entries(year=None, balance_model=LeaveBalance, transaction_model=LeaveTransaction):
+        """
+        Write an 'opening' entry worth the stored balance minus its ledger
+        sum for every balance that has none (balances created or changed
+        before the ledger existed, or written in bulk), so the ledger sum
+        reproduces them. year=None covers every year; migrations pass their
+        historical models. Returns the number of entries written.
+        """
+        balances = balance_model.objects.all()
+        entries = transaction_model.objects.all()
+        if year is not None:
+            balances = balances.filter(year=year)
+            entries = entries.filter(year=year)
+        opened = set(entries.filter(kind='opening').values_list('employee_id', 'leave_type_id', 'year'))
+        totals = LeaveLedgerService._ledger_sums(entries)
+        
+        now = timezone.now()
+        batch = []
+        written = 0
+        rows = balances.values_list('employee_id', 'leave_type_id', 'year', *BALANCE_FIELDS)
+        with transaction.atomic():
+            for employee_id, leave_type_id, balance_year, *stored in rows.iterator(chunk_size=5000):
+                key = (employee_id, leave_type_id, balance_year)
+                if key in opened:
+                    continue
+                ledger_values = totals.get(key, EMPTY_SNAPSHOT)
+                deltas = [int(value or 0) - total for value, total in zip(stored, ledger_values)]
+                batch.append(transaction_model(
+                    employee_id=employee_id,
+                    leave_type_id=leave_type_id,
+                    year=balance_year,
+                    kind='opening',
+                    total_delta=deltas[0],
+                    taken_delta=deltas[1],
+                    remaining_delta=deltas[2],
+                    carry_forward_delta=deltas[3],
+                    note='Balance existed before the ledger',
+                    created_at=now,
+                ))
+                if len(batch) >= 1000:
+                    transaction_model.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            transaction_model.objects.bulk_create(batch)
+            written += len(batch)
+        return written
+
+
+class LeaveBalanceSummaryService:
+    """Keeps the per-(employee, year) LeaveBalanceSummary table in sync"""
+    
+    # Above this many employees a whole-year refresh beats a huge IN list
+    MAX_EMPLOYEE_FILTER = 1000
+    
+    @staticmethod
+    def refresh(year, employee_ids=None):
+        """
+        Recompute summaries for a year with one GROUP BY over leave_balances
+        and upsert them; summaries of employees left with no balances that
+        year are deleted. Pass employee_ids to limit the refresh to those
+        employees.
+        """
+        balances = LeaveBalance.objects.filter(year=year)
+        stale = LeaveBalanceSummary.objects.filter(year=year).exclude(
+            employee_id__in=LeaveBalance.objects.filter(year=year).values('employee_id')
+        )
+        if employee_ids is not None:
+            employee_ids = set(employee_ids)
+            if not employee_ids:
+                return 0
+            if len(employee_ids) <= LeaveBalanceSummaryService.MAX_EMPLOYEE_FILTER:
+                balances = balances.filter(employee_id__in=employee_ids)
+                stale = stale.filter(employee_id__in=employee_ids)
+        
+        rows = (
+            balances
+            .values('employee_id')
+            .annotate(
+                total=Sum('total_leaves'),
+                taken=Sum('leaves_taken'),
+                carry=Sum('carry_forward'),
+            )
+            .order_by()
+        )
+        
+        now = timezone.now()
+        summaries = []
+        for row in rows.iterator(chunk_size=5000):
+            total = row['total'] or 0
+            taken = row['taken'] or 0
+            carry = row['carry'] or 0
+            summaries.append(LeaveBalanceSummary(
+                employee_id=row['employee_id'],
+                year=year,
+                total_leaves=total,
+                leaves_taken=taken,
+                carry_forward=carry,
+                leaves_remaining=total + carry - taken,
+                updated_at=now,
+            ))
+        
+        bulk_upsert(
+            LeaveBalanceSummary,
+            summaries,
+            unique_fields=['employee', 'year'],
+            update_fields=['total_leaves', 'leaves_taken', 'carry_forward', 'leaves_remaining', 'updated_at'],
+        )
+        stale.delete()
+        return len(summaries)
+
+
+
+class LeaveIntervalIndex:
+    """Per-day occupancy index (LeaveDay) for overlap checks and team coverage"""
+    
+    # Leaves in these states block the days they cover
+    OPEN_STATUSES = ('new', 'pending', 'approved')
+    BATCH_SIZE = 2000
+    
+    @staticmethod
+    def _days_for(leave, day_model=LeaveDay):
+        current = leave.start_date
+        while current <= leave.end_date:
+            yield day_model(
+                leave_id=leave.id,
+                employee_id=leave.employee_id,
+                date=current,
+                status=leave.status,
+                half_day_period=leave.half_day_period if leave.is_half_day else None,
+            )
+            current += timedelta(days=1)
+    
+    @staticmethod
+    def sync_leave(leave):
+        """Re-index one leave after it was created or changed"""
+        LeaveDay.objects.filter(leave_id=leave.id).delete()
+        if leave.status in LeaveIntervalIndex.OPEN_STATUSES and leave.start_date <= leave.end_date:
+            LeaveDay.objects.bulk_create(
+                LeaveIntervalIndex._days_for(leave), batch_size=LeaveIntervalIndex.BATCH_SIZE
+            )
+    
+    @staticmethod
+    def rebuild(leave_model=Leave, day_model=LeaveDay):
+        """
+        Rebuild the whole index from Leave; returns the number of day rows.
+        Migrations pass their historical Leave and LeaveDay models.
+        """
+        leaves = leave_model.objects.filter(status__in=LeaveIntervalIndex.OPEN_STATUSES).only(
+            'id', 'employee_id', 'start_date', 'end_date', 'status', 'is_half_day', 'half_day_period'
+        )
+        total = 0
+        with transaction.atomic():
+            day_model.objects.all().delete()
+            batch = []
+            for leave in leaves.iterator(chunk_size=LeaveIntervalIndex.BATCH_SIZE):
+                batch.extend(LeaveIntervalIndex._days_for(leave, day_model))
+                if len(batch) >= LeaveIntervalIndex.BATCH_SIZE:
+                    day_model.objects.bulk_create(batch, batch_size=LeaveIntervalIndex.BATCH_SIZE)
+                    total += len(batch)
+                    batch = []
+            day_model.objects.bulk_create(batch, batch_size=LeaveIntervalIndex.BATCH_SIZE)
+            total += len(batch)
+        return total
+    
+    @staticmethod
+    def find_overlap(employee_id, start_date, end_date, half_day_period=None, exclude_leave_id=None):
+        """
+        Return the id of an open leave of this employee that overlaps the
+        range, or None. Two half-day leaves only clash on the same half.
+        """
+        days = LeaveDay.objects.filter(employee_id=employee_id, date__range=(start_date, end_date))
+        if exclude_leave_id:
+            days = days.exclude(leave_id=exclude_leave_id)
+        
+        for leave_id, existing_period in days.values_list('leave_id', 'half_day_period')[:10]:
+            if half_day_period and existing_period and half_day_period != existing_period:
+                continue
+            return leave_id
+        return None
+    
+    @staticmethod
+    def employees_off(day, statuses=('approved',)):
+        """Ids of employees on leave on the given day"""
+        return set(
+            LeaveDay.objects.filter(date=day, status__in=statuses)
+            .values_list('employee_id', flat=True)
+            .distinct()
+        )
+    
+    @staticmethod
+    def team_coverage(start_date, end_date, department=None, location=None, statuses=('approved',)):
+        """Return {date: number of employees off} for a team over a date range"""
+        days = LeaveDay.objects.filter(date__range=(start_date, end_date), status__in=statuses)
+        if department:
+            days = days.filter(employee__department=department)
+        if location:
+            days = days.filter(employee__location=location)
+        
+        counts = days.values('date').annotate(off=Count('employee_id', distinct=True)).order_by()
+        return {row['date']: row['off'] for row in counts}
@@ -0,0 +1,55 @@
+# leave/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from hrms.cache import bump_fragments, topic
+
+from .heatmap import invalidate_heatmaps
+from .models import Holiday, Leave, LeaveType, Region
+from .registry import LeaveTypeRegistry
+from .services import LeaveIntervalIndex
+
+
+@receiver(post_save, sender=LeaveType)
+@receiver(post_delete, sender=LeaveType)
+def invalidate_leave_type_registry(sender, **kwargs):
+    # Wait for commit so other workers never reload the pre-save rows
+    transaction.on_commit(LeaveTypeRegistry.invalidate)
+
+
+@receiver(post_save, sender=Leave)
+def index_leave_days(sender, instance, **kwargs):
+    LeaveIntervalIndex.sync_leave(instance)
+
+
+@receiver(post_save, sender=Leave)
+@receiver(post_delete, sender=Leave)
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_absence_heatmaps(sender, **kwargs):
+    transaction.on_commit(invalidate_heatmaps)
+
+
+@receiver(post_save, sender=Leave)
+@receiver(post_delete, sender=Leave)
+def invalidate_leave_fragments(sender, instance, **kwargs):
+    bump_fragments('leaves', topic('leaves', instance.employee_id))
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_holiday_fragments(sender, **kwargs):
+    bump_fragments('holidays')
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+def invalidate_region_fragments(sender, **kwargs):
+    bump_fragments('regions')
+
+
+@receiver(post_save, sender=LeaveType)
+@receiver(post_delete, sender=LeaveType)
+def invalidate_leave_type_fragments(sender, **kwargs):
+    bump_fragments('leave_types')
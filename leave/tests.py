@@ -1,3 +1,378 @@
-from django.test import TestCase
+import json
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from hrms.testing import UNCACHED, QueryBudgetMixin, create_employee, session_client
+from . import async_views, heatmap, views
+from .models import Holiday, Leave, LeaveBalance, LeaveBalanceSummary, LeaveDay, LeaveTransaction, LeaveType, Region
+from .registry import LeaveTypeRegistry
+from .services import (
+    LeaveBalanceSummaryService, LeaveIntervalIndex, LeaveLedger, LeaveLedgerService, balance_snapshot,
+)
+
+
+def make_leave(employee, leave_type, start, end, status='approved', half_day_period=None):
+    return Leave.objects.create(
+        employee=employee,
+        leave_type=leave_type,
+        colour='blue',
+        start_date=start,
+        end_date=end,
+        days_requested=Decimal('0.5') if half_day_period else Decimal((end - start).days + 1),
+        reason='Test',
+        status=status,
+        is_half_day=bool(half_day_period),
+        half_day_period=half_day_period,
+    )
+
+
+class LeaveLedgerTests(TestCase):
+    year = 2025
+
+    def setUp(self):
+        self.employee = create_employee()
+        self.sick = LeaveType.objects.create(name='sick')
+        self.casual = LeaveType.objects.create(name='casual')
+
+    def allocate(self, leave_type, total, ledger):
+        balance = LeaveBalance.objects.create(
+            employee=self.employee, leave_type=leave_type, year=self.year,
+            total_leaves=total, leaves_remaining=total,
+        )
+        ledger.record(balance, 'allocation')
+        return balance
+
+    def test_flush_writes_deltas_and_refreshes_summary(self):
+        ledger = LeaveLedger()
+        balance = self.allocate(self.sick, 12, ledger)
+        self.allocate(self.casual, 6, ledger)
+        before = balance_snapshot(balance)
+        balance.leaves_taken, balance.leaves_remaining = 2, 10
+        balance.save()
+        ledger.record(balance, 'deduction', before)
+
+        self.assertEqual(LeaveTransaction.objects.count(), 0)
+        # Each new balance also opens its history with an empty 'opening' entry
+        self.assertEqual(ledger.flush(), 5)
+        self.assertEqual(ledger.entries, [])
+
+        deduction = LeaveTransaction.objects.get(kind='deduction')
+        self.assertEqual(
+            (deduction.total_delta, deduction.taken_delta, deduction.remaining_delta, deduction.carry_forward_delta),
+            (0, 2, -2, 0),
+        )
+        summary = LeaveBalanceSummary.objects.get(employee=self.employee, year=self.year)
+        self.assertEqual((summary.total_leaves, summary.leaves_taken, summary.leaves_remaining), (18, 2, 16))
+
+    def test_record_skips_unchanged_balance(self):
+        ledger = LeaveLedger()
+        balance = self.allocate(self.sick, 12, ledger)
+        self.assertIsNone(ledger.record(balance, 'manual', balance_snapshot(balance)))
+        self.assertEqual(ledger.flush(), 2)
+
+    def test_consistent_ledger_has_no_mismatches(self):
+        ledger = LeaveLedger()
+        self.allocate(self.sick, 12, ledger)
+        ledger.flush()
+        self.assertEqual(LeaveLedgerService.find_mismatches(self.year), [])
+
+    def test_find_mismatches_reports_drift_and_missing_balances(self):
+        ledger = LeaveLedger()
+        sick = self.allocate(self.sick, 12, ledger)
+        casual = self.allocate(self.casual, 6, ledger)
+        ledger.flush()
+        LeaveBalance.objects.filter(pk=sick.pk).update(leaves_remaining=7)
+        casual.delete()
+
+        mismatches = {m['leave_type_id']: m for m in LeaveLedgerService.find_mismatches(self.year)}
+        self.assertEqual(mismatches[self.sick.id]['stored'], (12, 0, 7, 0))
+        self.assertEqual(mismatches[self.sick.id]['expected'], (12, 0, 12, 0))
+        self.assertIsNone(mismatches[self.casual.id]['balance_id'])
+        self.assertEqual(mismatches[self.casual.id]['expected'], (6, 0, 6, 0))
+
+    def test_rebuild_balances_applies_the_ledger(self):
+        ledger = LeaveLedger()
+        sick = self.allocate(self.sick, 12, ledger)
+        casual = self.allocate(self.casual, 6, ledger)
+        ledger.flush()
+        LeaveBalance.objects.filter(pk=sick.pk).update(leaves_remaining=7)
+        casual.delete()
+
+        # Dry run leaves the balances alone
+        self.assertEqual(len(LeaveLedgerService.rebuild_balances(self.year)), 2)
+        self.assertEqual(LeaveBalance.objects.get(pk=sick.pk).leaves_remaining, 7)
+
+        self.assertEqual(len(LeaveLedgerService.rebuild_balances(self.year, apply=True)), 2)
+        self.assertEqual(LeaveBalance.objects.get(pk=sick.pk).leaves_remaining, 12)
+        self.assertTrue(LeaveBalance.objects.filter(employee=self.employee, leave_type=self.casual).exists())
+        self.assertEqual(LeaveLedgerService.find_mismatches(self.year), [])
+        summary = LeaveBalanceSummary.objects.get(employee=self.employee, year=self.year)
+        self.assertEqual(summary.leaves_remaining, 18)
+
+    def test_rebuild_keeps_balances_that_predate_the_ledger(self):
+        # Stored before the ledger existed, then one deduction through it
+        balance = LeaveBalance.objects.create(
+            employee=self.employee, leave_type=self.sick, year=self.year, total_leaves=12, leaves_remaining=12,
+        )
+        before = balance_snapshot(balance)
+        balance.leaves_taken, balance.leaves_remaining = 1, 11
+        balance.save()
+        with LeaveLedger.use() as ledger:
+            ledger.record(balance, 'deduction', before)
+
+        self.assertEqual(list(LeaveLedgerService.balances_without_opening(self.year)), [balance])
+        with self.assertRaises(ValueError):
+            LeaveLedgerService.rebuild_balances(self.year, apply=True)
+        self.assertEqual(LeaveBalance.objects.get(pk=balance.pk).leaves_remaining, 11)
+
+        self.assertEqual(LeaveLedgerService.backfill_opening_entries(self.year), 1)
+        opening = LeaveTransaction.objects.get(kind='opening')
+        self.assertEqual((opening.total_delta, opening.taken_delta, opening.remaining_delta), (12, 0, 12))
+        self.assertEqual(LeaveLedgerService.backfill_opening_entries(self.year), 0)
+        self.assertEqual(LeaveLedgerService.rebuild_balances(self.year, apply=True), [])
+        self.assertEqual(LeaveBalance.objects.get(pk=balance.pk).leaves_remaining, 11)
+
+
+class LeaveBalanceSummaryTests(TestCase):
+    def test_refresh_deletes_summaries_without_balances(self):
+        employee = create_employee()
+        other = create_employee('E002')
+        sick = LeaveType.objects.create(name='sick')
+        balance = LeaveBalance.objects.create(employee=employee, leave_type=sick, year=2025, total_leaves=12)
+        LeaveBalance.objects.create(employee=other, leave_type=sick, year=2025, total_leaves=6)
+        self.assertEqual(LeaveBalanceSummaryService.refresh(2025), 2)
+
+        balance.delete()
+        LeaveBalanceSummaryService.refresh(2025, [employee.id])
+        self.assertEqual(
+            list(LeaveBalanceSummary.objects.values_list('employee_id', 'total_leaves')),
+            [(other.id, 6)],
+        )
+
+
+class LeaveIntervalIndexTests(TestCase):
+    def setUp(self):
+        self.employee = create_employee()
+        self.casual = LeaveType.objects.create(name='casual')
+
+    def overlap(self, start, end, **kwargs):
+        return LeaveIntervalIndex.find_overlap(self.employee.id, start, end, **kwargs)
+
+    def test_saving_a_leave_indexes_its_days(self):
+        leave = make_leave(self.employee, self.casual, date(2025, 3, 10), date(2025, 3, 12))
+        self.assertEqual(
+            list(LeaveDay.objects.filter(leave=leave).values_list('date', flat=True)),
+            [date(2025, 3, 10), date(2025, 3, 11), date(2025, 3, 12)],
+        )
+
+    def test_overlapping_ranges(self):
+        leave = make_leave(self.employee, self.casual, date(2025, 3, 10), date(2025, 3, 12))
+        self.assertEqual(self.overlap(date(2025, 3, 12), date(2025, 3, 14)), leave.id)
+        self.assertEqual(self.overlap(date(2025, 3, 1), date(2025, 3, 31)), leave.id)
+        self.assertIsNone(self.overlap(date(2025, 3, 13), date(2025, 3, 14)))
+        self.assertIsNone(self.overlap(date(2025, 3, 10), date(2025, 3, 12), exclude_leave_id=leave.id))
+        other = create_employee('E002')
+        self.assertIsNone(LeaveIntervalIndex.find_overlap(other.id, date(2025, 3, 10), date(2025, 3, 12)))
+
+    def test_half_days_only_clash_on_the_same_half(self):
+        day = date(2025, 3, 10)
+        leave = make_leave(self.employee, self.casual, day, day, half_day_period='first_half')
+        self.assertIsNone(self.overlap(day, day, half_day_period='second_half'))
+        self.assertEqual(self.overlap(day, day, half_day_period='first_half'), leave.id)
+        self.assertEqual(self.overlap(day, day), leave.id)
+
+    def test_closed_leaves_do_not_block(self):
+        leave = make_leave(self.employee, self.casual, date(2025, 3, 10), date(2025, 3, 12), status='pending')
+        make_leave(self.employee, self.casual, date(2025, 3, 20), date(2025, 3, 21), status='rejected')
+        self.assertIsNone(self.overlap(date(2025, 3, 20), date(2025, 3, 21)))
+
+        leave.status = 'rejected'
+        leave.save()
+        self.assertIsNone(self.overlap(date(2025, 3, 10), date(2025, 3, 12)))
+
+    def test_rebuild_matches_the_signal_maintained_index(self):
+        make_leave(self.employee, self.casual, date(2025, 3, 10), date(2025, 3, 12))
+        make_leave(self.employee, self.casual, date(2025, 4, 1), date(2025, 4, 1), half_day_period='second_half')
+        make_leave(self.employee, self.casual, date(2025, 5, 5), date(2025, 5, 6), status='rejected')
+        indexed = sorted(LeaveDay.objects.values_list('leave_id', 'date', 'status', 'half_day_period'))
+
+        LeaveDay.objects.all().delete()
+        self.assertEqual(LeaveIntervalIndex.rebuild(), 4)
+        self.assertEqual(sorted(LeaveDay.objects.values_list('leave_id', 'date', 'status', 'half_day_period')), indexed)
+
+
+class AbsenceSweepTests(SimpleTestCase):
+    def brute_force(self, group_index, starts, ends, n_groups, n_days):
+        counts = [[0] * n_days for _ in range(n_groups)]
+        for group, start, end in zip(group_index, starts, ends):
+            for day in range(start, end + 1):
+                counts[group][day] += 1
+        return counts
+
+    def sweep_both_ways(self, *args):
+        with mock.patch.object(heatmap, 'np', None):
+            pure = heatmap._sweep(*args)
+        return heatmap._sweep(*args), pure
+
+    def test_overlapping_intervals_and_month_edges(self):
+        # Two overlapping leaves in group 0, one running to the last day in group 1
+        args = ([0, 0, 1], [0, 2, 3], [3, 4, 6], 2, 7)
+        expected = [[1, 1, 2, 2, 1, 0, 0], [0, 0, 0, 1, 1, 1, 1]]
+        for result in self.sweep_both_ways(*args):
+            self.assertEqual(result, expected)
+
+    def test_no_intervals(self):
+        for result in self.sweep_both_ways([], [], [], 3, 5):
+            self.assertEqual(result, [[0] * 5] * 3)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(30)
+        n_groups, n_days = 6, 31
+        starts = [rng.randrange(n_days) for _ in range(500)]
+        ends = [rng.randrange(start, n_days) for start in starts]
+        group_index = [rng.randrange(n_groups) for _ in starts]
+        args = (group_index, starts, ends, n_groups, n_days)
+        expected = self.brute_force(*args)
+        for result in self.sweep_both_ways(*args):
+            self.assertEqual(result, expected)
+
+
+class AbsenceHeatmapTests(TestCase):
+    def test_counts_per_department_and_status(self):
+        casual = LeaveType.objects.create(name='casual')
+        alice = create_employee('E001', department='Engineering')
+        bob = create_employee('E002', department='Engineering')
+        carol = create_employee('E003', department='Sales')
+        make_leave(alice, casual, date(2025, 2, 27), date(2025, 3, 2))
+        make_leave(bob, casual, date(2025, 3, 2), date(2025, 3, 3), status='pending')
+        make_leave(carol, casual, date(2025, 3, 1), date(2025, 3, 1), status='rejected')
+
+        data = heatmap.build_absence_heatmap(date(2025, 3, 1), date(2025, 3, 3))
+        groups = {group['label']: group for group in data['groups']}
+        engineering = [(day['approved'], day['pending']) for day in groups['Engineering']['days']]
+        self.assertEqual(engineering, [(1, 0), (1, 1), (0, 1)])
+        self.assertEqual(groups['Engineering']['headcount'], 2)
+        self.assertEqual([day['off'] for day in groups['Sales']['days']], [0, 0, 0])
+
+
+class LeaveStatsApiTests(TestCase):
+    def test_counts_in_one_query(self):
+        casual = LeaveType.objects.create(name='casual')
+        today = date.today()
+        alice, bob = create_employee('E001'), create_employee('E002')
+        leave = make_leave(alice, casual, today, today)
+        Leave.objects.filter(pk=leave.pk).update(approved_date=timezone.now())
+        make_leave(bob, casual, today + timedelta(days=3), today + timedelta(days=3), status='pending')
+
+        with self.assertNumQueries(1):
+            response = views.get_leave_stats_api(RequestFactory().get('/'))
+        self.assertEqual(json.loads(response.content), {
+            'total_employees': 2,
+            'on_leave_today': 1,
+            'pending_applications': 1,
+            'approved_this_month': 1,
+        })
+
+
+class AsyncViewTests(TestCase):
+    """The ASGI variants answer exactly what the sync views do"""
+
+    def setUp(self):
+        self.region = Region.objects.create(name='Kolkata', code='KOL')
+        year = timezone.now().year
+        for name, day, optional in (('Festival', date(year, 10, 2), False), ('New Year', date(year, 1, 1), True),
+                                    ('Last year', date(year - 1, 5, 1), False)):
+            Holiday.objects.create(
+                name=name, holiday_type='Public', colour='red', date=day, region=self.region, is_optional=optional,
+            )
+        casual = LeaveType.objects.create(name='casual')
+        alice, bob = create_employee('E001', first_name='Alice'), create_employee('E002', first_name='Bob')
+        make_leave(alice, casual, date(year, 3, 3), date(year, 3, 4))
+        make_leave(bob, casual, date(year, 3, 5), date(year, 3, 5), status='pending')
+
+    def responses(self, name, *args):
+        request = RequestFactory().get('/')
+        sync_response = getattr(views, name)(request, *args)
+        async_response = async_to_sync(getattr(async_views, name))(request, *args)
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response['Content-Type'], 'application/json')
+        self.assertEqual(async_response['ETag'], sync_response['ETag'])
+        return sync_response.content, async_response.content
+
+    def test_calendar_events(self):
+        sync_body, async_body = self.responses('calendar_events')
+        self.assertEqual(async_body, sync_body)
+        self.assertEqual([event['title'] for event in json.loads(async_body)], [
+            'Holiday: Last year', 'Holiday: New Year', 'Holiday: Festival', 'Leave: Alice E001',
+        ])
+
+    def test_region_holidays(self):
+        sync_body, async_body = self.responses('get_region_holidays_api', self.region.id)
+        self.assertEqual(async_body, sync_body)
+        self.assertEqual([(holiday['name'], holiday['is_optional']) for holiday in json.loads(async_body)],
+                         [('New Year', True), ('Festival', False)])
+        self.assertEqual(self.responses('get_region_holidays_api', self.region.id + 1)[1], b'[]')
+
+
+@override_settings(CACHES=UNCACHED)
+class LeaveQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Leave pages and APIs stay within settings.QUERY_BUDGETS and do not grow with the data"""
+
+    def setUp(self):
+        LeaveTypeRegistry.invalidate()
+        self.next_number = 3
+        self.today = date.today()
+        self.region = Region.objects.create(name='Kolkata', code='KOL')
+        self.leave_types = [LeaveType.objects.create(name=name) for name in ('casual', 'sick', 'annual')]
+        self.hr = create_employee('E001', role='HR', department='HR')
+        self.member = create_employee('E002')
+        self.add_people(3)
+
+    def add_people(self, count):
+        start = self.next_number
+        self.next_number += count
+        for number in range(start, start + count):
+            employee = create_employee(f'E{number:03d}', department='Sales' if number % 2 else 'Engineering')
+            for leave_type in self.leave_types:
+                LeaveBalance.objects.create(
+                    employee=employee, leave_type=leave_type, year=self.today.year, total_leaves=12, leaves_remaining=12,
+                )
+            day = self.today.replace(day=1) + timedelta(days=number % 20)
+            make_leave(employee, self.leave_types[number % 3], day, day + timedelta(days=1),
+                       status=('approved', 'pending')[number % 2])
+            Holiday.objects.create(
+                name=f'Holiday {number}', holiday_type='Public', colour='red', region=self.region,
+                date=self.today.replace(month=1, day=1) + timedelta(days=number),
+            )
+        LeaveBalanceSummaryService.refresh(self.today.year)
+
+    def assert_flat(self, client, url):
+        first = self.assertWithinBudget(client.get(url))
+        self.add_people(10)
+        second = self.assertWithinBudget(client.get(url))
+        # Warm in-process caches (LeaveTypeRegistry, ShiftResolver) can only make the second request cheaper
+        self.assertLessEqual(second.count, first.count, f"{url} ran more queries with more leaves")
+
+    def test_hr_pages_and_apis(self):
+        client = session_client('HR', self.hr)
+        for name in ('leave_dashboard', 'leave_balance_list', 'calendar_events', 'leave_stats_api',
+                     'absence_heatmap_api'):
+            with self.subTest(name):
+                self.assert_flat(client, reverse(name))
+
+    def test_region_holidays_api(self):
+        client = session_client('HR', self.hr)
+        self.assert_flat(client, reverse('region_holidays_api', args=[self.region.id]))
+
+    def test_employee_pages(self):
+        client = session_client('Employee', self.member)
+        for name in ('employee_leave_details', 'apply_leave'):
+            with self.subTest(name):
+                self.assertWithinBudget(client.get(reverse(name)))
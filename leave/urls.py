@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Read-only JSON the dashboards poll; async under ASGI (see async_views.py)
+api = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('', views.leave_dashboard, name='leave_dashboard'),
@@ -9,7 +13,9 @@ urlpatterns = [
     # path('detail/<int:leave_id>/', views.leave_detail, name='leave_detail'),
     path('regions/', views.manage_regions, name='manage_regions'),
     path('api/stats/', views.get_leave_stats_api, name='leave_stats_api'),
-    path('calendar-events/', views.calendar_events, name='calendar_events'),
+    path('api/absence-heatmap/', views.absence_heatmap_api, name='absence_heatmap_api'),
+    path('calendar-events/', api.calendar_events, name='calendar_events'),
+    path('api/regions/<int:region_id>/holidays/', api.get_region_holidays_api, name='region_holidays_api'),
     path('holiday/add/', views.add_holiday, name='add_holiday'),
     path('event/add/', views.add_custom_event, name='add_custom_event'),
     path('leave_details',views.employee_leave_details,name='employee_leave_details'),
@@ -17,4 +23,5 @@ urlpatterns = [
     path('leave/<int:leave_id>/edit/', views.edit_leave_details, name='edit_leave_details'),
     path('leave-balances/', views.leave_balance_summary, name='leave_balance_list'),
     path('add-leave-balance/', views.add_leave_balance, name='add_leave_balance'),
+    path('api/employees/search/', views.employee_search_api, name='employee_search_api'),
 ]
\ No newline at end of file
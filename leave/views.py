@@ -1,14 +1,19 @@
+import logging
 from decimal import Decimal
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
-from django.db.models import Count, Q ,Sum
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import date, datetime, timedelta
 from django.contrib import messages
 from django.core.paginator import Paginator
-from .models import Leave, LeaveType, Region, Holiday ,LeaveBalance
+from .models import Leave, LeaveType, Region, Holiday ,LeaveBalance, LeaveBalanceSummary, LeaveDay
+from .registry import LeaveTypeRegistry
+from .heatmap import GROUP_BY_CHOICES, cached_absence_heatmap
 from hr.models import Employee
 from calendar import monthrange
+from hrms.compression import compressed
+from hrms.db import count_many
 
 # IMPORT THE NEW SERVICES
 from .services import (
@@ -16,9 +21,14 @@ from .services import (
     ProbationService, 
     OptionalLeaveService,
     LeaveAccrualService,
+    LeaveLedger,
+    LeaveIntervalIndex,
     initialize_employee_leave_balances
 )
 
+logger = logging.getLogger(__name__)
+
+@compressed
 def leave_dashboard(request):
     """Main dashboard view with leave statistics"""
     # Check authentication via session
@@ -57,13 +67,9 @@ def leave_dashboard(request):
     total_employees = Employee.objects.count()
     
     # Today Present (employees not on leave today)
-    employees_on_leave_today = Leave.objects.filter(
-        start_date__lte=today,
-        end_date__gte=today,
-        status='approved'
-    ).values_list('employee_id', flat=True)
+    employees_on_leave_today = LeaveIntervalIndex.employees_off(today)
     
-    today_present = total_employees - len(set(employees_on_leave_today))
+    today_present = total_employees - len(employees_on_leave_today)
     today_present_percentage = int((today_present / total_employees) * 100) if total_employees > 0 else 0
     
     # Planned Leaves (approved leaves starting in future)
@@ -232,7 +238,7 @@ def leave_list(request):
     leaves_page = paginator.get_page(page_number)
     
     # Get filter options
-    leave_types = LeaveType.objects.all()
+    leave_types = LeaveTypeRegistry.all()
     regions = Region.objects.filter(is_active=True)
     departments = Employee.objects.values_list('department', flat=True).distinct().order_by('department')
     
@@ -329,14 +335,27 @@ def apply_leave(request):
                 messages.error(request, 'Please select first half or second half for half-day leave.')
                 return redirect('apply_leave')
             
+            # Reject overlaps with the employee's open or approved leaves
+            overlapping_leave_id = LeaveIntervalIndex.find_overlap(
+                employee.id,
+                start_date_obj,
+                end_date_obj,
+                half_day_period=half_day_period if is_half_day else None
+            )
+            if overlapping_leave_id:
+                messages.error(request, 'These dates overlap a leave you have already applied for.')
+                return redirect('apply_leave')
+            
             # Convert total_days from form (frontend calculated)
             try:
                 total_days = Decimal(total_days_str)
             except:
                 total_days = Decimal('0')
             
-            # Debug logging
-            print(f"DEBUG: is_half_day={is_half_day}, total_days={total_days}, total_days_str={total_days_str}")
+            logger.debug(
+                "Leave application by %s: is_half_day=%s total_days=%s (submitted %r)",
+                user_email, is_half_day, total_days, total_days_str
+            )
             
             # If total_days is still 0, recalculate on backend
             if total_days <= 0:
@@ -361,7 +380,7 @@ def apply_leave(request):
             
             # Get leave type
             try:
-                leave_type = LeaveType.objects.get(id=leave_type_id)
+                leave_type = LeaveTypeRegistry.get_by_id(leave_type_id)
             except LeaveType.DoesNotExist:
                 messages.error(request, 'Invalid leave type selected.')
                 return redirect('apply_leave')
@@ -444,13 +463,11 @@ def apply_leave(request):
         except Exception as e:
             messages.error(request, f'Error applying for leave: {str(e)}')
             # Log the error for debugging
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Leave application error for {user_email}: {str(e)}", exc_info=True)
             return redirect('apply_leave')
     
     # GET request - show form
-    leave_types = LeaveType.objects.filter(is_active=True)
+    leave_types = LeaveTypeRegistry.active()
     
     # Get leave balances for current year
     leave_balances = LeaveBalance.objects.filter(
@@ -507,7 +524,8 @@ def approve_leave(request, leave_id):
                 leave.employee,
                 leave.leave_type,
                 leave.days_requested,
-                leave.start_date.year
+                leave.start_date.year,
+                leave=leave
             )
             
             if not success:
@@ -618,34 +636,59 @@ def manage_regions(request):
     
     return render(request, 'leave/manage_regions.html', context)
 
+@compressed
 def get_leave_stats_api(request):
     """API endpoint for dashboard statistics"""
     today = timezone.now().date()
-    total_employees = Employee.objects.count()
-    
-    stats = {
-        'total_employees': total_employees,
-        'on_leave_today': Leave.objects.filter(
-            start_date__lte=today,
-            end_date__gte=today,
-            status='approved'
-        ).count(),
-        'pending_applications': Leave.objects.filter(
-            status='pending'
-        ).count(),
-        'approved_this_month': Leave.objects.filter(
+    # One query for all four counts
+    stats = count_many(
+        total_employees=Employee.objects.all(),
+        on_leave_today=LeaveDay.objects.filter(date=today, status='approved'),
+        pending_applications=Leave.objects.filter(status='pending'),
+        approved_this_month=Leave.objects.filter(
             status='approved',
             approved_date__month=today.month,
             approved_date__year=today.year
-        ).count(),
-    }
+        ),
+    )
     
     return JsonResponse(stats)
 
+@compressed
+def absence_heatmap_api(request):
+    """Per-day count and list of people off for a month, grouped by department or manager"""
+    if not request.session.get('user_authenticated'):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    
+    today = timezone.now().date()
+    month_param = request.GET.get('month')
+    try:
+        month_start = datetime.strptime(month_param, '%Y-%m').date() if month_param else today.replace(day=1)
+    except ValueError:
+        return JsonResponse({'error': 'month must be in YYYY-MM format'}, status=400)
+    
+    group_by = request.GET.get('group_by', 'department')
+    if group_by not in GROUP_BY_CHOICES:
+        return JsonResponse({'error': f"group_by must be one of {', '.join(GROUP_BY_CHOICES)}"}, status=400)
+    
+    department = request.GET.get('department') or None
+    manager_code = request.GET.get('manager') or None
+    
+    # Managers only see their own department
+    user_department = request.session.get('user_department')
+    if request.session.get('user_role') == 'MANAGER' and user_department:
+        department = user_department
+    
+    data = cached_absence_heatmap(
+        month_start.year, month_start.month, group_by, department, manager_code
+    )
+    return JsonResponse(data)
+
 def leave_view(request):
     """Simple leave view - redirects to dashboard"""
     return redirect('leave_dashboard')
 
+@compressed
 def calendar_events(request):
     """Return holidays and approved leaves as JSON for FullCalendar"""
     events = []
@@ -661,7 +704,7 @@ def calendar_events(request):
         })
 
     # 2. Approved Leaves
-    leaves = Leave.objects.filter(status="approved")
+    leaves = Leave.objects.filter(status="approved").select_related('employee')
     for l in leaves:
         events.append({
             "title": f"Leave: {l.employee.first_name} {l.employee.last_name}",
@@ -672,6 +715,7 @@ def calendar_events(request):
         })
 
     return JsonResponse(events, safe=False)
+@compressed
 def get_region_holidays_api(request, region_id):
     """API to fetch holidays for a specific region"""
     holidays = Holiday.objects.filter(
@@ -784,6 +828,7 @@ def add_custom_event(request):
     
     return redirect('leave_dashboard')
 
+@compressed
 def employee_leave_details(request):
     """Employee-specific leave details page with strict rules information"""
     if not request.session.get('user_authenticated'):
@@ -923,55 +968,92 @@ def edit_leave_details(request, leave_id):
 
 
 def leave_balance_summary(request):
+    """Per-employee leave totals for one year, read from LeaveBalanceSummary"""
+    if not request.session.get('user_authenticated'):
+        return redirect('login')
+    
     user_role = request.session.get('user_role')          
     user_department = request.session.get('user_department')
+    current_year = date.today().year
     
-    # Start building the queryset
-    queryset = LeaveBalance.objects
+    try:
+        selected_year = int(request.GET.get('year', current_year))
+    except (TypeError, ValueError):
+        selected_year = current_year
+    department_filter = request.GET.get('department', '')
+    search_query = request.GET.get('search', '').strip()
+    
+    summaries = LeaveBalanceSummary.objects.filter(year=selected_year).select_related('employee').only(
+        'total_leaves', 'leaves_taken', 'carry_forward', 'leaves_remaining',
+        'employee__first_name', 'employee__last_name', 'employee__employee_id', 'employee__department',
+    )
     
-    # Apply department filter for managers BEFORE aggregation
+    # Managers only ever see their own department
     if user_role == 'MANAGER' and user_department:
-        queryset = queryset.filter(employee__department=user_department)
-    
-    # Group by employee and sum up all leave types
-    balances = (
-        queryset
-        .values('employee__id', 'employee__first_name', 'employee__last_name')
-        .annotate(
-            total_leaves=Sum('total_leaves'),
-            leaves_taken=Sum('leaves_taken'),
-            carry_forward=Sum('carry_forward')
+        summaries = summaries.filter(employee__department=user_department)
+    elif department_filter:
+        summaries = summaries.filter(employee__department=department_filter)
+    
+    if search_query:
+        summaries = summaries.filter(
+            Q(employee__first_name__icontains=search_query) |
+            Q(employee__last_name__icontains=search_query) |
+            Q(employee__employee_id__icontains=search_query)
         )
-        .order_by('employee__first_name')
-    )
-
-    # Calculate remaining leaves for each employee
-    for b in balances:
-        total = (b['total_leaves'] or 0) + (b['carry_forward'] or 0)
-        taken = b['leaves_taken'] or 0
-        b['leaves_remaining'] = total - taken
-
-    # ADD THESE LINES - Get data for modal dropdowns
+    
+    paginator = Paginator(summaries.order_by('employee__first_name', 'employee_id'), 25)
+    balances = paginator.get_page(request.GET.get('page'))
+    
     if user_role == 'MANAGER' and user_department:
-        employees = Employee.objects.filter(department=user_department, status='active').order_by('first_name')
+        departments = [user_department]
     else:
-        employees = Employee.objects.filter(status='active').order_by('first_name')
+        departments = Employee.objects.values_list('department', flat=True).distinct().order_by('department')
     
-    leave_types = LeaveType.objects.filter(is_active=True)
-    current_year = date.today().year
+    leave_types = LeaveTypeRegistry.active()
     years = range(current_year - 2, current_year + 3)
 
-    # UPDATE YOUR CONTEXT - Add these three lines
     context = {
         'balances': balances,
-        'employees': employees,           # ADD THIS
-        'leave_types': leave_types,       # ADD THIS
-        'years': years,                   # ADD THIS
-        'current_year': current_year,     # ADD THIS
+        'leave_types': leave_types,
+        'years': years,
+        'current_year': current_year,
+        'selected_year': selected_year,
+        'departments': departments,
+        'department_filter': department_filter,
+        'search_query': search_query,
     }
     
     return render(request, 'leave/leave_balance_summary.html', context)
 
+@compressed
+def employee_search_api(request):
+    """Typeahead search for the Add Leave Balance employee picker"""
+    if not request.session.get('user_authenticated'):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    
+    query = request.GET.get('q', '').strip()
+    if len(query) < 2:
+        return JsonResponse([], safe=False)
+    
+    employees = Employee.objects.filter(status='active').filter(
+        Q(first_name__istartswith=query) |
+        Q(last_name__istartswith=query) |
+        Q(employee_id__istartswith=query)
+    )
+    
+    user_role = request.session.get('user_role')
+    user_department = request.session.get('user_department')
+    if user_role == 'MANAGER' and user_department:
+        employees = employees.filter(department=user_department)
+    
+    results = [
+        {'id': emp_id, 'label': f"{first_name} {last_name} ({employee_code})"}
+        for emp_id, first_name, last_name, employee_code in employees.order_by('first_name').values_list(
+            'id', 'first_name', 'last_name', 'employee_id'
+        )[:20]
+    ]
+    return JsonResponse(results, safe=False)
+
 def add_leave_balance(request):
     """Handle adding new leave balance"""
     if not request.session.get('user_authenticated'):
@@ -993,7 +1075,7 @@ def add_leave_balance(request):
             # Get employee and leave type
             try:
                 employee = Employee.objects.get(id=employee_id)
-                leave_type = LeaveType.objects.get(id=leave_type_id)
+                leave_type = LeaveTypeRegistry.get_by_id(leave_type_id)
             except (Employee.DoesNotExist, LeaveType.DoesNotExist):
                 messages.error(request, 'Invalid employee or leave type selected.')
                 return redirect('leave_balance_list')
@@ -1017,7 +1099,7 @@ def add_leave_balance(request):
             leaves_remaining = total_leaves + carry_forward
             
             # Create new leave balance
-            LeaveBalance.objects.create(
+            balance = LeaveBalance.objects.create(
                 employee=employee,
                 leave_type=leave_type,
                 total_leaves=total_leaves,
@@ -1026,6 +1108,8 @@ def add_leave_balance(request):
                 carry_forward=carry_forward,
                 year=year
             )
+            with LeaveLedger.use() as ledger:
+                ledger.record(balance, 'manual', note=f"Added by {request.session.get('user_email')}")
             
             messages.success(
                 request, 
@@ -2885,4 +2885,3 @@
     }
   );
 });
-//# sourceMappingURL=bootstrap.min.js.map
@@ -1127,4 +1127,3 @@
     (e.preventOverflow = ne),
     Object.defineProperty(e, "__esModule", { value: !0 });
 });
-//# sourceMappingURL=popper.min.js.map